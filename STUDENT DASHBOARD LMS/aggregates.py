@@ -0,0 +1,142 @@
+import numpy as np
+from data_store import get_store
+from instrumentation import timed
+
+TOP_PERFORMER_GPA = 3.7
+SCORE_COLUMNS = ['test1_score', 'test2_score', 'test3_score']
+
+# Fixed bin edges so histograms can be updated row by row
+GPA_BIN_EDGES = np.linspace(0.0, 4.0, 21)
+ATTENDANCE_BIN_EDGES = np.linspace(0.0, 100.0, 21)
+MAX_SCORE = 100
+
+
+def _histogram(values, edges):
+    return np.histogram(np.clip(values, edges[0], edges[-1]), bins=edges)[0]
+
+
+def _score_counts(values):
+    return np.bincount(np.clip(np.asarray(values, dtype=np.int64), 0, MAX_SCORE),
+                       minlength=MAX_SCORE + 1)
+
+
+def _value_counts(values):
+    return {value: int(count) for value, count in values.value_counts(sort=False).items() if count}
+
+
+def _quantile_from_counts(counts, cumulative, q):
+    # Linear interpolation between order statistics, like np.quantile
+    position = q * (cumulative[-1] - 1)
+    lower = int(np.floor(position))
+    upper = int(np.ceil(position))
+    lower_value = np.searchsorted(cumulative, lower, side='right')
+    upper_value = np.searchsorted(cumulative, upper, side='right')
+    return lower_value + (upper_value - lower_value) * (position - lower)
+
+
+def box_stats_from_counts(counts):
+    # Box plot statistics for integer values given their frequency table
+    cumulative = np.cumsum(counts)
+    if len(cumulative) == 0 or cumulative[-1] == 0:
+        return None
+    values = np.nonzero(counts)[0]
+    q1 = _quantile_from_counts(counts, cumulative, 0.25)
+    median = _quantile_from_counts(counts, cumulative, 0.5)
+    q3 = _quantile_from_counts(counts, cumulative, 0.75)
+    iqr = q3 - q1
+    inside = values[(values >= q1 - 1.5 * iqr) & (values <= q3 + 1.5 * iqr)]
+    return {
+        'q1': float(q1),
+        'median': float(median),
+        'q3': float(q3),
+        'lowerfence': float(inside.min()),
+        'upperfence': float(inside.max()),
+        'mean': float(np.dot(np.arange(len(counts)), counts) / cumulative[-1]),
+        'min': float(values.min()),
+        'max': float(values.max()),
+        'count': int(cumulative[-1])
+    }
+
+
+class RosterAggregates:
+    # Overview and Performance Analytics numbers for one dataset version. Built
+    # with one pass over the roster and then kept current by adding and
+    # removing only the rows that change.
+    def __init__(self, df=None):
+        self.total_students = 0
+        self.attendance_sum = 0.0
+        self.gpa_sum = 0.0
+        self.top_performers = 0
+        self.club_counts = {}
+        self.specialization_counts = {}
+        self.gpa_histogram = np.zeros(len(GPA_BIN_EDGES) - 1, dtype=np.int64)
+        self.attendance_histogram = np.zeros(len(ATTENDANCE_BIN_EDGES) - 1, dtype=np.int64)
+        self.score_counts = {column: np.zeros(MAX_SCORE + 1, dtype=np.int64)
+                             for column in SCORE_COLUMNS}
+        if df is not None:
+            self._apply(df, 1)
+
+    def _apply(self, rows, sign):
+        if len(rows) == 0:
+            return
+        gpa = rows['gpa'].to_numpy(dtype=float)
+        attendance = rows['attendance_percentage'].to_numpy(dtype=float)
+        self.total_students += sign * len(rows)
+        self.attendance_sum += sign * float(attendance.sum())
+        self.gpa_sum += sign * float(gpa.sum())
+        self.top_performers += sign * int((gpa >= TOP_PERFORMER_GPA).sum())
+        self.gpa_histogram += sign * _histogram(gpa, GPA_BIN_EDGES)
+        self.attendance_histogram += sign * _histogram(attendance, ATTENDANCE_BIN_EDGES)
+        for column in SCORE_COLUMNS:
+            self.score_counts[column] += sign * _score_counts(rows[column])
+        for counts, column in ((self.club_counts, 'extracurricular_activities'),
+                               (self.specialization_counts, 'specialization')):
+            for value, count in _value_counts(rows[column]).items():
+                counts[value] = counts.get(value, 0) + sign * count
+                if counts[value] == 0:
+                    del counts[value]
+
+    def copy(self):
+        other = RosterAggregates()
+        other.total_students = self.total_students
+        other.attendance_sum = self.attendance_sum
+        other.gpa_sum = self.gpa_sum
+        other.top_performers = self.top_performers
+        other.club_counts = dict(self.club_counts)
+        other.specialization_counts = dict(self.specialization_counts)
+        other.gpa_histogram = self.gpa_histogram.copy()
+        other.attendance_histogram = self.attendance_histogram.copy()
+        other.score_counts = {column: counts.copy() for column, counts in self.score_counts.items()}
+        return other
+
+    def apply_upsert(self, old_rows, new_rows, df):
+        # Called by the data store when rows are added or changed
+        updated = self.copy()
+        updated._apply(old_rows, -1)
+        updated._apply(new_rows, 1)
+        return updated
+
+    def statistics(self):
+        total = self.total_students
+        return {
+            'total_students': total,
+            'avg_attendance': self.attendance_sum / total if total else float('nan'),
+            'avg_gpa': self.gpa_sum / total if total else float('nan'),
+            'top_performers': self.top_performers,
+            'active_clubs': len(self.club_counts)
+        }
+
+    def club_participation(self):
+        # (club, count) pairs, most popular first
+        return sorted(self.club_counts.items(), key=lambda item: (-item[1], item[0]))
+
+    def specialization_distribution(self):
+        return sorted(self.specialization_counts.items(), key=lambda item: (-item[1], item[0]))
+
+    def score_box_stats(self):
+        return {column: box_stats_from_counts(counts) for column, counts in self.score_counts.items()}
+
+
+@timed('aggregates.get_aggregates')
+def get_aggregates():
+    return get_store().derived('aggregates', RosterAggregates)
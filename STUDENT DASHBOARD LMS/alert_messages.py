@@ -0,0 +1,11 @@
+# Alert wording shared by the per-student trackers and the roster-wide
+# alert table, so both always say the same thing. Attendance messages
+# take the current percentage and the number of classes needed.
+
+ATTENDANCE_CRITICAL = ('Critical attendance alert! Current attendance is {percentage}%. '
+                       'Need to attend next {count} classes to reach minimum requirement.')
+ATTENDANCE_WARNING = ('Attendance warning! Current attendance is {percentage}%. '
+                      'Need to attend next {count} classes to reach good standing.')
+ASSIGNMENTS_HIGH = 'High Priority: Multiple assignments pending. Please complete them soon.'
+ASSIGNMENTS_MEDIUM = 'Medium Priority: Stay on track with your remaining assignments.'
+ASSIGNMENTS_LOW = 'Low Priority: You\'re doing well, keep up the good work!'
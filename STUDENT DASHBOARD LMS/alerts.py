@@ -0,0 +1,122 @@
+import numpy as np
+import pandas as pd
+from attendance_tracker import get_attendance_summary_batch
+from assignment_tracker import TOTAL_ASSIGNMENTS, assignment_alert_codes
+from alert_messages import (ASSIGNMENTS_HIGH, ASSIGNMENTS_LOW, ASSIGNMENTS_MEDIUM, ATTENDANCE_CRITICAL,
+                            ATTENDANCE_WARNING)
+
+# Alerts are stored as small integer codes; message text is only rendered
+# for the rows that are actually shown.
+SEVERITY_LABELS = ['None', 'Low', 'Medium', 'High']
+SEVERITY_LOW, SEVERITY_MEDIUM, SEVERITY_HIGH = 1, 2, 3
+
+SOURCE_LABELS = ['Attendance', 'Assignments']
+SOURCE_ATTENDANCE, SOURCE_ASSIGNMENTS = 0, 1
+
+ALERT_TEMPLATES = [ATTENDANCE_CRITICAL, ATTENDANCE_WARNING, ASSIGNMENTS_HIGH, ASSIGNMENTS_MEDIUM, ASSIGNMENTS_LOW]
+TEMPLATE_ATTENDANCE_CRITICAL, TEMPLATE_ATTENDANCE_WARNING = 0, 1
+TEMPLATE_ASSIGNMENTS_HIGH, TEMPLATE_ASSIGNMENTS_MEDIUM, TEMPLATE_ASSIGNMENTS_LOW = 2, 3, 4
+
+ALERT_COLUMNS = {
+    'student_id': 'int64',
+    'source': 'int8',
+    'severity': 'int8',
+    'template_id': 'int8',
+    'percentage': 'float64',
+    'count': 'int32'
+}
+
+
+def _empty_alert_table():
+    return pd.DataFrame({column: pd.Series(dtype=dtype) for column, dtype in ALERT_COLUMNS.items()})
+
+
+def build_alert_table(df, min_severity=SEVERITY_LOW):
+    # Classify the whole roster (or one chunk of it) with vectorized masks
+    student_ids = df['student_id'].to_numpy(dtype=np.int64)
+
+    attendance = get_attendance_summary_batch(df['total_classes'], df['classes_attended'],
+                                              df['attendance_percentage'])
+    status_codes = attendance['status'].cat.codes.to_numpy()
+    # Status codes: 0 Good, 1 Warning, 2 Critical
+    attendance_severity = np.select([status_codes == 2, status_codes == 1],
+                                    [SEVERITY_HIGH, SEVERITY_MEDIUM], default=0)
+    attendance_template = np.where(status_codes == 2, TEMPLATE_ATTENDANCE_CRITICAL,
+                                   TEMPLATE_ATTENDANCE_WARNING)
+
+    assignments_completed = df['assignments_completed'].to_numpy()
+    assignment_severity = assignment_alert_codes(assignments_completed)
+    assignment_template = np.select([assignment_severity == SEVERITY_HIGH, assignment_severity == SEVERITY_MEDIUM],
+                                    [TEMPLATE_ASSIGNMENTS_HIGH, TEMPLATE_ASSIGNMENTS_MEDIUM],
+                                    default=TEMPLATE_ASSIGNMENTS_LOW)
+
+    keep_attendance = attendance_severity >= min_severity
+    keep_assignments = assignment_severity >= min_severity
+    if not keep_attendance.any() and not keep_assignments.any():
+        return _empty_alert_table()
+
+    table = pd.DataFrame({
+        'student_id': np.concatenate([student_ids[keep_attendance], student_ids[keep_assignments]]),
+        'source': np.concatenate([np.full(keep_attendance.sum(), SOURCE_ATTENDANCE),
+                                  np.full(keep_assignments.sum(), SOURCE_ASSIGNMENTS)]),
+        'severity': np.concatenate([attendance_severity[keep_attendance],
+                                    assignment_severity[keep_assignments]]),
+        'template_id': np.concatenate([attendance_template[keep_attendance],
+                                       assignment_template[keep_assignments]]),
+        'percentage': np.concatenate([attendance['current_percentage'].to_numpy()[keep_attendance],
+                                      np.full(keep_assignments.sum(), np.nan)]),
+        'count': np.concatenate([attendance['classes_needed'].to_numpy()[keep_attendance],
+                                 TOTAL_ASSIGNMENTS - assignments_completed[keep_assignments]])
+    })
+    return table.astype(ALERT_COLUMNS)
+
+
+def iter_alert_chunks(roster_chunks, min_severity=SEVERITY_LOW):
+    # roster_chunks is any iterable of roster frames, e.g. pd.read_csv(..., chunksize=n)
+    for chunk in roster_chunks:
+        table = build_alert_table(chunk, min_severity)
+        if len(table):
+            yield table
+
+
+def write_alerts(roster_chunks, path, min_severity=SEVERITY_LOW):
+    # Stream the alert table to a CSV file one chunk at a time
+    rows = 0
+    with open(path, 'w', newline='') as f:
+        _empty_alert_table().to_csv(f, index=False)
+        for table in iter_alert_chunks(roster_chunks, min_severity):
+            table.to_csv(f, index=False, header=False)
+            rows += len(table)
+    return rows
+
+
+def render_alert(alert):
+    # Message text for one alert row (a Series or dict from the alert table)
+    return ALERT_TEMPLATES[int(alert['template_id'])].format(
+        percentage=alert['percentage'], count=int(alert['count']))
+
+
+def render_alerts(table):
+    # Readable copy of a (small) slice of the alert table for display
+    return pd.DataFrame({
+        'student_id': table['student_id'].to_numpy(),
+        'source': [SOURCE_LABELS[code] for code in table['source']],
+        'severity': [SEVERITY_LABELS[code] for code in table['severity']],
+        'message': [render_alert(row) for _, row in table.iterrows()]
+    }, index=table.index)
+
+
+if __name__ == '__main__':
+    import argparse
+    from storage import CSV_PATH, STUDENT_DTYPES
+
+    parser = argparse.ArgumentParser(description='Write attendance and assignment alerts for the roster')
+    parser.add_argument('output', help='Destination CSV for the alert table')
+    parser.add_argument('--csv', default=CSV_PATH, help='Roster CSV to scan')
+    parser.add_argument('--chunk-size', type=int, default=100000)
+    parser.add_argument('--min-severity', default='Low', choices=SEVERITY_LABELS[1:])
+    args = parser.parse_args()
+
+    chunks = pd.read_csv(args.csv, dtype=STUDENT_DTYPES, chunksize=args.chunk_size)
+    rows = write_alerts(chunks, args.output, SEVERITY_LABELS.index(args.min_severity))
+    print(f'Wrote {rows} alerts to {args.output}')
@@ -1,54 +1,100 @@
 import pandas as pd
 import numpy as np
+from instrumentation import timed
 
+GPA_WEIGHTS = (0.3, 0.3, 0.4)  # More weight to recent test
+
+TREND_LABELS = [
+    '📈 Strong Improvement',
+    '📈 Steady Improvement',
+    '📉 Needs Attention',
+    '📉 Slight Decline',
+    '📊 Maintaining Level'
+]
+STRENGTH_LABELS = ['Excellent', 'Good', 'Average', 'Needs Improvement']
+
+# Recommendation codes are bit flags so one integer per student holds them all
+REC_IMPROVE_ATTENDANCE = 1
+REC_COMPLETE_ASSIGNMENTS = 2
+REC_SEEK_HELP = 4
+REC_REGULAR_PRACTICE = 8
+RECOMMENDATION_MESSAGES = {
+    REC_IMPROVE_ATTENDANCE: 'Try to improve your attendance to better understand the course material',
+    REC_COMPLETE_ASSIGNMENTS: 'Complete more assignments to strengthen your practical skills',
+    REC_SEEK_HELP: 'Consider seeking additional help with course material',
+    REC_REGULAR_PRACTICE: 'Regular practice could help improve your test scores'
+}
+
+# Batch versions: each takes whole columns and returns one value per student
+
+def calculate_gpa_batch(test1, test2, test3):
+    test1, test2, test3 = (np.asarray(t, dtype=float) for t in (test1, test2, test3))
+    weighted_avg = (test1 * GPA_WEIGHTS[0] + test2 * GPA_WEIGHTS[1] + test3 * GPA_WEIGHTS[2])
+    return (weighted_avg / 100) * 4.0
+
+def get_performance_trend_codes(test1, test2, test3):
+    # Index into TREND_LABELS for every student
+    test1, test2, test3 = (np.asarray(t, dtype=float) for t in (test1, test2, test3))
+    recent_change = test3 - test2
+    overall_change = test3 - test1
+    conditions = [
+        (recent_change > 5) & (overall_change > 10),
+        (recent_change > 0) & (overall_change > 0),
+        (recent_change < -5) & (overall_change < -10),
+        (recent_change < 0) & (overall_change < 0)
+    ]
+    return np.select(conditions, [0, 1, 2, 3], default=4).astype(np.int8)
+
+def calculate_subject_strength_codes(test_scores):
+    # test_scores is (students x tests); returns an index into STRENGTH_LABELS
+    avg_score = np.mean(np.atleast_2d(np.asarray(test_scores, dtype=float)), axis=1)
+    return np.select([avg_score >= 90, avg_score >= 80, avg_score >= 70], [0, 1, 2],
+                     default=3).astype(np.int8)
+
+def generate_recommendation_codes(attendance, assignments_completed, test_scores):
+    attendance = np.asarray(attendance, dtype=float)
+    assignments_completed = np.asarray(assignments_completed)
+    avg_score = np.mean(np.atleast_2d(np.asarray(test_scores, dtype=float)), axis=1)
+    codes = np.zeros(len(avg_score), dtype=np.uint8)
+    codes |= np.where(attendance < 85, REC_IMPROVE_ATTENDANCE, 0).astype(np.uint8)
+    codes |= np.where(assignments_completed < 8, REC_COMPLETE_ASSIGNMENTS, 0).astype(np.uint8)
+    codes |= np.select([avg_score < 70, avg_score < 80], [REC_SEEK_HELP, REC_REGULAR_PRACTICE],
+                       default=0).astype(np.uint8)
+    return codes
+
+def decode_recommendations(code):
+    return [message for flag, message in RECOMMENDATION_MESSAGES.items() if int(code) & flag]
+
+@timed('analytics.analyze_students')
+def analyze_students(df):
+    # Cohort-wide insights in one vectorized pass over the roster columns
+    scores = df[['test1_score', 'test2_score', 'test3_score']].to_numpy(dtype=float)
+    return pd.DataFrame({
+        'student_id': df['student_id'].to_numpy(),
+        'gpa': calculate_gpa_batch(scores[:, 0], scores[:, 1], scores[:, 2]),
+        'trend_code': get_performance_trend_codes(scores[:, 0], scores[:, 1], scores[:, 2]),
+        'strength_code': calculate_subject_strength_codes(scores),
+        'recommendation_code': generate_recommendation_codes(
+            df['attendance_percentage'], df['assignments_completed'], scores)
+    }, index=df.index)
+
+# Single-student helpers used by the dashboards
+
+@timed('analytics.calculate_gpa')
 def calculate_gpa(test1, test2, test3):
     # Enhanced GPA calculation with weighted scores
-    weights = [0.3, 0.3, 0.4]  # More weight to recent test
-    weighted_avg = (test1 * weights[0] + test2 * weights[1] + test3 * weights[2])
-    return (weighted_avg / 100) * 4.0
+    return float(calculate_gpa_batch([test1], [test2], [test3])[0])
 
+@timed('analytics.get_performance_trend')
 def get_performance_trend(test1, test2, test3):
     # Advanced performance trend analysis
-    recent_change = test3 - test2
-    overall_change = test3 - test1
-    
-    if recent_change > 5 and overall_change > 10:
-        return '📈 Strong Improvement'
-    elif recent_change > 0 and overall_change > 0:
-        return '📈 Steady Improvement'
-    elif recent_change < -5 and overall_change < -10:
-        return '📉 Needs Attention'
-    elif recent_change < 0 and overall_change < 0:
-        return '📉 Slight Decline'
-    else:
-        return '📊 Maintaining Level'
+    return TREND_LABELS[get_performance_trend_codes([test1], [test2], [test3])[0]]
 
+@timed('analytics.generate_recommendations')
 def generate_recommendations(attendance, assignments_completed, test_scores):
-    recommendations = []
-    
-    # Attendance recommendations
-    if attendance < 85:
-        recommendations.append('Try to improve your attendance to better understand the course material')
-    
-    # Assignment recommendations
-    if assignments_completed < 8:
-        recommendations.append('Complete more assignments to strengthen your practical skills')
-    
-    # Test performance recommendations
-    avg_score = np.mean(test_scores)
-    if avg_score < 70:
-        recommendations.append('Consider seeking additional help with course material')
-    elif avg_score < 80:
-        recommendations.append('Regular practice could help improve your test scores')
-    
-    return recommendations
+    code = generate_recommendation_codes([attendance], [assignments_completed], [test_scores])[0]
+    return decode_recommendations(code)
 
+@timed('analytics.calculate_subject_strength')
 def calculate_subject_strength(test_scores):
-    avg_score = np.mean(test_scores)
-    if avg_score >= 90:
-        return 'Excellent'
-    elif avg_score >= 80:
-        return 'Good'
-    elif avg_score >= 70:
-        return 'Average'
-    return 'Needs Improvement'
\ No newline at end of file
+    return STRENGTH_LABELS[calculate_subject_strength_codes([test_scores])[0]]
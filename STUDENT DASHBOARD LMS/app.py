@@ -1,10 +1,9 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from passlib.hash import pbkdf2_sha256
 import os
 from dotenv import load_dotenv
+from theme import begin_rerun, html_stats, inject_styles, register_styles, render_html
+from instrumentation import (begin_trace, display_profiling_panel, end_trace, profiling_panel_enabled,
+                             record_session_size, record_size, span, start_metrics_server, timed)
 
 # Load environment variables
 load_dotenv()
@@ -26,8 +25,12 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Custom CSS for modern UI
-st.markdown("""
+# Custom CSS for modern UI, merged and sent once per rerun
+begin_rerun()
+# Record this rerun's spans for the profiling panel
+begin_trace()
+start_metrics_server()
+register_styles('app', """
 <style>
     /* Global Styles */
     .main {background-color: #1a1a1a}
@@ -57,7 +60,8 @@ st.markdown("""
     [data-testid="stDataFrame"] {border-radius: 12px; box-shadow: 0 2px 4px rgba(0,0,0,0.2); background-color: black; color: #e0e0e0}
     .js-plotly-plot {border-radius: 12px; box-shadow: 0 2px 4px rgba(0,0,0,0.2); background-color: black}
 </style>
-""", unsafe_allow_html=True)
+""")
+inject_styles('app')
 
 # Initialize session state
 if 'authenticated' not in st.session_state:
@@ -66,29 +70,21 @@ if 'user_type' not in st.session_state:
     st.session_state.user_type = None
 
 # Import student authentication
-from student_auth import init_student_auth, student_login_page, student_dashboard, student_logout
+from student_auth import init_student_auth, restore_student_session, student_login_page, student_dashboard, student_logout
 
 # Initialize student authentication
 init_student_auth()
+restore_student_session()
 
-# Sample user credentials (in production, use a secure database)
-USERS = {
-    'admin@upes.ac.in': pbkdf2_sha256.hash('admin123'),
-    'teacher@upes.ac.in': pbkdf2_sha256.hash('teacher123')
-}
-
-def load_data():
-    return pd.read_csv('data/student_data.csv')
-
-def calculate_statistics(df):
-    stats = {
-        'total_students': len(df),
-        'avg_attendance': df['attendance_percentage'].mean(),
-        'avg_gpa': df['gpa'].mean(),
-        'top_performers': len(df[df['gpa'] >= 3.7]),
-        'active_clubs': df['extracurricular_activities'].nunique()
-    }
-    return stats
+# The staff pages' modules, and credentials for the login handlers, are
+# imported where they are first used, so the login page only loads what it
+# needs (see benchmarks/import_time.py)
+@timed('calculate_statistics')
+def calculate_statistics(df=None):
+    from aggregates import RosterAggregates, get_aggregates
+    # Served from the per-version aggregates unless a specific frame is given
+    aggregates = get_aggregates() if df is None else RosterAggregates(df)
+    return aggregates.statistics()
 
 def login_page():
     st.image('assets/UPES.png', width=200)
@@ -104,10 +100,18 @@ def login_page():
             submit = st.form_submit_button('Login')
             
             if submit:
-                if email in USERS and pbkdf2_sha256.verify(password, USERS[email]):
+                from credentials import (LOGIN_BUSY, LOGIN_OK, LOGIN_RATE_LIMITED, STAFF_ROLES, client_address,
+                                         get_credential_store)
+                result = get_credential_store().verify_staff(email, password, client_address())
+                if result == LOGIN_OK:
                     st.session_state.authenticated = True
                     st.session_state.user_type = 'staff'
+                    st.session_state.staff_role = STAFF_ROLES.get(email)
                     st.rerun()
+                elif result == LOGIN_RATE_LIMITED:
+                    st.error('Too many login attempts. Please wait a minute and try again')
+                elif result == LOGIN_BUSY:
+                    st.error('The server is busy. Please try again in a moment')
                 else:
                     st.error('Invalid credentials')
     else:
@@ -116,195 +120,127 @@ def login_page():
 def main_dashboard():
     # Check if student is logged in
     if st.session_state.get('student_authenticated', False):
-        student_dashboard()
+        with span('page.student_dashboard'):
+            student_dashboard()
         if st.sidebar.button('Logout'):
             student_logout()
         return
     
     # Staff dashboard
-    st.sidebar.markdown("<h2 style='color: #1f4d7a; margin-bottom: 1.5rem;'>🎓 Navigation</h2>", unsafe_allow_html=True)
+    render_html("<h2 style='color: #1f4d7a; margin-bottom: 1.5rem;'>🎓 Navigation</h2>", st.sidebar)
     page = st.sidebar.radio("", ["Overview", "Performance Analytics", "Student Details"])
     
     if st.sidebar.button('Logout'):
         st.session_state.authenticated = False
         st.session_state.user_type = None
+        st.session_state.staff_role = None
         st.rerun()
     
-    # Load and process data
-    df = load_data()
-    stats = calculate_statistics(df)
-    
-    if page == "Overview":
-        st.markdown("<h1 style='text-align: center;'>📊 UPES Student Performance Analytics</h1>", unsafe_allow_html=True)
+    with span('page.' + page.lower().replace(' ', '_')):
+        if page == "Overview":
+            stats = calculate_statistics()
+            render_html("<h1 style='text-align: center;'>📊 UPES Student Performance Analytics</h1>")
         
-        # Top metrics row with enhanced styling
-        st.markdown("<h2 style='color: #2c3e50; margin: 2rem 0 1rem;'>📈 Key Metrics</h2>", unsafe_allow_html=True)
-        col1, col2, col3, col4, col5 = st.columns(5)
-        with col1:
-            st.metric('Total Students', f"{stats['total_students']:,}")
-        with col2:
-            st.metric('Average Attendance', f"{stats['avg_attendance']:.1f}%", delta=f"{stats['avg_attendance']-75:.1f}%" if stats['avg_attendance'] > 75 else None)
-        with col3:
-            st.metric('Average GPA', f"{stats['avg_gpa']:.2f}", delta=f"{stats['avg_gpa']-3.0:.2f}" if stats['avg_gpa'] > 3.0 else None)
-        with col4:
-            st.metric('Top Performers', stats['top_performers'], delta=f"{(stats['top_performers']/stats['total_students']*100):.1f}%")
-        with col5:
-            st.metric('Active Clubs', stats['active_clubs'])
+            # Top metrics row with enhanced styling
+            render_html("<h2 style='color: #2c3e50; margin: 2rem 0 1rem;'>📈 Key Metrics</h2>")
+            col1, col2, col3, col4, col5 = st.columns(5)
+            with col1:
+                st.metric('Total Students', f"{stats['total_students']:,}")
+            with col2:
+                st.metric('Average Attendance', f"{stats['avg_attendance']:.1f}%", delta=f"{stats['avg_attendance']-75:.1f}%" if stats['avg_attendance'] > 75 else None)
+            with col3:
+                st.metric('Average GPA', f"{stats['avg_gpa']:.2f}", delta=f"{stats['avg_gpa']-3.0:.2f}" if stats['avg_gpa'] > 3.0 else None)
+            with col4:
+                st.metric('Top Performers', stats['top_performers'], delta=f"{(stats['top_performers']/stats['total_students']*100):.1f}%")
+            with col5:
+                st.metric('Active Clubs', stats['active_clubs'])
     
-    elif page == "Performance Analytics":
-        st.markdown("<h1 style='text-align: center;'>📈 Performance Analytics</h1>", unsafe_allow_html=True)
-        col1, col2 = st.columns(2)
+        elif page == "Performance Analytics":
+            from charts import get_analytics_figures
+            render_html("<h1 style='text-align: center;'>📈 Performance Analytics</h1>")
+            figures = get_analytics_figures('Dark')
+            col1, col2 = st.columns(2)
         
-        with col1:
-            # GPA Distribution with enhanced styling
-            gpa_fig = go.Figure(data=[go.Histogram(x=df['gpa'], nbinsx=20, marker_color='#4a9eff')])
-            gpa_fig.update_layout(
-                title={'text': 'GPA Distribution', 'y':0.9, 'x':0.5, 'xanchor': 'center', 'yanchor': 'top'},
-                plot_bgcolor='black',
-                paper_bgcolor='black',
-                font={'color': '#e0e0e0'},
-                xaxis=dict(showgrid=True, gridwidth=1, gridcolor='#333333', title='GPA', color='#e0e0e0'),
-                yaxis=dict(showgrid=True, gridwidth=1, gridcolor='#333333', title='Count', color='#e0e0e0')
-            )
-            st.plotly_chart(gpa_fig, use_container_width=True)
+            with col1:
+                # GPA Distribution from pre-binned counts
+                st.plotly_chart(figures['gpa'], use_container_width=True)
             
-            # Specialization Distribution with enhanced styling
-            spec_dist = px.pie(df, names='specialization', title='Students per Specialization',
-                              color_discrete_sequence=px.colors.qualitative.Set3)
-            spec_dist.update_layout(
-                title={'y':0.9, 'x':0.5, 'xanchor': 'center', 'yanchor': 'top'},
-                plot_bgcolor='black',
-                paper_bgcolor='black',
-                font={'color': '#e0e0e0'}
-            )
-            st.plotly_chart(spec_dist, use_container_width=True)
+                # Specialization Distribution
+                st.plotly_chart(figures['specialization'], use_container_width=True)
         
-        with col2:
-            # Test Scores Trend with enhanced styling
-            test_scores = pd.melt(df.loc[:, ['test1_score', 'test2_score', 'test3_score']],
-                                 var_name='Test', value_name='Score')
-            test_box = px.box(test_scores, x='Test', y='Score', title='Test Scores Distribution',
-                             color_discrete_sequence=['#4a9eff'])
-            test_box.update_layout(
-                title={'y':0.9, 'x':0.5, 'xanchor': 'center', 'yanchor': 'top'},
-                plot_bgcolor='black',
-                paper_bgcolor='black',
-                font={'color': '#e0e0e0'},
-                xaxis=dict(showgrid=True, gridwidth=1, gridcolor='#333333', color='#e0e0e0'),
-                yaxis=dict(showgrid=True, gridwidth=1, gridcolor='#333333', color='#e0e0e0')
-            )
-            st.plotly_chart(test_box, use_container_width=True)
+            with col2:
+                # Test Scores from precomputed quartiles
+                st.plotly_chart(figures['test_scores'], use_container_width=True)
             
-            # Extracurricular Activities with enhanced styling
-            club_data = df['extracurricular_activities'].value_counts().reset_index()
-            club_data.columns = ['Club', 'Count']
-            club_dist = px.bar(club_data, x='Club', y='Count', title='Club Participation',
-                              color_discrete_sequence=['#4a9eff'])
-            club_dist.update_layout(
-                title={'y':0.9, 'x':0.5, 'xanchor': 'center', 'yanchor': 'top'},
-                plot_bgcolor='black',
-                paper_bgcolor='black',
-                font={'color': '#e0e0e0'},
-                xaxis=dict(showgrid=True, gridwidth=1, gridcolor='#333333', color='#e0e0e0'),
-                yaxis=dict(showgrid=True, gridwidth=1, gridcolor='#333333', color='#e0e0e0')
-            )
-            st.plotly_chart(club_dist, use_container_width=True)
+                # Extracurricular Activities
+                st.plotly_chart(figures['clubs'], use_container_width=True)
     
-    elif page == "Student Details":
-        st.markdown("<h1 style='text-align: center;'>👥 Student Details</h1>", unsafe_allow_html=True)
+        elif page == "Student Details":
+            from charts import filtered_distribution_figures
+            from facets import filter_snapshot
+            from table_view import display_student_table
+            render_html("<h1 style='text-align: center;'>👥 Student Details</h1>")
+            df, search_index, facet_index, sort_orders = filter_snapshot()
         
-        # Modern Filter Section
-        st.markdown("<h2 style='color: #2c3e50; margin: 2rem 0 1rem;'>🔍 Search & Filters</h2>", unsafe_allow_html=True)
+            # Modern Filter Section
+            render_html("<h2 style='color: #2c3e50; margin: 2rem 0 1rem;'>🔍 Search & Filters</h2>")
         
-        # Enhanced Filter Layout
-        filter_container = st.container()
-        with filter_container:
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                search = st.text_input('🔎 Search by Name or ID', placeholder='Enter name or ID...')
-            with col2:
-                spec_filter = st.selectbox('📚 Specialization', 
-                                        ['All'] + list(df['specialization'].unique()))
-            with col3:
-                club_filter = st.selectbox('🎯 Club Activities', 
-                                        ['All'] + list(df['extracurricular_activities'].unique()))
+            # Enhanced Filter Layout
+            filter_container = st.container()
+            with filter_container:
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    search = st.text_input('🔎 Search by Name or ID', placeholder='Enter name or ID...')
+                with col2:
+                    spec_filter = st.selectbox('📚 Specialization', 
+                                            ['All'] + facet_index.options('specialization'))
+                with col3:
+                    club_filter = st.selectbox('🎯 Club Activities', 
+                                            ['All'] + facet_index.options('extracurricular_activities'))
         
-        # Apply filters with modern styling
-        filtered_df = df.copy()
-        if search:
-            filtered_df = filtered_df[filtered_df['name'].str.contains(search, case=False) | 
-                                     filtered_df['student_id'].astype(str).str.contains(search)]
-        if spec_filter != 'All':
-            filtered_df = filtered_df[filtered_df['specialization'] == spec_filter]
-        if club_filter != 'All':
-            filtered_df = filtered_df[filtered_df['extracurricular_activities'] == club_filter]
+            # Intersect search hits with the facet indexes, without copying the frame
+            facet_filters = {}
+            if spec_filter != 'All':
+                facet_filters['specialization'] = spec_filter
+            if club_filter != 'All':
+                facet_filters['extracurricular_activities'] = club_filter
+            positions = facet_index.query(facet_filters, search_index.search(search) if search else None)
         
-        # Display Results Summary
-        st.markdown(f"""<div style='background-color: white; padding: 1rem; border-radius: 8px; 
-                    box-shadow: 0 2px 4px rgba(0,0,0,0.05); margin: 1rem 0;'>
-            <p style='color: #2c3e50; margin: 0;'>📊 Showing {len(filtered_df)} students</p>
-        </div>""", unsafe_allow_html=True)
+            # Display Results Summary
+            render_html(f"""<div style='background-color: white; padding: 1rem; border-radius: 8px; 
+                        box-shadow: 0 2px 4px rgba(0,0,0,0.05); margin: 1rem 0;'>
+                <p style='color: #2c3e50; margin: 0;'>📊 Showing {len(positions)} students</p>
+            </div>""")
         
-        # Enhanced Student Table
-        st.markdown("<h2 style='color: #2c3e50; margin: 2rem 0 1rem;'>📋 Student Records</h2>", unsafe_allow_html=True)
+            # Enhanced Student Table
+            render_html("<h2 style='color: #2c3e50; margin: 2rem 0 1rem;'>📋 Student Records</h2>")
         
-        # Modern table with improved formatting and visual hierarchy
-        st.dataframe(
-            filtered_df[['student_id', 'name', 'email', 'specialization', 'gpa', 
-                        'attendance_percentage', 'extracurricular_activities']]
-            .style.format({'gpa': '{:.2f}', 'attendance_percentage': '{:.1f}%'})
-            .apply(lambda x: ['color: #e0e0e0; background-color: ' + ('#1f4d7a' if x.name in ['gpa', 'attendance_percentage'] else '#2d2d2d')
-                            for i in range(len(x))], axis=0)
-            .format({
-                'student_id': lambda x: f'#{x}',
-                'gpa': '{:.2f}',
-                'attendance_percentage': '{:.1f}%'
-            })
-            .set_properties(**{
-                'background-color': '#1a1a1a',
-                'color': '#e0e0e0',
-                'font-size': '14px',
-                'padding': '12px',
-                'border': '1px solid #333333'
-            }),
-            height=400,
-            use_container_width=True
-        )
+            # Paginated table: only the visible page is styled and serialized
+            display_student_table(df, positions, sort_orders)
         
-        # Performance Distribution
-        st.markdown("<h2 style='color: #2c3e50; margin: 2rem 0 1rem;'>📊 Performance Distribution</h2>", unsafe_allow_html=True)
-        col1, col2 = st.columns(2)
+            # Performance Distribution
+            render_html("<h2 style='color: #2c3e50; margin: 2rem 0 1rem;'>📊 Performance Distribution</h2>")
+            distribution = filtered_distribution_figures(df, positions, 'Light')
+            col1, col2 = st.columns(2)
         
-        with col1:
-            # GPA Distribution for filtered students
-            gpa_hist = px.histogram(filtered_df, x='gpa', nbins=20,
-                                   title='GPA Distribution',
-                                   color_discrete_sequence=['#1f4d7a'])
-            gpa_hist.update_layout(
-                plot_bgcolor='white',
-                paper_bgcolor='white',
-                font={'color': '#2c3e50'},
-                xaxis=dict(showgrid=True, gridwidth=1, gridcolor='#f0f0f0'),
-                yaxis=dict(showgrid=True, gridwidth=1, gridcolor='#f0f0f0')
-            )
-            st.plotly_chart(gpa_hist, use_container_width=True)
+            with col1:
+                # GPA Distribution for filtered students
+                st.plotly_chart(distribution['gpa'], use_container_width=True)
         
-        with col2:
-            # Attendance Distribution for filtered students
-            attendance_hist = px.histogram(filtered_df, x='attendance_percentage', nbins=20,
-                                          title='Attendance Distribution',
-                                          color_discrete_sequence=['#1f4d7a'])
-            attendance_hist.update_layout(
-                plot_bgcolor='white',
-                paper_bgcolor='white',
-                font={'color': '#2c3e50'},
-                xaxis=dict(showgrid=True, gridwidth=1, gridcolor='#f0f0f0'),
-                yaxis=dict(showgrid=True, gridwidth=1, gridcolor='#f0f0f0')
-            )
-            st.plotly_chart(attendance_hist, use_container_width=True)
+            with col2:
+                # Attendance Distribution for filtered students
+                st.plotly_chart(distribution['attendance'], use_container_width=True)
 
 # Main app logic
-if not st.session_state.authenticated:
-    login_page()
-else:
-    main_dashboard()
\ No newline at end of file
+with span('rerun'):
+    if not st.session_state.authenticated:
+        login_page()
+    else:
+        main_dashboard()
+
+trace = end_trace()
+session_bytes = record_session_size(st.session_state)
+# Raw HTML sent this rerun, as counted by render_html()
+record_size('html_bytes', html_stats()['this_run']['html_bytes'])
+if profiling_panel_enabled(st.session_state):
+    display_profiling_panel(trace, session_bytes)
\ No newline at end of file
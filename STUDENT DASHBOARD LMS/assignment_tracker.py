@@ -1,8 +1,13 @@
 import pandas as pd
+import numpy as np
 from datetime import datetime, timedelta
+from alert_messages import ASSIGNMENTS_HIGH, ASSIGNMENTS_LOW, ASSIGNMENTS_MEDIUM
+
+TOTAL_ASSIGNMENTS = 10
+ALERT_LEVELS = ['None', 'Low', 'Medium', 'High']
 
 def get_assignment_status(assignments_completed):
-    total_assignments = 10
+    total_assignments = TOTAL_ASSIGNMENTS
     pending_assignments = total_assignments - assignments_completed
     completion_rate = (assignments_completed / total_assignments) * 100
     
@@ -16,13 +21,13 @@ def get_assignment_status(assignments_completed):
     # Generate deadline alerts
     if pending_assignments > 0:
         if completion_rate < 60:
-            status['alert'] = 'High Priority: Multiple assignments pending. Please complete them soon.'
+            status['alert'] = ASSIGNMENTS_HIGH
             status['alert_level'] = 'High'
         elif completion_rate < 80:
-            status['alert'] = 'Medium Priority: Stay on track with your remaining assignments.'
+            status['alert'] = ASSIGNMENTS_MEDIUM
             status['alert_level'] = 'Medium'
         else:
-            status['alert'] = 'Low Priority: You\'re doing well, keep up the good work!'
+            status['alert'] = ASSIGNMENTS_LOW
             status['alert_level'] = 'Low'
     else:
         status['alert'] = 'All assignments completed! Great job!'
@@ -45,4 +50,12 @@ def get_assignment_analytics(assignments_completed):
                               'Medium' if status['completion_rate'] >= 60 else 'Low'
     }
     
-    return analytics
\ No newline at end of file
+    return analytics
+
+def assignment_alert_codes(assignments_completed, total_assignments=TOTAL_ASSIGNMENTS):
+    # Index into ALERT_LEVELS for every student, same rules as get_assignment_status
+    assignments_completed = np.asarray(assignments_completed, dtype=float)
+    pending_assignments = total_assignments - assignments_completed
+    completion_rate = (assignments_completed / total_assignments) * 100
+    return np.select([pending_assignments <= 0, completion_rate < 60, completion_rate < 80],
+                     [0, 3, 2], default=1).astype(np.int8)
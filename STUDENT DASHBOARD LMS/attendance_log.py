@@ -0,0 +1,246 @@
+import os
+import threading
+import time
+import numpy as np
+from attendance_tracker import get_attendance_summary_batch
+from data_store import find_students
+
+EVENT_LOG_PATH = 'data/attendance_events.bin'
+# One fixed-width, packed record per student per class (21 bytes)
+EVENT_DTYPE = np.dtype([('student_id', '<i8'), ('class_id', '<i4'),
+                        ('timestamp', '<i8'), ('present', 'u1')])
+# class_id of a reconciliation record: the student's roster row now counts
+# every class logged before it, so only later records are added on top
+RECONCILED_CLASS_ID = -1
+
+
+class AttendanceLog:
+    # Append-only attendance event log. Records are only ever appended to the
+    # file and read back through a memory map; per-student counters of
+    # classes held and attended since the roster snapshot are updated from
+    # each batch of new records, so recording a class touches only its
+    # students. Records appended by other processes are picked up from the
+    # last applied offset on the next read or write. A roster import writes
+    # totals that already include the classes logged so far, so it appends
+    # a reconciliation record per imported student that zeroes the counters.
+    def __init__(self, path=EVENT_LOG_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._slots = {}
+        self._held = np.zeros(1024, dtype=np.int32)
+        self._attended = np.zeros(1024, dtype=np.int32)
+        self._applied = 0
+        with self._lock:
+            self._refresh()
+
+    def __len__(self):
+        return self._applied
+
+    def _slot_array(self, student_ids):
+        # Counter slots for the given unique IDs, adding new students as needed
+        slots = np.empty(len(student_ids), dtype=np.int64)
+        for i, student_id in enumerate(student_ids.tolist()):
+            slot = self._slots.get(student_id)
+            if slot is None:
+                slot = self._slots[student_id] = len(self._slots)
+            slots[i] = slot
+        if len(self._slots) > len(self._held):
+            size = max(len(self._slots), 2 * len(self._held))
+            self._held = np.concatenate([self._held, np.zeros(size - len(self._held), dtype=np.int32)])
+            self._attended = np.concatenate([self._attended, np.zeros(size - len(self._attended), dtype=np.int32)])
+        return slots
+
+    def _apply(self, records):
+        reconciled = records['class_id'] == RECONCILED_CLASS_ID
+        if reconciled.any():
+            # Zero the reconciled students and keep only their records after
+            # the last reconciliation in this batch
+            positions = np.flatnonzero(reconciled)[::-1]
+            student_ids, first = np.unique(records['student_id'][positions], return_index=True)
+            last_reconciled = positions[first]
+            slots = self._slot_array(student_ids)
+            self._held[slots] = 0
+            self._attended[slots] = 0
+            found = np.minimum(np.searchsorted(student_ids, records['student_id']), len(student_ids) - 1)
+            cutoff = np.where(student_ids[found] == records['student_id'], last_reconciled[found], -1)
+            records = records[np.arange(len(records)) > cutoff]
+            if not len(records):
+                return
+        uniques, inverse = np.unique(records['student_id'], return_inverse=True)
+        slots = self._slot_array(uniques)
+        # slots are unique, so plain fancy-index addition is safe
+        self._held[slots] += np.bincount(inverse, minlength=len(uniques)).astype(np.int32)
+        self._attended[slots] += np.bincount(inverse, weights=records['present'],
+                                             minlength=len(uniques)).astype(np.int32)
+
+    def _refresh(self):
+        # Caller holds _lock. Applies whole records past the last applied one;
+        # a trailing partial record (a write in progress) waits for next time.
+        try:
+            count = os.path.getsize(self.path) // EVENT_DTYPE.itemsize
+        except OSError:
+            return
+        if count <= self._applied:
+            return
+        records = np.memmap(self.path, dtype=EVENT_DTYPE, mode='r',
+                            offset=self._applied * EVENT_DTYPE.itemsize, shape=(count - self._applied,))
+        self._apply(records)
+        self._applied = count
+        del records
+
+    def append(self, records):
+        # Appends a structured array of EVENT_DTYPE records in one write
+        records = np.ascontiguousarray(records, dtype=EVENT_DTYPE)
+        if not len(records):
+            return 0
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, 'ab') as f:
+                f.write(records.tobytes())
+            self._refresh()
+        return len(records)
+
+    def record_class(self, class_id, student_ids, present, timestamp=None):
+        # Attendance for one lecture: present is a flag per student
+        return self.record_classes([(class_id, student_ids, present)], timestamp)
+
+    def record_classes(self, classes, timestamp=None):
+        # Attendance for many lectures at once, e.g. every section taking
+        # attendance in the same slot: an iterable of (class_id, student_ids,
+        # present) appended as a single batch
+        timestamp = int(time.time() if timestamp is None else timestamp)
+        parts = []
+        for class_id, student_ids, present in classes:
+            student_ids = np.asarray(student_ids, dtype=np.int64).ravel()
+            part = np.empty(len(student_ids), dtype=EVENT_DTYPE)
+            part['student_id'] = student_ids
+            part['class_id'] = class_id
+            part['timestamp'] = timestamp
+            part['present'] = np.broadcast_to(np.asarray(present, dtype=bool), student_ids.shape)
+            parts.append(part)
+        if not parts:
+            return 0
+        return self.append(np.concatenate(parts))
+
+    def reconcile(self, student_ids, timestamp=None):
+        # The roster rows of these students were just written with current
+        # totals: classes logged so far stop counting on top of them
+        student_ids = np.unique(np.asarray(student_ids, dtype=np.int64).ravel())
+        records = np.zeros(len(student_ids), dtype=EVENT_DTYPE)
+        records['student_id'] = student_ids
+        records['class_id'] = RECONCILED_CLASS_ID
+        records['timestamp'] = int(time.time() if timestamp is None else timestamp)
+        return self.append(records)
+
+    def deltas(self, student_ids):
+        # (classes held, classes attended) recorded in the log per student
+        student_ids = np.asarray(student_ids, dtype=np.int64).ravel()
+        with self._lock:
+            self._refresh()
+            slots = np.array([self._slots.get(student_id, -1) for student_id in student_ids.tolist()],
+                             dtype=np.int64)
+            known = slots >= 0
+            held = np.zeros(len(slots), dtype=np.int64)
+            attended = np.zeros(len(slots), dtype=np.int64)
+            held[known] = self._held[slots[known]]
+            attended[known] = self._attended[slots[known]]
+        return held, attended
+
+    def events(self, student_id):
+        # Every record for one student, oldest first, reconciliations
+        # included (scans the log)
+        with self._lock:
+            count = self._applied
+        if not count:
+            return np.empty(0, dtype=EVENT_DTYPE)
+        records = np.memmap(self.path, dtype=EVENT_DTYPE, mode='r', shape=(count,))
+        return np.array(records[records['student_id'] == int(student_id)])
+
+
+def attendance_counters(student_ids, log=None):
+    # Current totals for the given students: the roster snapshot plus the
+    # classes recorded in the event log since. Students without events keep
+    # their roster percentage. Returns (student_ids, total, attended, pct)
+    # for the IDs found in the roster, in request order.
+    if log is None:
+        log = get_attendance_log()
+    roster = find_students(student_ids)
+    student_ids = roster['student_id'].to_numpy(dtype=np.int64)
+    held, attended = log.deltas(student_ids)
+    total = roster['total_classes'].to_numpy(dtype=np.int64) + held
+    attended = roster['classes_attended'].to_numpy(dtype=np.int64) + attended
+    with np.errstate(divide='ignore', invalid='ignore'):
+        computed = np.where(total > 0, attended / total * 100, 0.0)
+    pct = np.where(held > 0, computed, roster['attendance_percentage'].to_numpy(dtype=float))
+    return student_ids, total, attended, pct
+
+
+def attendance_summary(student_ids, log=None):
+    # analyze_attendance_pattern for the given students on current counters
+    student_ids, total, attended, pct = attendance_counters(student_ids, log)
+    summary = get_attendance_summary_batch(total, attended, pct)
+    summary.insert(0, 'student_id', student_ids)
+    return summary
+
+
+_log = None
+_log_lock = threading.Lock()
+
+
+def get_attendance_log():
+    global _log
+    with _log_lock:
+        if _log is None:
+            _log = AttendanceLog()
+        return _log
+
+
+def _student_ids(text):
+    return [int(value) for value in text.split(',') if value.strip()]
+
+
+if __name__ == '__main__':
+    import argparse
+    import sys
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description='Record attendance in the event log')
+    parser.add_argument('--log', default=EVENT_LOG_PATH, help='Event log file')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    record_parser = commands.add_parser('record', help='Attendance for one class')
+    record_parser.add_argument('class_id', type=int)
+    record_parser.add_argument('--present', type=_student_ids, default=[], help='Comma-separated student IDs')
+    record_parser.add_argument('--absent', type=_student_ids, default=[], help='Comma-separated student IDs')
+
+    import_parser = commands.add_parser('import', help='Attendance for many classes from a CSV with '
+                                                      'student_id, class_id and present (1/0) columns')
+    import_parser.add_argument('path')
+
+    summary_parser = commands.add_parser('summary', help='Current attendance of some students')
+    summary_parser.add_argument('student_ids', type=_student_ids)
+    args = parser.parse_args()
+
+    log = AttendanceLog(args.log)
+    if args.command == 'summary':
+        print(attendance_summary(args.student_ids, log).to_string(index=False))
+        sys.exit(0)
+
+    if args.command == 'record':
+        events = pd.DataFrame({'student_id': args.present + args.absent, 'class_id': args.class_id,
+                               'present': [True] * len(args.present) + [False] * len(args.absent)})
+    else:
+        events = pd.read_csv(args.path, usecols=['student_id', 'class_id', 'present'])
+        events['present'] = events['present'].astype(str).str.strip().str.lower().isin(['1', 'true', 'yes'])
+    if (events['class_id'] < 0).any():
+        parser.error('class IDs must not be negative')
+    # Only students in the roster are recorded
+    known = events['student_id'].isin(find_students(events['student_id'].unique())['student_id'])
+    if not known.all():
+        print(f'Skipped {int((~known).sum())} records for students not in the roster', file=sys.stderr)
+    events = events[known]
+    count = log.record_classes((class_id, group['student_id'], group['present'])
+                               for class_id, group in events.groupby('class_id', sort=False))
+    print(f'Recorded {count} attendance records for {events["class_id"].nunique()} classes', file=sys.stderr)
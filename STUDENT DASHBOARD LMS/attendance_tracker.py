@@ -1,20 +1,41 @@
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
+from alert_messages import ATTENDANCE_CRITICAL, ATTENDANCE_WARNING
 
-def analyze_attendance_pattern(attendance_percentage, total_classes, classes_attended):
-    status = 'Good' if attendance_percentage >= 85 else 'Warning' if attendance_percentage >= 75 else 'Critical'
+GOOD_ATTENDANCE = 85     # % needed for good standing
+MINIMUM_ATTENDANCE = 75  # % below which attendance is critical
+ATTENDANCE_STATUSES = ['Good', 'Warning', 'Critical']
+
+def classes_needed(total_classes, classes_attended, target=GOOD_ATTENDANCE):
+    # Fewest consecutive classes to attend so that attended / total reaches the
+    # target percentage: (attended + n) / (total + n) >= target / 100.
+    # Works on single values and on whole columns. A 100% target can never
+    # be reached after a missed class, so the target must be below 100.
+    if not 0 < target < 100:
+        raise ValueError(f'target must be between 0 and 100 (exclusive), got {target}')
+    total_classes = np.asarray(total_classes, dtype=float)
+    classes_attended = np.asarray(classes_attended, dtype=float)
+    deficit = target * total_classes - 100 * classes_attended
+    needed = np.ceil(np.maximum(deficit, 0) / (100 - target)).astype(np.int64)
+    return int(needed) if needed.ndim == 0 else needed
+
+def attendance_status_codes(attendance_percentage, good_threshold=GOOD_ATTENDANCE,
+                            warning_threshold=MINIMUM_ATTENDANCE):
+    # Index into ATTENDANCE_STATUSES for every student
+    attendance_percentage = np.asarray(attendance_percentage, dtype=float)
+    return np.select([attendance_percentage >= good_threshold, attendance_percentage >= warning_threshold],
+                     [0, 1], default=2).astype(np.int8)
+
+def analyze_attendance_pattern(attendance_percentage, total_classes, classes_attended,
+                               good_threshold=GOOD_ATTENDANCE, warning_threshold=MINIMUM_ATTENDANCE):
+    status = ATTENDANCE_STATUSES[attendance_status_codes(attendance_percentage, good_threshold, warning_threshold)]
     classes_missed = total_classes - classes_attended
     required_classes = 0
     
-    if attendance_percentage < 85:
-        # Calculate classes needed to reach 85% attendance
-        target_attendance = 0.85
-        current_total = total_classes
-        while (classes_attended / current_total) < target_attendance:
-            required_classes += 1
-            current_total += 1
-            classes_attended += 1
+    if attendance_percentage < good_threshold:
+        # Classes needed to reach good standing, in closed form
+        required_classes = classes_needed(total_classes, classes_attended, good_threshold)
     
     return {
         'status': status,
@@ -28,14 +49,14 @@ def generate_attendance_alert(attendance_data):
     if attendance_data['status'] == 'Critical':
         alerts.append({
             'severity': 'High',
-            'message': f'Critical attendance alert! Current attendance is {attendance_data["current_percentage"]}%. '
-                      f'Need to attend next {attendance_data["classes_needed"]} classes to reach minimum requirement.'
+            'message': ATTENDANCE_CRITICAL.format(percentage=attendance_data['current_percentage'],
+                                                  count=attendance_data['classes_needed'])
         })
     elif attendance_data['status'] == 'Warning':
         alerts.append({
             'severity': 'Medium',
-            'message': f'Attendance warning! Current attendance is {attendance_data["current_percentage"]}%. '
-                      f'Need to attend next {attendance_data["classes_needed"]} classes to reach good standing.'
+            'message': ATTENDANCE_WARNING.format(percentage=attendance_data['current_percentage'],
+                                                 count=attendance_data['classes_needed'])
         })
     
     return alerts
@@ -50,4 +71,28 @@ def get_attendance_summary(attendance_percentage, total_classes, classes_attende
         'attendance_rate': attendance_percentage,
         'total_classes': total_classes,
         'attended_classes': classes_attended
-    }
\ No newline at end of file
+    }
+
+def get_attendance_summary_batch(total_classes, classes_attended, attendance_percentage=None,
+                                 good_threshold=GOOD_ATTENDANCE, warning_threshold=MINIMUM_ATTENDANCE):
+    # Roster-wide version of analyze_attendance_pattern: one row per student.
+    # The percentage is derived from the class counts when not given.
+    total_classes = np.asarray(total_classes, dtype=np.int64)
+    classes_attended = np.asarray(classes_attended, dtype=np.int64)
+    if attendance_percentage is None:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            attendance_percentage = np.where(total_classes > 0,
+                                             classes_attended / total_classes * 100, 0.0)
+    attendance_percentage = np.asarray(attendance_percentage, dtype=float)
+
+    status_codes = attendance_status_codes(attendance_percentage, good_threshold, warning_threshold)
+    needed = np.where(attendance_percentage < good_threshold,
+                      classes_needed(total_classes, classes_attended, good_threshold), 0)
+    return pd.DataFrame({
+        'status': pd.Categorical.from_codes(status_codes, ATTENDANCE_STATUSES),
+        'classes_missed': total_classes - classes_attended,
+        'classes_needed': needed,
+        'current_percentage': attendance_percentage,
+        'total_classes': total_classes,
+        'attended_classes': classes_attended
+    })
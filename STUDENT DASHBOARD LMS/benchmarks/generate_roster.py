@@ -0,0 +1,102 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+from storage import STUDENT_COLUMNS, STUDENT_DTYPES
+
+# Synthetic rosters with the schema of data/student_data.csv and the same
+# distributions: categorical columns are drawn with the source frequencies
+# (course, semester and batch year jointly, so the section mix carries
+# over), and the scores, attendance, assignments and GPA come from a
+# multivariate normal with the source means and covariance, clipped to the
+# source range and rounded to its precision. The same seed always gives
+# the same roster.
+
+SOURCE_PATH = os.path.join(APP_DIR, 'data', 'student_data.csv')
+# IDs are sequential from here and must stay 6-digit, as the app and
+# roster_io.VALUE_RANGES require, so a roster has at most 900,000 students
+FIRST_STUDENT_ID = 100000
+LAST_STUDENT_ID = 999999
+CORRELATED_COLUMNS = ['attendance_percentage', 'test1_score', 'test2_score', 'test3_score',
+                      'assignments_completed', 'gpa']
+EMAIL_DOMAIN = 'stu.upes.ac.in'
+
+
+def _decimals(values):
+    # Decimal places used by a column of the source
+    text = pd.Series(values).astype(str)
+    fractions = text.str.partition('.')[2].str.rstrip('0')
+    return int(fractions.str.len().max())
+
+
+def _draw(rng, values, rows):
+    # Values drawn with their source frequencies
+    counts = pd.Series(values).value_counts(sort=False)
+    return rng.choice(counts.index.to_numpy(), size=rows, p=(counts / counts.sum()).to_numpy())
+
+
+def generate_roster(rows, seed=0, source=SOURCE_PATH, first_id=FIRST_STUDENT_ID):
+    if rows > LAST_STUDENT_ID - first_id + 1:
+        raise ValueError(f'At most {LAST_STUDENT_ID - first_id + 1:,} students fit in 6-digit IDs from {first_id}')
+    source = pd.read_csv(source, dtype=STUDENT_DTYPES)
+    rng = np.random.default_rng(seed)
+    student_ids = np.arange(first_id, first_id + rows, dtype=np.int64)
+
+    names = source['name'].str.split(' ', n=1)
+    first_names = _draw(rng, names.str[0], rows)
+    last_names = _draw(rng, names.str[1].fillna(''), rows)
+    name = pd.Series(first_names, dtype=object) + ' ' + pd.Series(last_names, dtype=object)
+    email = (pd.Series(student_ids).astype(str) + '.' + pd.Series(first_names).str.lower()
+             + '@' + EMAIL_DOMAIN)
+
+    sections = source.groupby(['course', 'semester', 'batch_year'], sort=False, observed=True).size()
+    picks = rng.choice(len(sections), size=rows, p=(sections / sections.sum()).to_numpy())
+    section_values = {level: sections.index.get_level_values(level).to_numpy() for level in sections.index.names}
+
+    numbers = source[CORRELATED_COLUMNS].to_numpy(dtype=float)
+    draws = rng.multivariate_normal(numbers.mean(axis=0), np.cov(numbers, rowvar=False), size=rows)
+    draws = np.clip(draws, numbers.min(axis=0), numbers.max(axis=0))
+    correlated = {column: np.round(draws[:, i], _decimals(source[column]))
+                  for i, column in enumerate(CORRELATED_COLUMNS)}
+
+    total_classes = _draw(rng, source['total_classes'], rows)
+    classes_attended = np.round(correlated['attendance_percentage'] / 100 * total_classes)
+
+    roster = pd.DataFrame({
+        'student_id': student_ids,
+        'name': name,
+        'email': email,
+        'course': section_values['course'][picks],
+        **correlated,
+        'total_classes': total_classes,
+        'classes_attended': classes_attended,
+        'extracurricular_activities': _draw(rng, source['extracurricular_activities'], rows),
+        'specialization': _draw(rng, source['specialization'], rows),
+        'semester': section_values['semester'][picks],
+        'batch_year': section_values['batch_year'][picks]
+    })
+    return roster[STUDENT_COLUMNS].astype(STUDENT_DTYPES)
+
+
+if __name__ == '__main__':
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description='Write a synthetic student roster CSV')
+    parser.add_argument('--rows', type=int, required=True)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--source', default=SOURCE_PATH, help='Roster whose distributions are copied')
+    parser.add_argument('--output', required=True)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    try:
+        roster = generate_roster(args.rows, args.seed, args.source)
+    except ValueError as e:
+        parser.error(str(e))
+    roster.to_csv(args.output, index=False)
+    print(f'Wrote {len(roster):,} students to {args.output} in {time.perf_counter() - start:.1f}s')
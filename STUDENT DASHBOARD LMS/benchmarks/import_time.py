@@ -0,0 +1,122 @@
+import ast
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cold-start import report. Each run is a fresh interpreter started with
+# -X importtime: it imports the baseline first (streamlit, which a worker
+# has loaded before any script runs), then the modules under test, and the
+# per-module times Python prints after the baseline are what starting the
+# app adds. By default the modules under test are the ones app.py imports
+# at module level, i.e. everything the login page loads; imports inside
+# functions only happen when their page is first used.
+
+BASELINE = ['streamlit']
+REPEAT = 5
+TOP = 15
+MARKER = '--import-time-baseline-done--'
+
+
+def _module_level_imports(nodes):
+    for node in nodes:
+        if isinstance(node, ast.Import):
+            yield from (alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            if node.level == 0 and node.module:
+                yield node.module
+        elif not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef, ast.Lambda)):
+            # with/if/try blocks at module level run at import time too
+            yield from _module_level_imports(ast.iter_child_nodes(node))
+
+
+def startup_modules(path=os.path.join(APP_DIR, 'app.py')):
+    with open(path, encoding='utf-8') as f:
+        return list(dict.fromkeys(_module_level_imports(ast.parse(f.read()).body)))
+
+
+def import_times(modules, baseline=BASELINE):
+    # [(module, depth, self_us, cumulative_us)] for everything the modules
+    # import on top of the baseline, in the order Python reports them
+    code = ''.join(f'import {name}\n' for name in baseline)
+    code += f'import sys\nsys.stderr.write({MARKER!r} + "\\n")\n'
+    code += ''.join(f'import {name}\n' for name in modules)
+    stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=APP_DIR,
+                            env=dict(os.environ, PYTHONDONTWRITEBYTECODE='1'),
+                            check=True, capture_output=True, text=True).stderr
+    rows = []
+    for line in stderr.split(MARKER, 1)[1].splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        # One space before top-level names, two more per nesting level
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+    return rows
+
+
+def summarize(runs, modules):
+    # Medians over the runs: total ms, ms added by each module under test
+    # (0 when an earlier one already imported it) and self ms per package
+    totals, added, packages = [], {name: [] for name in modules}, {}
+    for rows in runs:
+        top = {name: cumulative for name, depth, _, cumulative in rows if depth == 0}
+        totals.append(sum(top.values()) / 1000)
+        for name in modules:
+            added[name].append(top.get(name, 0) / 1000)
+        run_packages = {}
+        for name, _, self_us, _ in rows:
+            package = name.split('.')[0]
+            run_packages[package] = run_packages.get(package, 0) + self_us / 1000
+        for package, ms in run_packages.items():
+            packages.setdefault(package, []).append(ms)
+    median = lambda values: statistics.median(values + [0.0] * (len(runs) - len(values)))
+    return {
+        'total_ms': statistics.median(totals),
+        'modules': {name: median(values) for name, values in added.items()},
+        'packages': dict(sorted(((package, median(values)) for package, values in packages.items()),
+                                key=lambda item: -item[1]))
+    }
+
+
+def format_report(report, top=TOP):
+    lines = [f'Imports on top of {", ".join(report["baseline"])}: {report["total_ms"]:.1f} ms '
+             f'(median of {report["runs"]} runs)', '',
+             f'{"module":32} {"ms added":>9}']
+    for name, ms in report['modules'].items():
+        lines.append(f'{name:32} {ms:9.1f}')
+    lines += ['', f'{"package":32} {"self ms":>9}']
+    for package, ms in list(report['packages'].items())[:top]:
+        lines.append(f'{package:32} {ms:9.1f}')
+    return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Report what each module adds to the cold start of app.py')
+    parser.add_argument('--modules', type=lambda text: text.split(','),
+                        help='Comma-separated modules to time (default: the module-level imports of app.py)')
+    parser.add_argument('--baseline', type=lambda text: text.split(','), default=BASELINE,
+                        help='Modules imported before timing starts (default: streamlit)')
+    parser.add_argument('--repeat', type=int, default=REPEAT)
+    parser.add_argument('--top', type=int, default=TOP, help='Packages to list')
+    parser.add_argument('--budget', type=float, help='Exit with status 1 if the imports take longer (ms)')
+    parser.add_argument('--output', help='Save the report as JSON')
+    args = parser.parse_args()
+
+    modules = args.modules or startup_modules()
+    # Modules already in the baseline add nothing and are not listed
+    modules = [name for name in modules if name not in args.baseline]
+    runs = [import_times(modules, args.baseline) for _ in range(args.repeat)]
+    report = dict(summarize(runs, modules), baseline=args.baseline, runs=args.repeat)
+    print(format_report(report, args.top))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.budget is not None and report['total_ms'] > args.budget:
+        print(f'\nOver budget: {report["total_ms"]:.1f} ms > {args.budget:.1f} ms', file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,418 @@
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from collections import Counter, defaultdict
+from urllib.parse import urlparse
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+from tornado.httpclient import HTTPRequest
+from tornado.websocket import websocket_connect
+from streamlit.proto.Alert_pb2 import Alert
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+# Headless load test. Starts the dashboard on a local Streamlit server (or
+# attaches to one already running on this machine) and drives it over the
+# same websocket protocol the browser uses: every simulated user is a
+# session that sends widget values and reruns, and every step is timed
+# from the rerun request to the end of the script run. Students sign in,
+# load their dashboard and open the full timetable; staff sign in and
+# cycle through the three dashboard pages. The server's memory and CPU
+# are sampled from /proc (Linux), and its span histograms (see
+# instrumentation.py) give the breakdown of where server time went. Each
+# user connects as if through a proxy from its own address, and the server
+# started here trusts one proxy hop, so login rate limits apply per user.
+
+STAFF_PAGES = ['Overview', 'Performance Analytics', 'Student Details']
+STAFF_ACCOUNTS = [('admin@upes.ac.in', 'admin123'), ('teacher@upes.ac.in', 'teacher123')]
+STEP_TIMEOUT = 120
+SERVER_START_TIMEOUT = 60
+LOCAL_HOSTS = {'127.0.0.1', 'localhost', '::1'}
+# Steps in the order users go through them, for the report
+STEPS = ['login_page', 'student_login_page', 'student_login', 'student_dashboard', 'timetable', 'staff_login',
+         'staff_overview', 'staff_performance_analytics', 'staff_student_details']
+
+
+class SessionClient:
+    # One browser tab. Widget values set through set_value() are sent with
+    # every later rerun, as the browser does; a trigger (button press) is
+    # sent with one rerun only.
+    def __init__(self, url, address=None):
+        self.url = url
+        self.address = address
+        self.query_string = ''
+        self.elements = []
+        self.widgets = {}
+        self._states = {}
+        self._connection = None
+
+    async def connect(self):
+        headers = {'X-Forwarded-For': self.address} if self.address else {}
+        self._connection = await websocket_connect(HTTPRequest(self.url, headers=headers),
+                                                   max_message_size=256 * 2 ** 20)
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def set_value(self, label, value):
+        kind, element = self.widgets[label]
+        state = WidgetState(id=element.id)
+        if kind in ('radio', 'selectbox'):
+            state.int_value = list(element.options).index(value)
+        elif kind == 'checkbox':
+            state.bool_value = value
+        else:
+            state.string_value = value
+        self._states[element.id] = state
+
+    async def rerun(self, trigger=None):
+        # Seconds until the script run (including any st.rerun it asked for) finished
+        message = BackMsg()
+        message.rerun_script.query_string = self.query_string
+        states = list(self._states.values())
+        if trigger is not None:
+            states.append(WidgetState(id=self.widgets[trigger][1].id, trigger_value=True))
+        message.rerun_script.widget_states.widgets.extend(states)
+
+        start = time.perf_counter()
+        await self._connection.write_message(message.SerializeToString(), binary=True)
+        elements = []
+        while True:
+            data = await asyncio.wait_for(self._connection.read_message(), STEP_TIMEOUT)
+            if data is None:
+                raise ConnectionError('server closed the session')
+            forward = ForwardMsg()
+            forward.ParseFromString(data)
+            kind = forward.WhichOneof('type')
+            if kind == 'new_session':
+                elements = []
+            elif kind == 'delta' and forward.delta.WhichOneof('type') == 'new_element':
+                element_type = forward.delta.new_element.WhichOneof('type')
+                elements.append((element_type, getattr(forward.delta.new_element, element_type)))
+            elif kind == 'page_info_changed':
+                self.query_string = forward.page_info_changed.query_string
+            elif kind == 'script_finished' and forward.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                break
+        elapsed = time.perf_counter() - start
+
+        self.elements = elements
+        self.widgets = {element.label: (element_type, element) for element_type, element in elements
+                        if 'id' in element.DESCRIPTOR.fields_by_name and 'label' in element.DESCRIPTOR.fields_by_name}
+        return elapsed
+
+    def headings(self):
+        return [element.body for kind, element in self.elements if kind == 'heading']
+
+    def problem(self):
+        # First exception or st.error message shown, if any
+        for kind, element in self.elements:
+            if kind == 'exception':
+                return f'exception: {element.message[:80]}'
+            if kind == 'alert' and element.format == Alert.ERROR:
+                return f'error: {element.body[:80]}'
+        return None
+
+
+class Results:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.failures = Counter()
+        self.sessions = []
+
+    async def step(self, name, client, trigger=None):
+        # Times one rerun; a failed step raises so the user's flow stops there
+        try:
+            elapsed = await client.rerun(trigger)
+        except Exception as e:
+            self.failures[f'{name}: {type(e).__name__}: {e}'[:120]] += 1
+            raise
+        problem = client.problem()
+        if problem:
+            self.failures[f'{name}: {problem}'] += 1
+            raise RuntimeError(problem)
+        self.latencies[name].append(elapsed)
+
+    def expect(self, name, found, client):
+        if not found:
+            self.failures[f'{name}: {client.problem() or "expected content missing"}'] += 1
+            raise RuntimeError(name)
+
+
+def user_address(user):
+    # A distinct private address per simulated user
+    return f'10.{user >> 16 & 255}.{user >> 8 & 255}.{user & 255}'
+
+
+async def student_user(url, student_ids, results, address=None):
+    # login page -> sign in -> dashboard rerun -> full timetable, once per ID
+    for student_id in student_ids:
+        client = SessionClient(url, address)
+        results.sessions.append(client)
+        try:
+            await client.connect()
+            await results.step('login_page', client)
+            client.set_value('Select User Type', 'Student')
+            await results.step('student_login_page', client)
+            client.set_value('Student ID', str(student_id))
+            client.set_value('Password', str(student_id))
+            await results.step('student_login', client, trigger='Sign In')
+            results.expect('student_login', any(text.startswith('Good ') for text in client.headings()), client)
+            await results.step('student_dashboard', client)
+            await results.step('timetable', client, trigger='View Full Timetable')
+        except Exception:
+            continue
+
+
+async def staff_user(url, account, cycles, results, address=None):
+    # login -> Overview -> Performance Analytics -> Student Details, cycles times
+    client = SessionClient(url, address)
+    results.sessions.append(client)
+    try:
+        await client.connect()
+        await results.step('login_page', client)
+        email, password = account
+        client.set_value('Email', email)
+        client.set_value('Password', password)
+        await results.step('staff_login', client, trigger='Login')
+        results.expect('staff_login', any(kind == 'metric' for kind, _ in client.elements), client)
+        for _ in range(cycles):
+            for page in STAFF_PAGES:
+                client.set_value('', page)
+                await results.step('staff_' + page.lower().replace(' ', '_'), client)
+    except Exception:
+        pass
+
+
+def process_stats(pid):
+    # (RSS bytes, CPU seconds user, CPU seconds system) from /proc, or None
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            rss = next(int(line.split()[1]) * 1024 for line in f if line.startswith('VmRSS:'))
+        with open(f'/proc/{pid}/stat') as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+    except (OSError, StopIteration):
+        return None
+    ticks = os.sysconf('SC_CLK_TCK')
+    return rss, int(fields[11]) / ticks, int(fields[12]) / ticks
+
+
+def fetch_metrics(metrics_port):
+    if not metrics_port:
+        return None
+    try:
+        with urllib.request.urlopen(f'http://127.0.0.1:{metrics_port}/metrics.json', timeout=10) as response:
+            return json.load(response)
+    except OSError:
+        return None
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(port, metrics_port):
+    env = dict(os.environ, METRICS_PORT=str(metrics_port), TRUSTED_PROXY_HOPS='1',
+               # Send every message in full so the client sees every widget
+               STREAMLIT_GLOBAL_MIN_CACHED_MESSAGE_SIZE=str(2 ** 40))
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'streamlit', 'run', 'app.py', '--server.headless', 'true',
+         '--server.address', '127.0.0.1', '--server.port', str(port), '--server.fileWatcherType', 'none',
+         '--browser.gatherUsageStats', 'false'],
+        cwd=APP_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + SERVER_START_TIMEOUT
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError('Streamlit server exited during startup')
+        try:
+            with urllib.request.urlopen(f'http://127.0.0.1:{port}/_stcore/health', timeout=2):
+                return server
+        except OSError:
+            time.sleep(0.5)
+    server.terminate()
+    raise RuntimeError('Streamlit server did not become healthy')
+
+
+def student_ids(count):
+    import pandas as pd
+    from storage import CSV_PATH
+    ids = pd.read_csv(os.path.join(APP_DIR, CSV_PATH), usecols=['student_id'])['student_id']
+    ids = ids[(ids >= 100000) & (ids <= 999999)].tolist()
+    return [ids[i % len(ids)] for i in range(count)]
+
+
+async def run_load(url, students, iterations, staff, cycles, ramp_up, pid, metrics_port, warmup=True):
+    if warmup:
+        # One of each user first, so imports and per-dataset caches are not
+        # counted against the first wave of sessions
+        warm = Results()
+        await asyncio.gather(student_user(url, student_ids(1), warm, user_address(0)),
+                             staff_user(url, STAFF_ACCOUNTS[0], 1, warm, user_address(1)))
+        for client in warm.sessions:
+            client.close()
+        if warm.failures:
+            raise RuntimeError(f'Warm-up failed: {dict(warm.failures)}')
+        await asyncio.sleep(1)
+
+    before = process_stats(pid) if pid else None
+    metrics_before = fetch_metrics(metrics_port)
+    results = Results()
+    ids = student_ids(students * iterations)
+    tasks = []
+    users = students + staff
+    for i in range(users):
+        delay = ramp_up * i / users if users else 0
+        if i < students:
+            work = student_user(url, ids[i * iterations:(i + 1) * iterations], results, user_address(i + 2))
+        else:
+            work = staff_user(url, STAFF_ACCOUNTS[(i - students) % len(STAFF_ACCOUNTS)], cycles, results,
+                              user_address(i + 2))
+        tasks.append(_after(delay, work))
+    start = time.perf_counter()
+    await asyncio.gather(*tasks)
+    wall = time.perf_counter() - start
+
+    # Sessions are still connected here, so their session state is live
+    live = process_stats(pid) if pid else None
+    metrics_after = fetch_metrics(metrics_port)
+    for client in results.sessions:
+        client.close()
+    await asyncio.sleep(2)
+    closed = process_stats(pid) if pid else None
+    return summarize(results, wall, before, live, closed, metrics_before, metrics_after)
+
+
+async def _after(delay, work):
+    await asyncio.sleep(delay)
+    await work
+
+
+def _percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def summarize(results, wall, before, live, closed, metrics_before, metrics_after):
+    steps = {}
+    for name in sorted(results.latencies, key=lambda name: STEPS.index(name) if name in STEPS else len(STEPS)):
+        values = sorted(results.latencies[name])
+        steps[name] = {'count': len(values), 'p50_ms': _percentile(values, 0.5) * 1000,
+                       'p95_ms': _percentile(values, 0.95) * 1000, 'p99_ms': _percentile(values, 0.99) * 1000,
+                       'max_ms': values[-1] * 1000}
+    summary = {'wall_seconds': wall, 'sessions': len(results.sessions), 'steps': steps,
+               'failures': dict(results.failures)}
+    if before and live:
+        sessions = max(1, len(results.sessions))
+        cpu_user, cpu_system = live[1] - before[1], live[2] - before[2]
+        summary['server'] = {
+            'rss_before_mb': before[0] / 2 ** 20,
+            'rss_live_mb': live[0] / 2 ** 20,
+            'rss_after_close_mb': closed[0] / 2 ** 20 if closed else None,
+            'growth_per_session_kb': (live[0] - before[0]) / sessions / 1024,
+            'cpu_user_seconds': cpu_user,
+            'cpu_system_seconds': cpu_system,
+            'cpu_cores_used': (cpu_user + cpu_system) / wall if wall else 0.0
+        }
+    if metrics_before is not None and metrics_after is not None:
+        spans = {}
+        for name, values in metrics_after['spans'].items():
+            previous = metrics_before['spans'].get(name, {'count': 0, 'sum': 0.0})
+            calls = values['count'] - previous['count']
+            if calls:
+                spans[name] = {'calls': calls, 'total_seconds': values['sum'] - previous['sum']}
+        summary['spans'] = dict(sorted(spans.items(), key=lambda item: -item[1]['total_seconds']))
+        # Session state measured by the app at the end of every rerun
+        state = metrics_after.get('sizes', {}).get('session_state')
+        previous = metrics_before.get('sizes', {}).get('session_state', {'count': 0, 'sum': 0.0})
+        if state and state['count'] > previous['count']:
+            summary['session_state'] = {'reruns': state['count'] - previous['count'],
+                                        'mean_bytes': (state['sum'] - previous['sum']) / (state['count'] - previous['count']),
+                                        'max_bytes': state['max']}
+    return summary
+
+
+def format_summary(summary, top_spans=15):
+    lines = [f'{summary["sessions"]} sessions in {summary["wall_seconds"]:.1f}s', '',
+             f'{"step":32} {"count":>6} {"p50 ms":>10} {"p95 ms":>10} {"p99 ms":>10} {"max ms":>10}']
+    for name, step in summary['steps'].items():
+        lines.append(f'{name:32} {step["count"]:6} {step["p50_ms"]:10.1f} {step["p95_ms"]:10.1f} '
+                     f'{step["p99_ms"]:10.1f} {step["max_ms"]:10.1f}')
+    server = summary.get('server')
+    if server:
+        lines += ['', f'Server RSS: {server["rss_before_mb"]:.0f} MB before, {server["rss_live_mb"]:.0f} MB with '
+                      f'sessions live ({server["growth_per_session_kb"]:.0f} KB per session)'
+                      + (f', {server["rss_after_close_mb"]:.0f} MB after they closed'
+                         if server['rss_after_close_mb'] is not None else ''),
+                  f'Server CPU: {server["cpu_user_seconds"]:.1f}s user, {server["cpu_system_seconds"]:.1f}s system '
+                  f'({server["cpu_cores_used"]:.2f} cores on average)']
+    spans = summary.get('spans')
+    if spans:
+        # Spans are wall time in the script threads, so concurrent reruns
+        # overlap; shares are of the total time spent in reruns
+        reruns = spans.get('rerun', {}).get('total_seconds')
+        lines += ['', 'Server time by span (nested spans are included in their parents):',
+                  f'{"span":44} {"calls":>7} {"total s":>9} {"mean ms":>9}' + (f' {"of reruns":>10}' if reruns else '')]
+        for name, values in list(spans.items())[:top_spans]:
+            line = (f'{name:44} {values["calls"]:7} {values["total_seconds"]:9.2f} '
+                    f'{values["total_seconds"] / values["calls"] * 1000:9.1f}')
+            if reruns:
+                line += f' {values["total_seconds"] / reruns:10.0%}'
+            lines.append(line)
+    state = summary.get('session_state')
+    if state:
+        lines += ['', f'Session state: {state["mean_bytes"] / 1024:.1f} KB mean, {state["max_bytes"] / 1024:.1f} KB max '
+                      f'over {state["reruns"]} reruns']
+    if summary['failures']:
+        lines += ['', 'Failures:'] + [f'  {count} x {reason}' for reason, count in summary['failures'].items()]
+    return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Load-test the dashboard with concurrent headless sessions')
+    parser.add_argument('--students', type=int, default=20, help='Concurrent student users')
+    parser.add_argument('--iterations', type=int, default=1, help='Sign-ins per student user')
+    parser.add_argument('--staff', type=int, default=4, help='Concurrent staff users')
+    parser.add_argument('--cycles', type=int, default=3, help='Passes through the staff pages per staff user')
+    parser.add_argument('--ramp-up', type=float, default=0.0, help='Seconds over which users start (0: all at once)')
+    parser.add_argument('--url', help='Attach to a running local server, e.g. http://localhost:8501')
+    parser.add_argument('--pid', type=int, help='Process ID of that server, for memory and CPU figures')
+    parser.add_argument('--metrics-port', type=int, help='Its METRICS_PORT, for the span breakdown')
+    parser.add_argument('--no-warmup', action='store_true', help='Count the very first sessions too')
+    parser.add_argument('--output', help='Save the summary as JSON')
+    args = parser.parse_args()
+
+    server = None
+    if args.url:
+        address = urlparse(args.url)
+        if address.hostname not in LOCAL_HOSTS:
+            parser.error('load tests only run against a server on this machine')
+        port, pid, metrics_port = address.port or 8501, args.pid, args.metrics_port
+    else:
+        port, metrics_port = _free_port(), _free_port()
+        print(f'Starting Streamlit on port {port}...', file=sys.stderr)
+        server = start_server(port, metrics_port)
+        pid = server.pid
+    try:
+        summary = asyncio.run(run_load(f'ws://127.0.0.1:{port}/_stcore/stream', args.students, args.iterations,
+                                       args.staff, args.cycles, args.ramp_up, pid, metrics_port,
+                                       warmup=not args.no_warmup))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+    print(format_summary(summary))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(summary, f, indent=2)
@@ -0,0 +1,231 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Scaling benchmarks for the dashboard's data paths. Each scale runs in its
+# own worker process against a synthetic roster (see generate_roster.py),
+# so caches start cold and peak RSS belongs to that scale alone. Every
+# benchmark is warmed up once, then timed until it has run for MIN_SECONDS
+# (at least MIN_CALLS, at most MAX_CALLS times); one extra call under
+# tracemalloc gives its peak Python-level allocation.
+
+SCALES = [10000, 100000, 900000]
+MIN_SECONDS = 1.0
+MIN_CALLS = 3
+MAX_CALLS = 2000
+SAMPLE_SIZE = 1000
+
+
+def _percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def measure(function, items=1, min_seconds=MIN_SECONDS):
+    # Latency percentiles, throughput in items/s and peak allocation for
+    # repeated calls of function(); items is what one call processes
+    import tracemalloc
+
+    function()
+    latencies = []
+    start = time.perf_counter()
+    while len(latencies) < MAX_CALLS and (len(latencies) < MIN_CALLS
+                                          or time.perf_counter() - start < min_seconds):
+        call_start = time.perf_counter()
+        function()
+        latencies.append(time.perf_counter() - call_start)
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    latencies.sort()
+    total = sum(latencies)
+    return {
+        'calls': len(latencies),
+        'p50_ms': _percentile(latencies, 0.5) * 1000,
+        'p95_ms': _percentile(latencies, 0.95) * 1000,
+        'p99_ms': _percentile(latencies, 0.99) * 1000,
+        'max_ms': latencies[-1] * 1000,
+        'items_per_call': items,
+        'throughput': items * len(latencies) / total if total else 0.0,
+        'peak_alloc_mb': peak / 2 ** 20
+    }
+
+
+def _cycle(values):
+    # Endless iterator over values, for benchmarks that take an argument
+    values = list(values)
+    while True:
+        yield from values
+
+
+def run_worker(min_seconds=MIN_SECONDS):
+    # Runs in a fresh process whose STUDENT_DATA_PATH is the synthetic roster
+    import resource
+    import numpy as np
+    from aggregates import RosterAggregates, get_aggregates
+    from analytics import (analyze_students, calculate_gpa, calculate_subject_strength,
+                           generate_recommendations, get_performance_trend)
+    from attendance_tracker import analyze_attendance_pattern, get_attendance_summary_batch
+    from data_store import DATA_PATH, StudentDataStore, find_student_record, load_students
+    from facets import FacetIndex, filter_snapshot
+    from search_index import SearchIndex
+    import timetable
+
+    results = {}
+
+    def bench(name, function, items=1):
+        results[name] = measure(function, items, min_seconds)
+        print(f'  {name}: p50 {results[name]["p50_ms"]:.3f} ms', file=sys.stderr)
+
+    bench('load_data (cold)', lambda: StudentDataStore(DATA_PATH).get_dataframe(), len(load_students()))
+    df = load_students()
+    rows = len(df)
+    bench('load_data (cached)', load_students)
+
+    rng = np.random.default_rng(0)
+    sample = df.iloc[rng.integers(0, rows, SAMPLE_SIZE)]
+    ids = _cycle(sample['student_id'].tolist())
+    bench('get_student_data', lambda: find_student_record(next(ids)))
+
+    bench('calculate_statistics (cold)', lambda: RosterAggregates(df).statistics(), rows)
+    bench('calculate_statistics (cached)', lambda: get_aggregates().statistics())
+
+    bench('student_details index build', lambda: (SearchIndex.from_frame(df), FacetIndex(df)), rows)
+    names = sample['name'].str.lower().tolist()
+    specializations = sample['specialization'].astype(str).tolist()
+    queries = []
+    for i, name in enumerate(names):
+        length = 3 + i % 4
+        offset = i % max(1, len(name) - length)
+        facet = {'specialization': specializations[i]} if i % 2 else {}
+        queries.append((name[offset:offset + length], facet))
+    filters = _cycle(queries)
+
+    def student_details_filter():
+        frame, search_index, facet_index, _ = filter_snapshot()
+        query, facet = next(filters)
+        return frame.iloc[facet_index.query(facet, search_index.search(query))]
+    bench('student_details search/filter', student_details_filter)
+
+    bench('analyze_students', lambda: analyze_students(df), rows)
+    students = _cycle(sample[['test1_score', 'test2_score', 'test3_score', 'attendance_percentage',
+                              'assignments_completed', 'total_classes',
+                              'classes_attended']].itertuples(index=False, name=None))
+
+    def student_analytics():
+        test1, test2, test3, attendance, assignments, _, _ = next(students)
+        scores = [test1, test2, test3]
+        return (calculate_gpa(test1, test2, test3), get_performance_trend(test1, test2, test3),
+                calculate_subject_strength(scores), generate_recommendations(attendance, assignments, scores))
+    bench('student analytics helpers', student_analytics)
+
+    def attendance_pattern():
+        _, _, _, attendance, _, total, attended = next(students)
+        return analyze_attendance_pattern(attendance, total, attended)
+    bench('analyze_attendance_pattern', attendance_pattern)
+    bench('get_attendance_summary_batch',
+          lambda: get_attendance_summary_batch(df['total_classes'], df['classes_attended'],
+                                               df['attendance_percentage']), rows)
+
+    def timetable_cold():
+        timetable._solve_timetables.cache_clear()
+        return timetable.generate_timetable_data()
+    bench('generate_timetable_data (cold)', timetable_cold)
+    bench('generate_timetable_data (cached)', timetable.generate_timetable_data)
+
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak_rss_mb = peak_rss / 2 ** 20 if sys.platform == 'darwin' else peak_rss / 2 ** 10
+    return {'rows': rows, 'peak_rss_mb': peak_rss_mb, 'benchmarks': results}
+
+
+def roster_path(data_dir, rows, seed):
+    # Synthetic rosters are generated once per size and seed and reused
+    path = os.path.join(data_dir, f'roster-{rows}-seed{seed}.csv')
+    if not os.path.exists(path):
+        sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+        from generate_roster import generate_roster
+        os.makedirs(data_dir, exist_ok=True)
+        print(f'Generating {rows:,}-student roster...', file=sys.stderr)
+        generate_roster(rows, seed).to_csv(f'{path}.tmp', index=False)
+        os.replace(f'{path}.tmp', path)
+    return path
+
+
+def run_scale(path, backend=None, min_seconds=MIN_SECONDS):
+    env = dict(os.environ, STUDENT_DATA_PATH=path)
+    # Benchmarks time the code itself, not the spans around it
+    env.setdefault('INSTRUMENTATION', '0')
+    if backend:
+        env['STUDENT_DATA_BACKEND'] = backend
+    output = subprocess.run([sys.executable, os.path.abspath(__file__), '--worker', '--min-seconds', str(min_seconds)],
+                            cwd=APP_DIR, env=env, check=True, stdout=subprocess.PIPE, text=True).stdout
+    return json.loads(output)
+
+
+def _throughput(result):
+    unit = 'rows/s' if result['items_per_call'] > 1 else 'calls/s'
+    return f'{result["throughput"]:,.0f} {unit}'
+
+
+def format_report(report, baseline=None):
+    lines = []
+    for scale in report['scales']:
+        lines.append(f'\n{scale["rows"]:,} students (peak RSS {scale["peak_rss_mb"]:.0f} MB)')
+        lines.append(f'{"benchmark":34} {"p50 ms":>10} {"p95 ms":>10} {"p99 ms":>10} '
+                     f'{"throughput":>20} {"alloc MB":>9}' + (f' {"p50 vs base":>12}' if baseline else ''))
+        previous = None
+        if baseline:
+            previous = next((s['benchmarks'] for s in baseline['scales'] if s['rows'] == scale['rows']), None)
+        for name, result in scale['benchmarks'].items():
+            line = (f'{name:34} {result["p50_ms"]:10.3f} {result["p95_ms"]:10.3f} {result["p99_ms"]:10.3f} '
+                    f'{_throughput(result):>20} {result["peak_alloc_mb"]:9.1f}')
+            if previous and name in previous and previous[name]['p50_ms']:
+                change = result['p50_ms'] / previous[name]['p50_ms'] - 1
+                line += f' {change:+12.1%}'
+            lines.append(line)
+    return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark the dashboard data paths on synthetic rosters')
+    parser.add_argument('--scales', type=lambda text: [int(value) for value in text.split(',')], default=SCALES,
+                        help='Comma-separated roster sizes (default: 10000,100000,900000)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--backend', help='Storage backend to benchmark (default: STUDENT_DATA_BACKEND or csv)')
+    parser.add_argument('--data-dir', default=os.path.join(tempfile.gettempdir(), 'lms-benchmarks'),
+                        help='Where generated rosters are kept between runs')
+    parser.add_argument('--min-seconds', type=float, default=MIN_SECONDS, help='Time budget per benchmark')
+    parser.add_argument('--output', help='Save results as JSON')
+    parser.add_argument('--compare', help='Earlier --output file to compare median latencies against')
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        sys.path.insert(0, APP_DIR)
+        print(json.dumps(run_worker(args.min_seconds)))
+        sys.exit(0)
+
+    report = {'created': time.strftime('%Y-%m-%d %H:%M:%S'), 'seed': args.seed,
+              'backend': args.backend or os.getenv('STUDENT_DATA_BACKEND') or 'csv', 'scales': []}
+    for rows in args.scales:
+        path = roster_path(args.data_dir, rows, args.seed)
+        print(f'Benchmarking {rows:,} students...', file=sys.stderr)
+        report['scales'].append(run_scale(path, args.backend, args.min_seconds))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print(format_report(report, baseline))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
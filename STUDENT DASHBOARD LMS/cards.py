@@ -0,0 +1,85 @@
+import html
+import re
+from theme import register_styles, render_html
+
+# HTML templates for the dashboard and profile cards. A page builds a whole
+# section (title, card grid, recommendations) as one string and sends it as a
+# single element instead of one st.markdown call per card. Templates are
+# collapsed to one line at import so only the values are filled in per rerun.
+
+register_styles('cards', """
+<style>
+    .card-grid { display: grid; gap: 1rem; margin-bottom: 1rem; }
+    .card-grid > .metric-card { margin: 0; }
+    .progress-track { background-color: #e9ecef; border-radius: 6px; height: 0.6rem; overflow: hidden; }
+    .progress-fill { background-color: #1f4d7a; height: 100%; }
+</style>
+""")
+
+
+def _compile(template):
+    # Drop the indentation between tags; markdown would otherwise treat
+    # indented lines inside a section as a code block
+    return re.sub(r'>\s+<', '><', template.strip())
+
+
+CARD = _compile("""
+<div class='metric-card'>
+    <h3 style='color: #1f4d7a; margin: 0;'>{title}</h3>
+    <p style='font-size: {size}; margin: 0.5rem 0;'>{value}</p>
+</div>
+""")
+GRID = _compile("""
+<div class='card-grid' style='grid-template-columns: repeat({columns}, minmax(0, 1fr));'>{cards}</div>
+""")
+NOTE = _compile("""
+<div style='background-color: white; padding: 1rem; border-radius: 8px; box-shadow: 0 2px 4px rgba(0,0,0,0.05); margin-bottom: 0.5rem;'>
+    <p style='color: #2c3e50; margin: 0;'>{text}</p>
+</div>
+""")
+PANEL = _compile("""
+<div style='background-color: white; padding: 1.5rem; border-radius: 12px; box-shadow: 0 4px 6px rgba(0,0,0,0.05);'>{body}</div>
+""")
+PROGRESS = _compile("""
+<div style='display: flex; justify-content: space-between; align-items: center; margin-bottom: 1rem;'>
+    <span style='color: #2c3e50; font-size: 1.1rem;'>{label}</span>
+    <span style='color: #1f4d7a; font-weight: bold;'>{percent:.0f}%</span>
+</div>
+<div class='progress-track'><div class='progress-fill' style='width: {width:.1f}%;'></div></div>
+""")
+
+
+def escape(value):
+    return html.escape(str(value), quote=True)
+
+
+def card(title, value, size='1.5rem', raw=False):
+    # raw=True keeps markup in value (e.g. the '/4.0' suffix span)
+    return CARD.format(title=escape(title), size=size, value=value if raw else escape(value))
+
+
+def card_grid(cards):
+    return GRID.format(columns=max(len(cards), 1), cards=''.join(cards))
+
+
+def heading(text, tag='h2', css_class='section-title', style=''):
+    attributes = (f" class='{css_class}'" if css_class else '') + (f" style='{style}'" if style else '')
+    return f'<{tag}{attributes}>{escape(text)}</{tag}>'
+
+
+def notes(texts):
+    return ''.join(NOTE.format(text=escape(text)) for text in texts)
+
+
+def panel(body):
+    return PANEL.format(body=body)
+
+
+def progress(label, percent):
+    return PROGRESS.format(label=escape(label), percent=percent, width=min(max(percent, 0), 100))
+
+
+def render_section(*parts):
+    # Send the given fragments as one element; pages inject the 'cards'
+    # styles together with their own
+    return render_html(''.join(parts))
@@ -0,0 +1,123 @@
+import numpy as np
+import plotly.graph_objects as go
+from plotly.colors import qualitative
+from aggregates import ATTENDANCE_BIN_EDGES, GPA_BIN_EDGES, get_aggregates
+from data_store import get_store
+from instrumentation import timed
+
+# Figures are built from counts, bins and quartiles computed on the server,
+# so their size does not grow with the roster.
+THEMES = {
+    'Dark': {'background': 'black', 'font': '#e0e0e0', 'grid': '#333333', 'accent': '#4a9eff'},
+    'Light': {'background': 'white', 'font': '#2c3e50', 'grid': '#f0f0f0', 'accent': '#1f4d7a'}
+}
+
+
+def _apply_theme(fig, title, theme, x_title=None, y_title=None):
+    colors = THEMES[theme]
+    axis = dict(showgrid=True, gridwidth=1, gridcolor=colors['grid'], color=colors['font'])
+    fig.update_layout(
+        title={'text': title, 'y': 0.9, 'x': 0.5, 'xanchor': 'center', 'yanchor': 'top'},
+        plot_bgcolor=colors['background'],
+        paper_bgcolor=colors['background'],
+        font={'color': colors['font']},
+        xaxis=dict(axis, title=x_title),
+        yaxis=dict(axis, title=y_title)
+    )
+    return fig
+
+
+def histogram_figure(counts, edges, title, x_title, theme='Dark'):
+    # Pre-binned histogram drawn as bars; empty bins at either end are dropped
+    counts = np.asarray(counts)
+    filled = np.flatnonzero(counts)
+    if len(filled):
+        counts = counts[filled[0]:filled[-1] + 1]
+        edges = edges[filled[0]:filled[-1] + 2]
+    centers = (edges[:-1] + edges[1:]) / 2
+    fig = go.Figure(data=[go.Bar(x=centers, y=counts, width=np.diff(edges),
+                                 marker_color=THEMES[theme]['accent'])])
+    fig.update_layout(bargap=0)
+    return _apply_theme(fig, title, theme, x_title, 'Count')
+
+
+def histogram_of(values, edges, title, x_title, theme='Dark'):
+    counts = np.histogram(np.clip(values, edges[0], edges[-1]), bins=edges)[0]
+    return histogram_figure(counts, edges, title, x_title, theme)
+
+
+def pie_figure(labels, values, title, theme='Dark'):
+    fig = go.Figure(data=[go.Pie(labels=list(labels), values=list(values),
+                                 marker=dict(colors=qualitative.Set3))])
+    fig.update_layout(title={'text': title, 'y': 0.9, 'x': 0.5, 'xanchor': 'center', 'yanchor': 'top'},
+                      plot_bgcolor=THEMES[theme]['background'],
+                      paper_bgcolor=THEMES[theme]['background'],
+                      font={'color': THEMES[theme]['font']})
+    return fig
+
+
+def box_figure(box_stats, title, x_title, y_title, theme='Dark'):
+    # box_stats maps a trace name to precomputed q1/median/q3/fences/mean
+    names = [name for name, stats in box_stats.items() if stats]
+    stats = [box_stats[name] for name in names]
+    fig = go.Figure(data=[go.Box(
+        x=names,
+        q1=[s['q1'] for s in stats],
+        median=[s['median'] for s in stats],
+        q3=[s['q3'] for s in stats],
+        lowerfence=[s['lowerfence'] for s in stats],
+        upperfence=[s['upperfence'] for s in stats],
+        mean=[s['mean'] for s in stats],
+        marker_color=THEMES[theme]['accent'],
+        name=y_title
+    )])
+    return _apply_theme(fig, title, theme, x_title, y_title)
+
+
+def bar_figure(labels, values, title, x_title, y_title, theme='Dark'):
+    fig = go.Figure(data=[go.Bar(x=list(labels), y=list(values), marker_color=THEMES[theme]['accent'])])
+    return _apply_theme(fig, title, theme, x_title, y_title)
+
+
+def score_trend_figure(scores, labels=('Test 1', 'Test 2', 'Test 3')):
+    # A student's test scores as a line. graph_objects is already loaded
+    # with streamlit; plotly.express would add about 40 ms on first use.
+    fig = go.Figure(data=[go.Scatter(x=list(labels), y=list(scores), mode='lines+markers')])
+    fig.update_layout(xaxis_title='Test', yaxis_title='Score')
+    return fig
+
+
+def _unzip(pairs):
+    return tuple(zip(*pairs)) or ((), ())
+
+
+def build_analytics_figures(aggregates, theme='Dark'):
+    spec_names, spec_counts = _unzip(aggregates.specialization_distribution())
+    clubs, club_counts = _unzip(aggregates.club_participation())
+    return {
+        'gpa': histogram_figure(aggregates.gpa_histogram, GPA_BIN_EDGES, 'GPA Distribution', 'GPA', theme),
+        'specialization': pie_figure(spec_names, spec_counts, 'Students per Specialization', theme),
+        'test_scores': box_figure(aggregates.score_box_stats(), 'Test Scores Distribution', 'Test', 'Score', theme),
+        'clubs': bar_figure(clubs, club_counts, 'Club Participation', 'Club', 'Count', theme)
+    }
+
+
+@timed('charts.get_analytics_figures')
+def get_analytics_figures(theme='Dark'):
+    # Performance Analytics figures, cached per dataset version and theme
+    return get_store().derived(f'analytics_figures_{theme}',
+                               lambda df: build_analytics_figures(get_aggregates(), theme))
+
+
+@timed('charts.filtered_distribution_figures')
+def filtered_distribution_figures(df, positions=None, theme='Light'):
+    # GPA and attendance histograms for the rows of df at positions (all
+    # rows when None); only the two columns are indexed, never the frame
+    def column(name):
+        values = df[name].to_numpy(dtype=float)
+        return values if positions is None else values[positions]
+    return {
+        'gpa': histogram_of(column('gpa'), GPA_BIN_EDGES, 'GPA Distribution', 'gpa', theme),
+        'attendance': histogram_of(column('attendance_percentage'), ATTENDANCE_BIN_EDGES,
+                                   'Attendance Distribution', 'attendance_percentage', theme)
+    }
@@ -0,0 +1,196 @@
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from data_store import find_student
+from instrumentation import timed
+
+# Login verification shared by every session in the process. Staff hashes
+# are precomputed, every check runs on a small bounded pool instead of each
+# script thread, and token buckets limit how fast anyone can retry: per
+# client address, per account and client, and a looser one per account.
+# Failed attempts from one client therefore cannot lock other clients out
+# of an account.
+
+# Sample staff credentials (in production, use a secure database); the
+# hashes are pbkdf2_sha256 of the demo passwords
+STAFF_CREDENTIALS = {
+    'admin@upes.ac.in': '$pbkdf2-sha256$29000$CgGA8P7/vzcmxDhHCOGcUw$E6P8TmFuqd93CdXFdM5DbH9R16lj7i7HB80C309fdX4',
+    'teacher@upes.ac.in': '$pbkdf2-sha256$29000$.B/j/H9vjVEqRcjZ2/t/7w$wFjduAUG0lmqfoZ6lQ/8eOsCF8YMumliDcrnlQXirvg'
+}
+STAFF_ROLES = {
+    'admin@upes.ac.in': 'admin',
+    'teacher@upes.ac.in': 'teacher'
+}
+
+LOGIN_WORKERS = int(os.getenv('LOGIN_WORKERS', min(4, os.cpu_count() or 1)))
+LOGIN_QUEUE_LIMIT = int(os.getenv('LOGIN_QUEUE_LIMIT', 64))
+LOGIN_TIMEOUT = 10.0
+# Bucket sizes and refill rates (tokens per second)
+ACCOUNT_BURST, ACCOUNT_RATE = 5, 1 / 12
+CLIENT_BURST, CLIENT_RATE = 20, 1 / 3
+ACCOUNT_WIDE_BURST, ACCOUNT_WIDE_RATE = 50, 1 / 2
+# Reverse proxies in front of the app that append to X-Forwarded-For. With
+# none, the client is the websocket's peer address and the header is ignored.
+TRUSTED_PROXY_HOPS = int(os.getenv('TRUSTED_PROXY_HOPS', 0))
+MAX_TRACKED_KEYS = 100000
+
+LOGIN_OK = 'ok'
+LOGIN_INVALID = 'invalid'
+LOGIN_UNKNOWN = 'unknown'
+LOGIN_RATE_LIMITED = 'rate_limited'
+LOGIN_BUSY = 'busy'
+
+
+class TokenBucketLimiter:
+    # One bucket per key, refilled continuously at `rate` up to `burst`.
+    # Least recently used keys are dropped beyond max_keys; a dropped key
+    # simply starts again with a full bucket.
+    def __init__(self, burst, rate, max_keys=MAX_TRACKED_KEYS, clock=time.monotonic):
+        self.burst = burst
+        self.rate = rate
+        self.max_keys = max_keys
+        self._clock = clock
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def allow(self, key, cost=1):
+        now = self._clock()
+        with self._lock:
+            tokens, last = self._buckets.pop(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return allowed
+
+    def reset(self, key):
+        with self._lock:
+            self._buckets.pop(key, None)
+
+
+def _pbkdf2():
+    # passlib (and the crypt module it pulls in) loads on the first login,
+    # not with the login page
+    from passlib.hash import pbkdf2_sha256
+    return pbkdf2_sha256
+
+
+class CredentialStore:
+    def __init__(self, staff=STAFF_CREDENTIALS, workers=LOGIN_WORKERS, queue_limit=LOGIN_QUEUE_LIMIT):
+        self._staff = dict(staff)
+        # Unknown emails are checked against this so they take as long as known ones
+        self._dummy_hash = _pbkdf2().hash(secrets.token_hex(16))
+        # Student passwords are their IDs in this demo; compare keyed digests
+        # so the check does not leak timing
+        self._student_key = secrets.token_bytes(32)
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='login')
+        self._slots = threading.BoundedSemaphore(queue_limit)
+        self.account_limiter = TokenBucketLimiter(ACCOUNT_BURST, ACCOUNT_RATE)
+        self.client_limiter = TokenBucketLimiter(CLIENT_BURST, CLIENT_RATE)
+        self.account_wide_limiter = TokenBucketLimiter(ACCOUNT_WIDE_BURST, ACCOUNT_WIDE_RATE)
+
+    def _limited(self, account, client):
+        # The tight per-account bucket is keyed on the client too, so one
+        # client's failures only use up its own attempts at the account
+        if client is not None and not self.client_limiter.allow(('client', client)):
+            return True
+        if not self.account_wide_limiter.allow(account):
+            return True
+        return not self.account_limiter.allow((account, client))
+
+    def _run(self, function, *args):
+        # At most queue_limit verifications wait for the pool; beyond that
+        # the login is turned away instead of queueing without bound
+        if not self._slots.acquire(blocking=False):
+            return LOGIN_BUSY
+        try:
+            future = self._pool.submit(function, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=LOGIN_TIMEOUT)
+        except FutureTimeout:
+            return LOGIN_BUSY
+
+    def _check_staff(self, email, password):
+        stored = self._staff.get(email)
+        matched = _pbkdf2().verify(password, stored or self._dummy_hash)
+        return LOGIN_OK if stored is not None and matched else LOGIN_INVALID
+
+    @timed('auth.verify_staff')
+    def verify_staff(self, email, password, client=None):
+        if self._limited(('staff', email), client):
+            return LOGIN_RATE_LIMITED
+        result = self._run(self._check_staff, email, password)
+        if result == LOGIN_OK:
+            self.account_limiter.reset((('staff', email), client))
+        return result
+
+    def _digest(self, value):
+        return hmac.new(self._student_key, value.encode('utf-8'), hashlib.sha256).digest()
+
+    def _check_student(self, student_id, password):
+        student = find_student(student_id)
+        if student is None:
+            return LOGIN_UNKNOWN, None
+        if not hmac.compare_digest(self._digest(password), self._digest(str(student_id))):
+            return LOGIN_INVALID, None
+        return LOGIN_OK, student
+
+    @timed('auth.verify_student')
+    def verify_student(self, student_id, password, client=None):
+        # Returns (status, student record or None)
+        if self._limited(('student', student_id), client):
+            return LOGIN_RATE_LIMITED, None
+        result = self._run(self._check_student, student_id, password)
+        if result == LOGIN_BUSY:
+            return LOGIN_BUSY, None
+        if result[0] == LOGIN_OK:
+            self.account_limiter.reset((('student', student_id), client))
+        return result
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_credential_store():
+    # One store (hashes, worker pool, limiters) per process
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = CredentialStore()
+        return _store
+
+
+def forwarded_client(forwarded_for, hops=TRUSTED_PROXY_HOPS):
+    # Each proxy appends the address it received the request from, so the
+    # hops-th entry from the right is the client as the outermost trusted
+    # proxy saw it; entries left of it are whatever the client sent
+    entries = [entry.strip() for entry in (forwarded_for or '').split(',') if entry.strip()]
+    return entries[-hops] if hops and len(entries) >= hops else None
+
+
+def client_address():
+    # Address of the browser behind the current session, or None outside a
+    # running server. Behind TRUSTED_PROXY_HOPS proxies it comes from
+    # X-Forwarded-For; otherwise it is the websocket's peer address.
+    try:
+        from streamlit import runtime
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        request = runtime.get_instance().get_client(get_script_run_ctx().session_id).request
+    except Exception:
+        return None
+    if TRUSTED_PROXY_HOPS:
+        return forwarded_client(request.headers.get('X-Forwarded-For'))
+    return request.remote_ip
@@ -0,0 +1,290 @@
+import threading
+import numpy as np
+import pandas as pd
+from storage import CSV_PATH, STUDENT_COLUMNS, RosterChanged, make_storage
+from instrumentation import span
+
+DATA_PATH = CSV_PATH
+
+
+class StudentIndex:
+    # student_id -> row position lookups for one dataset version. Single IDs
+    # go through a hash map; batches use a sorted int64 array and searchsorted.
+    def __init__(self, student_ids):
+        ids = np.asarray(student_ids, dtype=np.int64)
+        # Insert in reverse so the first row wins for duplicated IDs
+        self._positions = dict(zip(ids[::-1].tolist(), range(len(ids) - 1, -1, -1)))
+        self._order = np.argsort(ids, kind='stable')
+        self._sorted_ids = ids[self._order]
+
+    def __len__(self):
+        return len(self._positions)
+
+    def __contains__(self, student_id):
+        return self.position(student_id) is not None
+
+    def position(self, student_id):
+        try:
+            return self._positions.get(int(student_id))
+        except (TypeError, ValueError):
+            return None
+
+    def positions(self, student_ids):
+        # Row positions for many IDs at once, -1 where an ID is unknown
+        ids = np.asarray(student_ids, dtype=np.int64).ravel()
+        if len(self._sorted_ids) == 0:
+            return np.full(len(ids), -1, dtype=np.int64)
+        slots = np.searchsorted(self._sorted_ids, ids)
+        slots = np.minimum(slots, len(self._sorted_ids) - 1)
+        found = self._sorted_ids[slots] == ids
+        return np.where(found, self._order[slots], -1)
+
+
+class StudentRecord:
+    # The fields the student pages read, as plain Python values. Small enough
+    # (a few hundred bytes) for every session to keep its signed-in student,
+    # where a row Series costs several KB. version is the dataset version
+    # the values came from; None for records read straight from the backend.
+    __slots__ = ('version', 'student_id', 'name', 'course', 'semester', 'batch_year', 'gpa',
+                 'attendance_percentage', 'assignments_completed', 'test1_score', 'test2_score',
+                 'test3_score', 'specialization', 'extracurricular_activities')
+    FIELDS = __slots__[1:]
+
+    def __init__(self, version, values):
+        self.version = version
+        for field, value in zip(self.FIELDS, values):
+            # numpy scalars carry an array header; keep the Python value
+            setattr(self, field, value.item() if hasattr(value, 'item') else value)
+
+    @classmethod
+    def from_row(cls, row, version=None):
+        return cls(version, [row[field] for field in cls.FIELDS])
+
+    def __getitem__(self, field):
+        # Indexing like the row Series the pages were written against
+        if field not in self.FIELDS:
+            raise KeyError(field)
+        return getattr(self, field)
+
+    def __repr__(self):
+        return f'StudentRecord({", ".join(f"{field}={self[field]!r}" for field in self.FIELDS)})'
+
+
+class StudentDataStore:
+    # Process-wide cache of the student roster. The data is loaded once and
+    # only re-read when the source file's modification time or size changes.
+    def __init__(self, path=DATA_PATH, storage=None):
+        self.path = path
+        self.storage = storage or make_storage(csv_path=path)
+        self._lock = threading.Lock()
+        # One lock per derived structure, so a slow build never holds up
+        # lookups in the others; re-entrant so a builder may itself ask the
+        # store for another structure
+        self._build_locks = {}
+        # Serializes upserts with each other
+        self._write_lock = threading.Lock()
+        self._df = None
+        self._signature = None
+        self._derived = {}
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+
+    def _snapshot(self):
+        signature = self.storage.signature()
+        with self._lock:
+            if self._df is not None and signature == self._signature:
+                self.hits += 1
+                return self._df, self.version
+
+            if self._df is None:
+                self.misses += 1
+            else:
+                self.reloads += 1
+            with span('data_store.load'):
+                self._df = self.storage.load()
+            self._signature = signature
+            self._derived = {}
+            self.version += 1
+            return self._df, self.version
+
+    def get_dataframe(self):
+        return self._snapshot()[0]
+
+    def _build_lock(self, name):
+        with self._lock:
+            lock = self._build_locks.get(name)
+            if lock is None:
+                lock = self._build_locks[name] = threading.RLock()
+            return lock
+
+    def _derived_for(self, df, version, name, builder):
+        # Hits are a plain dict read; only a miss takes the structure's lock
+        entry = self._derived.get(name)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+        with self._build_lock(name):
+            entry = self._derived.get(name)
+            if entry is None or entry[0] != version:
+                with span(f'data_store.build.{name}'):
+                    entry = (version, builder(df))
+                with self._lock:
+                    if self.version == version:
+                        self._derived[name] = entry
+            return entry[1]
+
+    def derived(self, name, builder):
+        # Structure computed once per dataset version with builder(df)
+        return self.derived_with_frame(name, builder)[1]
+
+    def derived_with_frame(self, name, builder):
+        # (df, structure) taken from the same dataset version, for callers that
+        # index into the frame with row positions from the structure
+        df, (value,) = self.derived_set([(name, builder)])
+        return df, value
+
+    def derived_set(self, builders):
+        # (df, [structure, ...]) for several (name, builder) pairs, all built
+        # from the same dataset version
+        df, version = self._snapshot()
+        return df, [self._derived_for(df, version, name, builder) for name, builder in builders]
+
+    def _index_for(self, df, version):
+        return self._derived_for(df, version, 'student_index',
+                                 lambda frame: StudentIndex(frame['student_id']))
+
+    def _indexed_snapshot(self):
+        df, version = self._snapshot()
+        return df, self._index_for(df, version)
+
+    def get_index(self):
+        return self._indexed_snapshot()[1]
+
+    def get_student(self, student_id):
+        # Backends with point lookups (SQLite) answer single students
+        # directly until the full roster has been loaded
+        if self._df is None and hasattr(self.storage, 'fetch_student'):
+            try:
+                return self.storage.fetch_student(student_id)
+            except (TypeError, ValueError, OverflowError):
+                return None
+        df, index = self._indexed_snapshot()
+        position = index.position(student_id)
+        return None if position is None else df.iloc[position]
+
+    def get_student_record(self, student_id, current=None):
+        # The student as a StudentRecord. current is a record the caller
+        # already holds; it is returned as is while the dataset is unchanged.
+        if self._df is None and hasattr(self.storage, 'fetch_student'):
+            row = self.get_student(student_id)
+            return None if row is None else StudentRecord.from_row(row)
+        df, version = self._snapshot()
+        if current is not None and current.version == version and current.student_id == student_id:
+            return current
+        position = self._index_for(df, version).position(student_id)
+        if position is None:
+            return None
+        return StudentRecord(version, [df[field].iat[position] for field in StudentRecord.FIELDS])
+
+    def get_students(self, student_ids):
+        # Rows for the requested IDs in request order; unknown IDs are skipped.
+        # Like get_student, backends with point lookups answer without
+        # loading the full roster.
+        if self._df is None and hasattr(self.storage, 'fetch_student'):
+            rows = [row for row in map(self.get_student, student_ids) if row is not None]
+            return pd.DataFrame(rows, columns=STUDENT_COLUMNS)
+        df, index = self._indexed_snapshot()
+        positions = index.positions(student_ids)
+        return df.iloc[positions[positions >= 0]]
+
+    def upsert(self, rows):
+        # Add new students and replace existing ones, in the backend and in
+        # this copy. The new frame is built first, then written, and only
+        # then swapped in; a backend that was written by someone else since
+        # this copy was loaded raises RosterChanged before anything is
+        # written. Derived structures that define
+        # apply_upsert(old_rows, new_rows, df) are carried over
+        # incrementally; everything else is rebuilt lazily.
+        if not hasattr(self.storage, 'upsert'):
+            raise TypeError(f'The {self.storage.name} backend cannot persist upserts')
+        rows = rows[STUDENT_COLUMNS].drop_duplicates('student_id', keep='last')
+        with self._write_lock:
+            df, version = self._snapshot()
+            index = self._index_for(df, version)
+            with self._lock:
+                if self._df is not df:
+                    raise RosterChanged('Roster reloaded during upsert, retry')
+                expected_signature = self._signature
+                derived = {name: value for name, (built, value) in self._derived.items()
+                           if built == version and hasattr(value, 'apply_upsert')}
+
+            positions = index.positions(rows['student_id'])
+            existing = positions >= 0
+            old_rows = df.iloc[positions[existing]]
+            updated = df.copy()
+            for column in STUDENT_COLUMNS:
+                if isinstance(updated[column].dtype, pd.CategoricalDtype):
+                    new_values = pd.Index(rows[column].unique()).difference(updated[column].cat.categories)
+                    if len(new_values):
+                        updated[column] = updated[column].cat.add_categories(new_values)
+            rows = rows.astype(updated.dtypes.to_dict())
+            if existing.any():
+                for column_position, column in enumerate(updated.columns):
+                    updated.iloc[positions[existing], column_position] = rows[column][existing].to_numpy()
+            if (~existing).any():
+                updated = pd.concat([updated, rows[~existing]], ignore_index=True)
+            derived = {name: (version + 1, value.apply_upsert(old_rows, rows, updated))
+                       for name, value in derived.items()}
+
+            signature = self.storage.upsert(rows, expected_signature)
+
+            with self._lock:
+                if self._df is not df:
+                    # A reader already reloaded the backend, rows included
+                    return self.version
+                self._signature = signature
+                self._df = updated
+                self._derived = derived
+                self.version += 1
+                return self.version
+
+    def stats(self):
+        with self._lock:
+            return {
+                'path': self.path,
+                'backend': self.storage.name,
+                'version': self.version,
+                'rows': 0 if self._df is None else len(self._df),
+                'hits': self.hits,
+                'misses': self.misses,
+                'reloads': self.reloads
+            }
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(path=DATA_PATH):
+    with _stores_lock:
+        if path not in _stores:
+            _stores[path] = StudentDataStore(path)
+        return _stores[path]
+
+
+def load_students():
+    # Shared, read-only frame: callers must copy before mutating it
+    return get_store().get_dataframe()
+
+
+def find_student(student_id):
+    return get_store().get_student(student_id)
+
+
+def find_student_record(student_id, current=None):
+    return get_store().get_student_record(student_id, current)
+
+
+def find_students(student_ids):
+    return get_store().get_students(student_ids)
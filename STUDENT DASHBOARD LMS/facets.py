@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+from data_store import get_store
+from search_index import SearchIndex
+from table_view import SortOrders
+
+FACET_COLUMNS = ['specialization', 'extracurricular_activities', 'course', 'semester', 'batch_year']
+
+
+class FacetIndex:
+    # Sorted row-position lists for every value of the categorical roster
+    # columns. Filtering on several facets is an intersection of those lists,
+    # and option lists and counts come straight from the index.
+    def __init__(self, df, columns=FACET_COLUMNS):
+        self.size = len(df)
+        self._rows = {}
+        self._options = {}
+        for column in columns:
+            # Options keep first-appearance order, like Series.unique()
+            codes, uniques = pd.factorize(df[column], sort=False)
+            order = np.argsort(codes, kind='stable').astype(np.int64)
+            bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+            options = uniques.tolist()
+            self._options[column] = options
+            self._rows[column] = {option: order[bounds[i]:bounds[i + 1]]
+                                  for i, option in enumerate(options)}
+
+    @property
+    def columns(self):
+        return list(self._options)
+
+    def options(self, column):
+        return list(self._options[column])
+
+    def counts(self, column):
+        return {option: len(rows) for option, rows in self._rows[column].items()}
+
+    def rows(self, column, values):
+        # Positions matching any of values (a single value or a list of them)
+        if isinstance(values, (list, tuple, set)):
+            parts = [self._rows[column].get(value, np.empty(0, dtype=np.int64)) for value in values]
+            return np.unique(np.concatenate(parts)) if parts else np.empty(0, dtype=np.int64)
+        return self._rows[column].get(values, np.empty(0, dtype=np.int64))
+
+    def query(self, filters, positions=None):
+        # filters maps column -> value(s); positions optionally narrows the
+        # result further, e.g. to search hits. Smallest sets are intersected first.
+        sets = [self.rows(column, values) for column, values in filters.items()]
+        if positions is not None:
+            sets.append(np.asarray(positions, dtype=np.int64))
+        if not sets:
+            return np.arange(self.size)
+        sets.sort(key=len)
+        result = sets[0]
+        for rows in sets[1:]:
+            if len(result) == 0:
+                break
+            result = np.intersect1d(result, rows, assume_unique=True)
+        return result
+
+
+def get_facet_index():
+    return get_store().derived('facet_index', FacetIndex)
+
+
+def filter_snapshot():
+    # Roster frame plus the search index, facet index and table sort orders,
+    # all from one dataset version
+    df, (search_index, facet_index, sort_orders) = get_store().derived_set(
+        [('search_index', SearchIndex.from_frame), ('facet_index', FacetIndex), ('sort_orders', SortOrders)])
+    return df, search_index, facet_index, sort_orders
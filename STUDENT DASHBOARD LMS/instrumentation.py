@@ -0,0 +1,368 @@
+import json
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+
+# Timing spans around the hot paths (data loading, analytics, charts,
+# timetables, login hashing, each dashboard page). Every span feeds a
+# process-wide histogram with fixed buckets, so recording costs a clock
+# read, a bisect and a short lock hold, and memory does not grow with
+# traffic. A thread can also keep a trace of the spans it ran, which is
+# how the profiling panel shows the breakdown of a single rerun.
+
+# INSTRUMENTATION=0 turns spans into plain calls
+INSTRUMENTATION_ENABLED = os.getenv('INSTRUMENTATION', '1') != '0'
+# Upper bucket bounds in seconds; slower observations land in +Inf
+BUCKET_BOUNDS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METRIC_NAME = 'lms_span_seconds'
+# Upper bucket bounds in bytes for size measurements, e.g. session state
+# or the HTML sent per rerun
+SIZE_BOUNDS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+SIZE_METRIC_NAME = 'lms_size_bytes'
+
+
+class SpanHistogram:
+    def __init__(self, bounds=BUCKET_BOUNDS):
+        self.bounds = bounds
+        self.buckets = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.buckets[bisect_left(self.bounds, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q):
+        # Estimated from the buckets, interpolating linearly inside the
+        # bucket the quantile falls in and capped at the observed maximum
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.buckets):
+            if count and seen + count >= rank:
+                low = self.bounds[i - 1] if i else 0.0
+                high = self.bounds[i] if i < len(self.bounds) else self.max
+                return min(self.max, low + (high - low) * (rank - seen) / count)
+            seen += count
+        return self.max
+
+    def snapshot(self):
+        return {
+            'count': self.count,
+            'sum': self.total,
+            'mean': self.total / self.count if self.count else 0.0,
+            'max': self.max,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'p99': self.quantile(0.99),
+            'buckets': list(zip(self.bounds + (float('inf'),), self.buckets))
+        }
+
+
+class SpanRecorder:
+    def __init__(self, bounds=BUCKET_BOUNDS, enabled=INSTRUMENTATION_ENABLED, clock=time.perf_counter):
+        self.bounds = bounds
+        self.enabled = enabled
+        self._clock = clock
+        self._histograms = {}
+        self._sizes = {}
+        self._lock = threading.Lock()
+        # Per-thread nesting depth and, while tracing, the spans finished so far
+        self._local = threading.local()
+        self.started = time.time()
+
+    def observe(self, name, seconds):
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = SpanHistogram(self.bounds)
+            histogram.observe(seconds)
+
+    def observe_size(self, name, nbytes):
+        with self._lock:
+            histogram = self._sizes.get(name)
+            if histogram is None:
+                histogram = self._sizes[name] = SpanHistogram(SIZE_BOUNDS)
+            histogram.observe(nbytes)
+
+    @contextmanager
+    def span(self, name):
+        if not self.enabled:
+            yield
+            return
+        local = self._local
+        depth = getattr(local, 'depth', 0)
+        local.depth = depth + 1
+        start = self._clock()
+        try:
+            yield
+        finally:
+            elapsed = self._clock() - start
+            local.depth = depth
+            self.observe(name, elapsed)
+            trace = getattr(local, 'trace', None)
+            if trace is not None:
+                trace.append((start, depth, name, elapsed))
+
+    def timed(self, name):
+        # Decorator form of span()
+        def decorate(function):
+            @wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+                with self.span(name):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def begin_trace(self):
+        # Starts recording this thread's spans, dropping any earlier trace
+        self._local.trace = []
+        self._local.trace_start = self._clock()
+
+    def end_trace(self):
+        # This thread's spans since begin_trace() in start order, as
+        # (offset_seconds, depth, name, seconds); stops recording
+        trace = getattr(self._local, 'trace', None) or []
+        origin = getattr(self._local, 'trace_start', 0.0)
+        self._local.trace = None
+        return [(start - origin, depth, name, elapsed) for start, depth, name, elapsed in sorted(trace)]
+
+    def snapshot(self):
+        with self._lock:
+            return {name: histogram.snapshot() for name, histogram in sorted(self._histograms.items())}
+
+    def size_snapshot(self):
+        with self._lock:
+            return {name: histogram.snapshot() for name, histogram in sorted(self._sizes.items())}
+
+    def reset(self):
+        with self._lock:
+            self._histograms = {}
+            self._sizes = {}
+            self.started = time.time()
+
+    def to_json(self):
+        buckets_as_text = lambda buckets: [['+Inf' if bound == float('inf') else bound, count]
+                                           for bound, count in buckets]
+        spans = {name: dict(values, buckets=buckets_as_text(values['buckets']))
+                 for name, values in self.snapshot().items()}
+        sizes = {name: dict(values, buckets=buckets_as_text(values['buckets']))
+                 for name, values in self.size_snapshot().items()}
+        return json.dumps({'started': self.started, 'pid': os.getpid(), 'spans': spans, 'sizes': sizes}, indent=2)
+
+    def to_prometheus(self):
+        # Prometheus text exposition format, one histogram labelled by span
+        # and one labelled by the measured size
+        lines = [f'# HELP {METRIC_NAME} Time spent in instrumented spans.',
+                 f'# TYPE {METRIC_NAME} histogram']
+        snapshot = self.snapshot()
+        lines += _histogram_lines(METRIC_NAME, 'span', snapshot)
+        lines.append(f'# HELP {METRIC_NAME}_max Slowest observation per span since start.')
+        lines.append(f'# TYPE {METRIC_NAME}_max gauge')
+        for name, values in snapshot.items():
+            lines.append(f'{METRIC_NAME}_max{{span="{_label(name)}"}} {values["max"]!r}')
+        lines += [f'# HELP {SIZE_METRIC_NAME} Measured sizes, e.g. bytes of session state per rerun.',
+                  f'# TYPE {SIZE_METRIC_NAME} histogram']
+        lines += _histogram_lines(SIZE_METRIC_NAME, 'name', self.size_snapshot())
+        return '\n'.join(lines) + '\n'
+
+
+def _label(name):
+    return name.replace('\\', '\\\\').replace('"', '\\"')
+
+
+def _histogram_lines(metric, key, snapshot):
+    lines = []
+    for name, values in snapshot.items():
+        label = _label(name)
+        cumulative = 0
+        for bound, count in values['buckets']:
+            cumulative += count
+            le = '+Inf' if bound == float('inf') else repr(bound)
+            lines.append(f'{metric}_bucket{{{key}="{label}",le="{le}"}} {cumulative}')
+        lines.append(f'{metric}_sum{{{key}="{label}"}} {values["sum"]!r}')
+        lines.append(f'{metric}_count{{{key}="{label}"}} {values["count"]}')
+    return lines
+
+
+_recorder = SpanRecorder()
+# Metrics of feature modules served alongside the spans:
+# name -> (to_prometheus, snapshot)
+_exporters = {}
+
+
+def register_exporter(name, to_prometheus, snapshot):
+    # to_prometheus() returns exposition text appended to /metrics;
+    # snapshot() returns a JSON-serialisable value put under name in
+    # /metrics.json. Registering a name again replaces it.
+    _exporters[name] = (to_prometheus, snapshot)
+
+
+def get_recorder():
+    return _recorder
+
+
+def span(name):
+    return _recorder.span(name)
+
+
+def timed(name):
+    return _recorder.timed(name)
+
+
+def begin_trace():
+    _recorder.begin_trace()
+
+
+def end_trace():
+    return _recorder.end_trace()
+
+
+def deep_sizeof(obj, seen=None):
+    # Bytes held by obj and everything it references through containers,
+    # __dict__ and __slots__, counting each object once. pandas and numpy
+    # objects report their buffers through sys.getsizeof already.
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (str, bytes, bytearray, int, float, bool, type(None))):
+        return size
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(key, seen) + deep_sizeof(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    elif type(obj).__module__.split('.')[0] not in ('pandas', 'numpy'):
+        if hasattr(obj, '__dict__'):
+            size += deep_sizeof(vars(obj), seen)
+        for slot in getattr(type(obj), '__slots__', ()):
+            if hasattr(obj, slot):
+                size += deep_sizeof(getattr(obj, slot), seen)
+    return size
+
+
+def record_size(name, nbytes):
+    if _recorder.enabled:
+        _recorder.observe_size(name, nbytes)
+
+
+def record_session_size(session_state):
+    # Measures one session's state after a rerun and feeds the
+    # 'session_state' size histogram; returns the bytes measured
+    if not _recorder.enabled:
+        return None
+    nbytes = deep_sizeof(session_state.to_dict())
+    _recorder.observe_size('session_state', nbytes)
+    return nbytes
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port=None, host=None):
+    # Serves /metrics (Prometheus text) and /metrics.json from a daemon
+    # thread. The port comes from METRICS_PORT; without one nothing starts.
+    # Only localhost can connect unless METRICS_HOST (e.g. 0.0.0.0) says
+    # otherwise. Safe to call on every rerun: only the first call binds.
+    global _server
+    host = host or os.getenv('METRICS_HOST', '127.0.0.1')
+    port = port or os.getenv('METRICS_PORT')
+    if not port:
+        return None
+    with _server_lock:
+        if _server is not None:
+            return _server
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path.split('?')[0]
+                exporters = list(_exporters.items())
+                if path == '/metrics':
+                    body = _recorder.to_prometheus() + ''.join(export() for _, (export, _) in exporters)
+                    content_type = 'text/plain; version=0.0.4'
+                elif path == '/metrics.json':
+                    report = json.loads(_recorder.to_json())
+                    report.update({name: snapshot() for name, (_, snapshot) in exporters})
+                    body, content_type = json.dumps(report, indent=2), 'application/json'
+                else:
+                    self.send_error(404)
+                    return
+                body = body.encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            _server = ThreadingHTTPServer((host, int(port)), MetricsHandler)
+        except OSError:
+            # Another server process on this host already serves the port
+            return None
+        threading.Thread(target=_server.serve_forever, name='metrics', daemon=True).start()
+        return _server
+
+
+def profiling_panel_enabled(session_state):
+    # PROFILING_PANEL=1 opts in; the panel is only ever shown to admins
+    return os.getenv('PROFILING_PANEL') == '1' and session_state.get('staff_role') == 'admin'
+
+
+def display_profiling_panel(trace, session_bytes=None):
+    import pandas as pd
+    import streamlit as st
+
+    with st.expander('⏱️ Profiling'):
+        sizes = _recorder.size_snapshot()
+        sessions = sizes.get('session_state')
+        if session_bytes is not None and sessions:
+            st.caption(f'Session state: {session_bytes / 1024:.1f} KB in this session, '
+                       f'{sessions["mean"] / 1024:.1f} KB mean and {sessions["max"] / 1024:.1f} KB max '
+                       f'over {sessions["count"]} reruns')
+        if sizes:
+            st.dataframe(pd.DataFrame([
+                {'size': name, 'count': values['count'], 'mean KB': round(values['mean'] / 1024, 2),
+                 'p95 KB': round(values['p95'] / 1024, 2), 'max KB': round(values['max'] / 1024, 2)}
+                for name, values in sizes.items()
+            ]), hide_index=True, use_container_width=True)
+        st.caption('This rerun')
+        if trace:
+            st.dataframe(pd.DataFrame({
+                'span': ['\u2003' * depth + name for _, depth, name, _ in trace],
+                'start ms': [round(offset * 1000, 2) for offset, _, _, _ in trace],
+                'ms': [round(elapsed * 1000, 2) for _, _, _, elapsed in trace]
+            }), hide_index=True, use_container_width=True)
+        else:
+            st.write('No spans recorded.')
+
+        st.caption(f'All sessions since {time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(_recorder.started))}')
+        snapshot = _recorder.snapshot()
+        st.dataframe(pd.DataFrame([
+            {'span': name, 'count': values['count'], 'mean ms': round(values['mean'] * 1000, 2),
+             'p50 ms': round(values['p50'] * 1000, 2), 'p95 ms': round(values['p95'] * 1000, 2),
+             'max ms': round(values['max'] * 1000, 2), 'total s': round(values['sum'], 3)}
+            for name, values in snapshot.items()
+        ]), hide_index=True, use_container_width=True)
+
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button('Download JSON', _recorder.to_json(), 'metrics.json', 'application/json')
+        with col2:
+            st.download_button('Download Prometheus', _recorder.to_prometheus(), 'metrics.prom', 'text/plain')
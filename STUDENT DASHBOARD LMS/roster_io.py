@@ -0,0 +1,270 @@
+import sys
+import time
+import numpy as np
+import pandas as pd
+from attendance_log import get_attendance_log
+from data_store import StudentDataStore, get_store
+from storage import CSV_PATH, STUDENT_COLUMNS, STUDENT_DTYPES, make_storage
+
+# Streaming import/export of the roster, and the command line for moving
+# rosters between files and storage backends. Import files are read and
+# validated one chunk at a time, and the valid rows are applied in a single
+# upsert through the data store, which holds the whole roster like the app
+# does: an import needs memory for the roster plus the valid rows of the
+# file. Exports stream the roster one chunk at a time.
+
+CHUNK_ROWS = 100000
+FORMATS = ['csv', 'jsonl']
+
+# (low, high) bounds per numeric column; None means unbounded
+VALUE_RANGES = {
+    'student_id': (100000, 999999),
+    'attendance_percentage': (0, 100),
+    'test1_score': (0, 100),
+    'test2_score': (0, 100),
+    'test3_score': (0, 100),
+    'assignments_completed': (0, None),
+    'total_classes': (0, None),
+    'classes_attended': (0, None),
+    'gpa': (0, 4),
+    'semester': (1, 12),
+    'batch_year': (1990, 2100)
+}
+TEXT_COLUMNS = [column for column in STUDENT_COLUMNS if column not in VALUE_RANGES]
+
+
+def detect_format(path, fmt=None):
+    if fmt:
+        return fmt
+    return 'jsonl' if path.endswith(('.jsonl', '.ndjson', '.json')) else 'csv'
+
+
+def read_chunks(path, fmt=None, chunk_size=CHUNK_ROWS):
+    # Raw chunks of an import file. Columns are parsed as they come: clean
+    # numeric columns arrive as numbers straight from the parser and only
+    # columns holding something else are coerced during validation.
+    if detect_format(path, fmt) == 'jsonl':
+        yield from pd.read_json(path, lines=True, chunksize=chunk_size, dtype=False)
+    else:
+        yield from pd.read_csv(path, keep_default_na=False, chunksize=chunk_size)
+
+
+def validate_chunk(chunk):
+    # (valid rows typed like STUDENT_DTYPES, rejected rows with an 'error' column)
+    missing = [column for column in STUDENT_COLUMNS if column not in chunk.columns]
+    if missing:
+        raise ValueError(f'Missing columns: {", ".join(missing)}')
+    chunk = chunk[STUDENT_COLUMNS].reset_index(drop=True)
+    # (failed mask, message) per check; messages are only built for rows that fail
+    checks = []
+
+    text = {column: chunk[column].fillna('').astype(str) for column in TEXT_COLUMNS}
+    for column, values in text.items():
+        checks.append(((values == '').to_numpy(), f'{column} is empty'))
+    email = text['email']
+    checks.append(((email != '').to_numpy() & ~email.str.contains('@', regex=False).to_numpy(),
+                   'email is not an address'))
+
+    numbers = {}
+    for column, (low, high) in VALUE_RANGES.items():
+        values = chunk[column]
+        if not pd.api.types.is_numeric_dtype(values) or pd.api.types.is_bool_dtype(values):
+            values = pd.to_numeric(values.astype(str).str.strip(), errors='coerce')
+        values = numbers[column] = values.to_numpy(dtype=float)
+        checks.append((np.isnan(values), f'{column} is not a number'))
+        if STUDENT_DTYPES[column].startswith('int'):
+            checks.append((np.isfinite(values) & (values != np.floor(values)), f'{column} is not a whole number'))
+        if low is not None:
+            checks.append((values < low, f'{column} is below {low}'))
+        if high is not None:
+            checks.append((values > high, f'{column} is above {high}'))
+    checks.append((numbers['classes_attended'] > numbers['total_classes'],
+                   'classes_attended exceeds total_classes'))
+
+    bad = np.logical_or.reduce([mask for mask, _ in checks])
+    valid = pd.DataFrame({**{column: text[column][~bad] for column in TEXT_COLUMNS},
+                          **{column: numbers[column][~bad] for column in VALUE_RANGES}})[STUDENT_COLUMNS]
+    errors = [[] for _ in range(int(bad.sum()))]
+    for mask, message in checks:
+        for i in np.flatnonzero(mask[bad]):
+            errors[i].append(message)
+    rejected = chunk[bad].assign(error=['; '.join(messages) for messages in errors])
+    return valid.astype(STUDENT_DTYPES), rejected
+
+
+class _RejectWriter:
+    def __init__(self, path):
+        self.path = path
+        self.rows = 0
+        self._file = None
+
+    def write(self, rejected):
+        if self.path is None or not len(rejected):
+            self.rows += len(rejected)
+            return
+        if self._file is None:
+            self._file = open(self.path, 'w', newline='')
+            rejected.head(0).to_csv(self._file, index=False)
+        rejected.to_csv(self._file, index=False, header=False)
+        self.rows += len(rejected)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+
+def attendance_changed(store, rows):
+    # IDs of the rows whose class counts differ from the roster's, new
+    # students included: their counts come from a newer source and already
+    # include the classes in the attendance log
+    rows = rows.drop_duplicates('student_id', keep='last').set_index('student_id')
+    store.get_dataframe()
+    current = store.get_students(rows.index).set_index('student_id')
+    counts = ['total_classes', 'classes_attended']
+    current = current[counts].reindex(rows.index)
+    changed = (rows[counts] != current).any(axis=1)
+    return rows.index[changed.to_numpy()]
+
+
+def import_roster(path, store=None, fmt=None, chunk_size=CHUNK_ROWS, rejects_path=None, dry_run=False, log=None):
+    # Validates an import file chunk by chunk, then upserts all valid rows
+    # at once through the data store, which writes them to the backend in
+    # one pass and keeps its loaded roster and aggregates current. One
+    # upsert per chunk would copy the roster and rewrite the backend for
+    # every chunk. Students whose class counts changed are reconciled with
+    # the attendance log, so logged classes are not counted twice.
+    store = store or get_store()
+    rejects = _RejectWriter(rejects_path)
+    start = time.perf_counter()
+    rows = imported = 0
+    valid_chunks = []
+    try:
+        for chunk in read_chunks(path, fmt, chunk_size):
+            valid, rejected = validate_chunk(chunk)
+            rows += len(chunk)
+            rejects.write(rejected)
+            imported += len(valid)
+            if len(valid) and not dry_run:
+                valid_chunks.append(valid)
+    finally:
+        rejects.close()
+    if valid_chunks:
+        valid = pd.concat(valid_chunks, ignore_index=True)
+        changed = attendance_changed(store, valid)
+        store.upsert(valid)
+        if len(changed):
+            if log is None:
+                log = get_attendance_log()
+            log.reconcile(changed)
+    elapsed = time.perf_counter() - start
+    return {'rows': rows, 'imported': imported, 'rejected': rejects.rows, 'seconds': elapsed,
+            'rows_per_second': rows / elapsed if elapsed else 0.0}
+
+
+def filter_chunk(chunk, filters):
+    # filters maps column -> value, list of values, or (low, high) range
+    mask = np.ones(len(chunk), dtype=bool)
+    for column, value in filters.items():
+        values = chunk[column]
+        if isinstance(value, tuple):
+            low, high = value
+            if low is not None:
+                mask &= (values >= low).to_numpy()
+            if high is not None:
+                mask &= (values <= high).to_numpy()
+        elif isinstance(value, (list, set)):
+            mask &= values.astype(object).isin(list(value)).to_numpy()
+        else:
+            mask &= (values.astype(object) == value).to_numpy()
+    return chunk[mask]
+
+
+def export_roster(out, storage=None, fmt='csv', filters=None, columns=None, chunk_size=CHUNK_ROWS):
+    # Writes the (filtered) roster to an open text file, one chunk at a time
+    filter_columns = list(filters or {})
+    read_columns = None if columns is None else list(dict.fromkeys(list(columns) + filter_columns))
+    rows = 0
+    header = True
+    storage = storage or make_storage()
+    for chunk in storage.iter_chunks(read_columns, chunk_size):
+        if filters:
+            chunk = filter_chunk(chunk, filters)
+        if columns is not None:
+            chunk = chunk[list(columns)]
+        if fmt == 'jsonl':
+            if len(chunk):
+                out.write(chunk.to_json(orient='records', lines=True).rstrip('\n') + '\n')
+        else:
+            chunk.to_csv(out, index=False, header=header)
+            header = False
+        rows += len(chunk)
+    return rows
+
+
+def _parse_filter(text):
+    # column=value, column=a,b,c or column=low..high (either end optional)
+    column, _, value = text.partition('=')
+    if column not in STUDENT_DTYPES or not _:
+        raise ValueError(f'Bad filter: {text}')
+    numeric = STUDENT_DTYPES[column].startswith(('int', 'float'))
+    cast = (lambda v: float(v)) if numeric else (lambda v: v)
+    if '..' in value:
+        low, high = value.split('..', 1)
+        return column, (cast(low) if low else None, cast(high) if high else None)
+    if ',' in value:
+        return column, [cast(v) for v in value.split(',')]
+    return column, cast(value)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Import, export or convert the student roster')
+    parser.add_argument('--backend', help='Storage backend (default: STUDENT_DATA_BACKEND or csv)')
+    parser.add_argument('--csv', default=CSV_PATH, help='Roster CSV behind the backend')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_ROWS)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    import_parser = commands.add_parser('import', help='Validate and upsert a CSV or JSONL roster')
+    import_parser.add_argument('path')
+    import_parser.add_argument('--format', choices=FORMATS)
+    import_parser.add_argument('--rejects', help='Write rejected rows and their errors to this CSV')
+    import_parser.add_argument('--dry-run', action='store_true', help='Validate only')
+
+    export_parser = commands.add_parser('export', help='Stream the roster, or a filtered subset, as CSV or JSONL')
+    export_parser.add_argument('--output', default='-', help='Destination file (default: stdout)')
+    export_parser.add_argument('--format', choices=FORMATS, default='csv')
+    export_parser.add_argument('--filter', action='append', default=[], metavar='COLUMN=VALUE',
+                               help='column=value, column=a,b or column=low..high; repeatable')
+    export_parser.add_argument('--columns', help='Comma-separated columns to write')
+    commands.add_parser('convert', help='Rebuild the columnar copy of the CSV (feather, parquet or npy)')
+    args = parser.parse_args()
+
+    storage = make_storage(args.backend, args.csv)
+    if args.command == 'convert':
+        if not hasattr(storage, 'convert'):
+            parser.error(f'the {storage.name} backend has no columnar copy to convert')
+        rows = len(storage.convert())
+        print(f'Converted {rows} rows to {storage.path}', file=sys.stderr)
+    elif args.command == 'import':
+        stats = import_roster(args.path, StudentDataStore(args.csv, storage), args.format, args.chunk_size, args.rejects, args.dry_run)
+        verb = 'Validated' if args.dry_run else 'Imported'
+        print(f'{verb} {stats["imported"]} of {stats["rows"]} rows ({stats["rejected"]} rejected) '
+              f'in {stats["seconds"]:.1f}s, {stats["rows_per_second"]:,.0f} rows/s', file=sys.stderr)
+    else:
+        try:
+            filters = dict(_parse_filter(text) for text in args.filter)
+        except ValueError as e:
+            parser.error(str(e))
+        columns = args.columns.split(',') if args.columns else None
+        if args.output == '-':
+            try:
+                rows = export_roster(sys.stdout, storage, args.format, filters, columns, args.chunk_size)
+            except BrokenPipeError:
+                # Reader went away (e.g. piped into head)
+                sys.stderr.close()
+                sys.exit(0)
+        else:
+            with open(args.output, 'w', newline='') as f:
+                rows = export_roster(f, storage, args.format, filters, columns, args.chunk_size)
+        print(f'Exported {rows} rows', file=sys.stderr)
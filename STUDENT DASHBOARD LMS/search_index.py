@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+from data_store import get_store
+
+GRAM_SIZE = 3
+BUILD_CHUNK_ROWS = 100000
+# Joins name and ID; it never appears in a query, so no match can span both
+FIELD_SEPARATOR = '\x01'
+
+
+def _gram_keys(codes):
+    # Pack every run of three code points (21 bits each) into one int64
+    keys = (codes[:, :-2] << 42) | (codes[:, 1:-1] << 21) | codes[:, 2:]
+    valid = (codes[:, :-2] != 0) & (codes[:, 1:-1] != 0) & (codes[:, 2:] != 0)
+    return keys, valid
+
+
+def _encode(texts):
+    width = max(max((len(text) for text in texts), default=0), GRAM_SIZE)
+    array = np.array(texts, dtype=f'<U{width}')
+    return array.view(np.uint32).reshape(len(texts), width).astype(np.int64)
+
+
+class SearchIndex:
+    # Trigram index over lowercased names and stringified student IDs for the
+    # Student Details search. Queries of three or more characters intersect the
+    # posting lists of their trigrams and only check the surviving candidates.
+    def __init__(self, names, student_ids):
+        self._texts = [f'{str(name).lower()}{FIELD_SEPARATOR}{student_id}'
+                       for name, student_id in zip(names, student_ids)]
+        self._text_series = None
+
+        all_keys, all_rows = [], []
+        for start in range(0, len(self._texts), BUILD_CHUNK_ROWS):
+            codes = _encode(self._texts[start:start + BUILD_CHUNK_ROWS])
+            if codes.shape[1] < GRAM_SIZE:
+                continue
+            keys, valid = _gram_keys(codes)
+            rows = np.broadcast_to(np.arange(start, start + len(codes), dtype=np.int32)[:, None], keys.shape)
+            all_keys.append(keys[valid])
+            all_rows.append(rows[valid])
+
+        keys = np.concatenate(all_keys) if all_keys else np.empty(0, dtype=np.int64)
+        rows = np.concatenate(all_rows) if all_rows else np.empty(0, dtype=np.int32)
+        order = np.lexsort((rows, keys))
+        keys, rows = keys[order], rows[order]
+        # Drop repeated (trigram, row) pairs, e.g. 'ana' twice in one name
+        distinct = np.ones(len(keys), dtype=bool)
+        distinct[1:] = (keys[1:] != keys[:-1]) | (rows[1:] != rows[:-1])
+        keys, rows = keys[distinct], rows[distinct]
+
+        self._grams, starts = np.unique(keys, return_index=True)
+        self._offsets = np.append(starts, len(keys))
+        self._postings = rows
+
+    @classmethod
+    def from_frame(cls, df):
+        return cls(df['name'], df['student_id'])
+
+    def __len__(self):
+        return len(self._texts)
+
+    def _posting(self, key):
+        slot = np.searchsorted(self._grams, key)
+        if slot == len(self._grams) or self._grams[slot] != key:
+            return self._postings[:0]
+        return self._postings[self._offsets[slot]:self._offsets[slot + 1]]
+
+    def search(self, query):
+        # Sorted row positions whose name (case-insensitive) or ID contains query
+        query = query.lower()
+        if FIELD_SEPARATOR in query:
+            return np.empty(0, dtype=np.int64)
+        if not query:
+            return np.arange(len(self._texts))
+        if len(query) < GRAM_SIZE:
+            # Too short for the trigram index; such queries match a large share
+            # of the roster anyway, so scan the prepared text column
+            if self._text_series is None:
+                self._text_series = pd.Series(self._texts)
+            return np.flatnonzero(self._text_series.str.contains(query, regex=False).to_numpy())
+
+        keys, _ = _gram_keys(_encode([query]))
+        postings = sorted((self._posting(key) for key in np.unique(keys)), key=len)
+        candidates = postings[0]
+        for posting in postings[1:]:
+            if len(candidates) == 0:
+                break
+            candidates = np.intersect1d(candidates, posting, assume_unique=True)
+        if len(query) == GRAM_SIZE:
+            return candidates.astype(np.int64)
+        texts = self._texts
+        return np.array([row for row in candidates.tolist() if query in texts[row]], dtype=np.int64)
+
+
+def get_search_index():
+    return get_store().derived('search_index', SearchIndex.from_frame)
+
+
+def search_snapshot():
+    # Roster frame together with the search index built from it
+    return get_store().derived_with_frame('search_index', SearchIndex.from_frame)
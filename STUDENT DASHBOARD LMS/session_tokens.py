@@ -0,0 +1,188 @@
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from instrumentation import register_exporter
+
+# Stateless, HMAC-signed session tokens for "Keep me signed in". A token
+# carries everything needed to restore a student session (ID, name,
+# expiry), so validating one touches neither the dataset nor the
+# credential store. Revoked token IDs are kept in a small SQLite database
+# shared by every server process, and only until they would have expired
+# anyway.
+
+SESSION_TOKEN_TTL = int(os.getenv('SESSION_TOKEN_TTL', 7 * 24 * 3600))
+REVOCATIONS_PATH = os.getenv('SESSION_REVOCATIONS_PATH', 'data/session_tokens.sqlite')
+TOKEN_VERSION = 1
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+class RevocationStore:
+    # Token ID -> expiry in SQLite, so a token revoked on logout stays
+    # revoked after a restart and on every other worker. Each thread uses
+    # its own connection; WAL mode keeps lookups from blocking on a revoke.
+    def __init__(self, path=REVOCATIONS_PATH):
+        self.path = path
+        self._local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=5)
+            connection.executescript("""
+                PRAGMA journal_mode = WAL;
+                CREATE TABLE IF NOT EXISTS revoked (jti TEXT PRIMARY KEY, exp INTEGER NOT NULL);
+            """)
+            self._local.connection = connection
+        return connection
+
+    def is_revoked(self, jti):
+        row = self._connection().execute('SELECT 1 FROM revoked WHERE jti = ?', (jti,)).fetchone()
+        return row is not None
+
+    def add(self, jti, exp, now):
+        # Also forgets revocations of tokens that have expired since
+        with self._connection() as connection:
+            connection.execute('DELETE FROM revoked WHERE exp <= ?', (now,))
+            connection.execute('INSERT OR REPLACE INTO revoked VALUES (?, ?)', (jti, exp))
+
+    def count(self, now):
+        return self._connection().execute('SELECT COUNT(*) FROM revoked WHERE exp > ?', (now,)).fetchone()[0]
+
+
+class SessionTokenSigner:
+    # Without SESSION_TOKEN_SECRET a random key is used, so tokens stop
+    # validating when the process restarts
+    def __init__(self, secret=None, ttl=SESSION_TOKEN_TTL, clock=time.time, revocations=None):
+        secret = secret or os.getenv('SESSION_TOKEN_SECRET')
+        self._key = secret.encode('utf-8') if secret else secrets.token_bytes(32)
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._revoked = revocations if revocations is not None else RevocationStore()
+        self._metrics = {'issued': 0, 'validated': 0, 'validation_seconds': 0.0,
+                         'max_validation_seconds': 0.0, 'rejected': {}}
+
+    def _sign(self, body):
+        return hmac.new(self._key, body.encode('ascii'), hashlib.sha256).digest()
+
+    def issue(self, subject, claims=None, ttl=None):
+        now = int(self._clock())
+        payload = dict(claims or {}, v=TOKEN_VERSION, sub=subject, iat=now,
+                       exp=now + (ttl or self.ttl), jti=secrets.token_hex(8))
+        body = _b64encode(json.dumps(payload, separators=(',', ':')).encode('utf-8'))
+        with self._lock:
+            self._metrics['issued'] += 1
+        return f'{body}.{_b64encode(self._sign(body))}'
+
+    def _check(self, token):
+        # (payload, None) for a valid token, else (None, reason)
+        # Tokens arrive from the URL, so anything can be in them; non-ASCII
+        # text fails the encode in _sign with a UnicodeError
+        try:
+            body, signature = token.split('.')
+            signature = _b64decode(signature)
+            expected = self._sign(body)
+        except (AttributeError, ValueError):
+            return None, 'malformed'
+        if not hmac.compare_digest(signature, expected):
+            return None, 'bad_signature'
+        try:
+            payload = json.loads(_b64decode(body))
+        except ValueError:
+            return None, 'malformed'
+        if payload.get('v') != TOKEN_VERSION:
+            return None, 'malformed'
+        now = self._clock()
+        if payload['exp'] <= now:
+            return None, 'expired'
+        if self._revoked.is_revoked(payload['jti']):
+            return None, 'revoked'
+        return payload, None
+
+    def validate(self, token):
+        # Payload of a valid token, or None
+        start = time.perf_counter()
+        payload, reason = self._check(token)
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            metrics = self._metrics
+            metrics['validated'] += 1
+            metrics['validation_seconds'] += elapsed
+            metrics['max_validation_seconds'] = max(metrics['max_validation_seconds'], elapsed)
+            if reason:
+                metrics['rejected'][reason] = metrics['rejected'].get(reason, 0) + 1
+        return payload
+
+    def revoke(self, token):
+        payload, _ = self._check(token)
+        if payload is None:
+            return False
+        self._revoked.add(payload['jti'], payload['exp'], int(self._clock()))
+        return True
+
+    def metrics(self):
+        with self._lock:
+            metrics = dict(self._metrics, rejected=dict(self._metrics['rejected']))
+        metrics['revoked_tokens'] = self._revoked.count(int(self._clock()))
+        validated = metrics['validated']
+        metrics['mean_validation_seconds'] = metrics['validation_seconds'] / validated if validated else 0.0
+        return metrics
+
+
+_signer = None
+_signer_lock = threading.Lock()
+
+
+def get_token_signer():
+    global _signer
+    with _signer_lock:
+        if _signer is None:
+            _signer = SessionTokenSigner()
+        return _signer
+
+
+def token_metrics():
+    return get_token_signer().metrics()
+
+
+def token_prometheus():
+    # token_metrics() in the Prometheus text format, for /metrics
+    metrics = token_metrics()
+    lines = ['# HELP lms_session_tokens_issued_total Session tokens issued.',
+             '# TYPE lms_session_tokens_issued_total counter',
+             f'lms_session_tokens_issued_total {metrics["issued"]}',
+             '# HELP lms_session_tokens_validated_total Session tokens validated, by result.',
+             '# TYPE lms_session_tokens_validated_total counter',
+             f'lms_session_tokens_validated_total{{result="valid"}} '
+             f'{metrics["validated"] - sum(metrics["rejected"].values())}']
+    lines += [f'lms_session_tokens_validated_total{{result="{reason}"}} {count}'
+              for reason, count in metrics['rejected'].items()]
+    lines += ['# HELP lms_session_token_validation_seconds_sum Time spent validating session tokens.',
+              '# TYPE lms_session_token_validation_seconds_sum counter',
+              f'lms_session_token_validation_seconds_sum {metrics["validation_seconds"]!r}',
+              '# HELP lms_session_token_validation_seconds_max Slowest session token validation since start.',
+              '# TYPE lms_session_token_validation_seconds_max gauge',
+              f'lms_session_token_validation_seconds_max {metrics["max_validation_seconds"]!r}',
+              '# HELP lms_session_tokens_revoked Revoked session tokens that have not expired yet.',
+              '# TYPE lms_session_tokens_revoked gauge',
+              f'lms_session_tokens_revoked {metrics["revoked_tokens"]}']
+    return '\n'.join(lines) + '\n'
+
+
+register_exporter('session_tokens', token_prometheus, token_metrics)
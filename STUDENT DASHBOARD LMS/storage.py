@@ -0,0 +1,393 @@
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import numpy as np
+import pandas as pd
+
+# STUDENT_DATA_PATH points the app at another roster, e.g. a synthetic one
+CSV_PATH = os.getenv('STUDENT_DATA_PATH', 'data/student_data.csv')
+IMPORT_BATCH_ROWS = 5000
+# Rows per chunk when a CSV roster is rewritten by an upsert
+REWRITE_CHUNK_ROWS = 100000
+
+# Explicit column types so every worker parses the roster the same way
+STUDENT_DTYPES = {
+    'student_id': 'int64',
+    'name': 'object',
+    'email': 'object',
+    'course': 'category',
+    'attendance_percentage': 'float64',
+    'test1_score': 'int32',
+    'test2_score': 'int32',
+    'test3_score': 'int32',
+    'assignments_completed': 'int32',
+    'total_classes': 'int32',
+    'classes_attended': 'int32',
+    'gpa': 'float64',
+    'extracurricular_activities': 'category',
+    'specialization': 'category',
+    'semester': 'int16',
+    'batch_year': 'int16'
+}
+STUDENT_COLUMNS = list(STUDENT_DTYPES)
+
+
+def _stat_signature(path):
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+class RosterChanged(RuntimeError):
+    # The roster was written by someone else since the caller loaded it;
+    # nothing was written, reload and retry
+    pass
+
+
+def read_student_csv(path, columns=None):
+    return pd.read_csv(path, usecols=columns,
+                       dtype={c: STUDENT_DTYPES[c] for c in columns or STUDENT_COLUMNS})
+
+
+class CsvStorage:
+    name = 'csv'
+
+    def __init__(self, csv_path=CSV_PATH):
+        self.csv_path = csv_path
+
+    def signature(self):
+        return _stat_signature(self.csv_path)
+
+    def load(self, columns=None):
+        return read_student_csv(self.csv_path, columns)
+
+    def iter_chunks(self, columns=None, chunk_size=IMPORT_BATCH_ROWS):
+        # The roster in row order, chunk_size rows at a time. The columnar
+        # backends are copies of the CSV, so they stream the CSV too.
+        return pd.read_csv(self.csv_path, usecols=columns, chunksize=chunk_size,
+                           dtype={c: STUDENT_DTYPES[c] for c in columns or STUDENT_COLUMNS})
+
+    def upsert(self, df, expected_signature=None):
+        # Rewrites the CSV in one streaming pass: students already in the
+        # file are replaced where they stand, new ones are appended in the
+        # order given. Nothing is written unless the CSV is still at
+        # expected_signature (when given). Returns the new signature.
+        if expected_signature is not None and self.signature() != expected_signature:
+            raise RosterChanged(f'{self.csv_path} changed since it was loaded')
+        df = df[STUDENT_COLUMNS].drop_duplicates('student_id', keep='last')
+        incoming = pd.Index(df['student_id'].to_numpy(dtype=np.int64))
+        replaced = np.zeros(len(df), dtype=bool)
+        tmp_path = f'{self.csv_path}.tmp-{os.getpid()}'
+        with open(tmp_path, 'w', newline='') as f:
+            pd.DataFrame(columns=STUDENT_COLUMNS).to_csv(f, index=False)
+            for chunk in self.iter_chunks(chunk_size=REWRITE_CHUNK_ROWS):
+                positions = incoming.get_indexer(chunk['student_id'].to_numpy(dtype=np.int64))
+                hits = positions >= 0
+                if hits.any():
+                    chunk = chunk.astype(object)
+                    chunk.iloc[hits] = df.iloc[positions[hits]].astype(object).to_numpy()
+                    replaced[positions[hits]] = True
+                chunk.to_csv(f, index=False, header=False)
+            df[~replaced].to_csv(f, index=False, header=False)
+        os.replace(tmp_path, self.csv_path)
+        return self.signature()
+
+
+class _BinaryStorage(CsvStorage):
+    # Columnar copy of the CSV. The CSV stays the import/export format; the
+    # binary file is rebuilt once whenever the CSV changes and is memory-mapped
+    # on every load after that.
+    suffix = None
+
+    def __init__(self, csv_path=CSV_PATH, path=None):
+        super().__init__(csv_path)
+        self.path = path or os.path.splitext(csv_path)[0] + self.suffix
+        self.manifest_path = self.path + '.json'
+
+    def _read_manifest(self):
+        try:
+            with open(self.manifest_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_manifest(self, manifest):
+        tmp_path = f'{self.manifest_path}.tmp-{os.getpid()}'
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, self.manifest_path)
+
+    def is_current(self):
+        manifest = self._read_manifest()
+        return (manifest is not None and os.path.exists(self.path)
+                and tuple(manifest['source_signature']) == self.signature())
+
+    def convert(self):
+        source_signature = self.signature()
+        df = read_student_csv(self.csv_path)
+        self._write(df)
+        self._write_manifest({'source_signature': list(source_signature),
+                              'format': self.name, 'rows': len(df)})
+        return df
+
+    def load(self, columns=None):
+        if not self.is_current():
+            df = self.convert()
+            return df if columns is None else df[columns]
+        return self._read(columns)
+
+
+class FeatherStorage(_BinaryStorage):
+    name = 'feather'
+    suffix = '.feather'
+
+    def _write(self, df):
+        import pyarrow.feather as feather
+        tmp_path = f'{self.path}.tmp-{os.getpid()}'
+        # Uncompressed so the file can be memory-mapped without decoding
+        feather.write_feather(df, tmp_path, compression='uncompressed')
+        os.replace(tmp_path, self.path)
+
+    def _read(self, columns=None):
+        import pyarrow.feather as feather
+        table = feather.read_table(self.path, columns=columns, memory_map=True)
+        return table.to_pandas(split_blocks=True, self_destruct=True)
+
+
+class ParquetStorage(_BinaryStorage):
+    name = 'parquet'
+    suffix = '.parquet'
+
+    def _write(self, df):
+        tmp_path = f'{self.path}.tmp-{os.getpid()}'
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, self.path)
+
+    def _read(self, columns=None):
+        import pyarrow.parquet as pq
+        table = pq.read_table(self.path, columns=columns, memory_map=True)
+        return table.to_pandas(split_blocks=True, self_destruct=True)
+
+
+class NpyStorage(_BinaryStorage):
+    # One .npy file per column. Numeric columns load as read-only memory maps;
+    # categorical columns are stored as integer codes plus a category list.
+    name = 'npy'
+    suffix = '_npy'
+
+    def __init__(self, csv_path=CSV_PATH, path=None):
+        super().__init__(csv_path, path)
+        self.manifest_path = os.path.join(self.path, 'manifest.json')
+
+    def _write(self, df):
+        tmp_dir = f'{self.path}.tmp-{os.getpid()}'
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        for column in df.columns:
+            values = df[column]
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                np.save(os.path.join(tmp_dir, f'{column}.npy'), values.cat.codes.to_numpy())
+                with open(os.path.join(tmp_dir, f'{column}.categories.json'), 'w') as f:
+                    json.dump(values.cat.categories.tolist(), f)
+            elif values.dtype == object:
+                np.save(os.path.join(tmp_dir, f'{column}.npy'), values.to_numpy(dtype=str))
+            else:
+                np.save(os.path.join(tmp_dir, f'{column}.npy'), values.to_numpy())
+
+        old_dir = f'{self.path}.old-{os.getpid()}'
+        if os.path.exists(self.path):
+            os.replace(self.path, old_dir)
+        os.replace(tmp_dir, self.path)
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+    def _read(self, columns=None):
+        data = {}
+        for column in columns or STUDENT_COLUMNS:
+            values = np.load(os.path.join(self.path, f'{column}.npy'), mmap_mode='r')
+            categories_path = os.path.join(self.path, f'{column}.categories.json')
+            if os.path.exists(categories_path):
+                with open(categories_path) as f:
+                    values = pd.Categorical.from_codes(values, json.load(f))
+            elif values.dtype.kind == 'U':
+                values = values.astype(object)
+            data[column] = values
+        return pd.DataFrame(data, copy=False)
+
+
+_SQL_TYPES = {'int64': 'INTEGER', 'int32': 'INTEGER', 'int16': 'INTEGER',
+              'float64': 'REAL', 'object': 'TEXT', 'category': 'TEXT'}
+# Inserts new students and updates existing ones in place
+_UPSERT_SQL = (f'INSERT INTO students ({", ".join(STUDENT_COLUMNS)}) '
+               f'VALUES ({", ".join("?" * len(STUDENT_COLUMNS))}) '
+               'ON CONFLICT(student_id) DO UPDATE SET '
+               + ', '.join(f'{column} = excluded.{column}' for column in STUDENT_COLUMNS[1:]))
+
+
+def _records(df):
+    # Plain Python values row by row, as sqlite3 expects
+    return df.astype(object).itertuples(index=False, name=None)
+
+
+class SqliteStorage:
+    # Roster in a SQLite database in WAL mode, so readers never block on a
+    # writer. Unlike the columnar copies the database is the source of truth
+    # and has a write path; the CSV is only imported when the database does
+    # not exist yet. Other programs writing to the database must bump
+    # meta.revision in the same transaction so loaded copies are refreshed.
+    # Each thread reads through its own read-only connection, and every
+    # query is a fixed parameterised statement, so sqlite3's per-connection
+    # statement cache keeps it prepared.
+    name = 'sqlite'
+    suffix = '.sqlite'
+    # Columns that get their own index for filtered queries
+    INDEXED_COLUMNS = ['specialization', 'extracurricular_activities', 'gpa', 'attendance_percentage']
+
+    def __init__(self, csv_path=CSV_PATH, path=None):
+        self.csv_path = csv_path
+        self.path = path or os.path.splitext(csv_path)[0] + self.suffix
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._writer = None
+        self._select_one = f'SELECT {", ".join(STUDENT_COLUMNS)} FROM students WHERE student_id = ?'
+
+    def _create(self, connection):
+        columns = ', '.join(
+            f'{column} {"INTEGER NOT NULL UNIQUE" if column == "student_id" else _SQL_TYPES[STUDENT_DTYPES[column]]}'
+            for column in STUDENT_COLUMNS)
+        connection.executescript(f"""
+            PRAGMA journal_mode = WAL;
+            CREATE TABLE IF NOT EXISTS students ({columns});
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+            INSERT OR IGNORE INTO meta VALUES ('revision', 0);
+            CREATE INDEX IF NOT EXISTS idx_students_section ON students (course, semester, batch_year);
+            {''.join(f'CREATE INDEX IF NOT EXISTS idx_students_{column} ON students ({column});'
+                     for column in self.INDEXED_COLUMNS)}
+        """)
+        connection.commit()
+
+    def _write_rows(self, connection, df):
+        # Caller commits; every write transaction bumps the revision that
+        # signature() reports, so other processes notice the change
+        connection.executemany(_UPSERT_SQL, _records(df[STUDENT_COLUMNS]))
+        connection.execute("UPDATE meta SET value = value + 1 WHERE key = 'revision'")
+
+    def _write_connection(self):
+        # Caller holds _write_lock. A new database is filled from the CSV.
+        if self._writer is None:
+            exists = os.path.exists(self.path)
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            connection.execute('PRAGMA synchronous = NORMAL')
+            self._create(connection)
+            self._writer = connection
+            if not exists:
+                self._import_csv(connection, self.csv_path)
+        return self._writer
+
+    def _reader(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            if not os.path.exists(self.path):
+                with self._write_lock:
+                    self._write_connection()
+            connection = sqlite3.connect(f'file:{self.path}?mode=ro', uri=True, cached_statements=64)
+            self._local.connection = connection
+        return connection
+
+    def _revision(self, connection):
+        return connection.execute("SELECT value FROM meta WHERE key = 'revision'").fetchone()[0]
+
+    def signature(self):
+        return ('sqlite', self._revision(self._reader()))
+
+    def _frame(self, cursor, columns):
+        df = pd.DataFrame.from_records(cursor.fetchall(), columns=columns)
+        return df.astype({column: STUDENT_DTYPES[column] for column in columns})
+
+    def load(self, columns=None):
+        columns = columns or STUDENT_COLUMNS
+        cursor = self._reader().execute(f'SELECT {", ".join(columns)} FROM students ORDER BY rowid')
+        return self._frame(cursor, columns)
+
+    def iter_chunks(self, columns=None, chunk_size=IMPORT_BATCH_ROWS):
+        columns = columns or STUDENT_COLUMNS
+        cursor = self._reader().execute(f'SELECT {", ".join(columns)} FROM students ORDER BY rowid')
+        while True:
+            records = cursor.fetchmany(chunk_size)
+            if not records:
+                return
+            yield pd.DataFrame.from_records(records, columns=columns).astype(
+                {column: STUDENT_DTYPES[column] for column in columns})
+
+    def fetch_student(self, student_id):
+        # One student as a Series, or None
+        row = self._reader().execute(self._select_one, (int(student_id),)).fetchone()
+        return None if row is None else pd.Series(dict(zip(STUDENT_COLUMNS, row)))
+
+    def query(self, filters=None, columns=None, limit=None):
+        # filters maps column -> value or list of values; gpa/attendance can
+        # also take a (low, high) range as a tuple
+        columns = columns or STUDENT_COLUMNS
+        clauses, params = [], []
+        for column, value in sorted((filters or {}).items()):
+            if column not in STUDENT_DTYPES:
+                raise ValueError(f'Unknown column: {column}')
+            if isinstance(value, tuple):
+                clauses.append(f'{column} BETWEEN ? AND ?')
+                params.extend(value)
+            elif isinstance(value, (list, set)):
+                values = sorted(value)
+                clauses.append(f'{column} IN ({", ".join("?" * len(values))})')
+                params.extend(values)
+            else:
+                clauses.append(f'{column} = ?')
+                params.append(value)
+        sql = f'SELECT {", ".join(columns)} FROM students'
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        sql += ' ORDER BY rowid'
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params.append(int(limit))
+        return self._frame(self._reader().execute(sql, params), columns)
+
+    def _import_csv(self, connection, csv_path, batch_size=IMPORT_BATCH_ROWS):
+        # Streams the CSV in batches; existing students are updated in place
+        rows = 0
+        with connection:
+            for chunk in pd.read_csv(csv_path, dtype=STUDENT_DTYPES, chunksize=batch_size):
+                self._write_rows(connection, chunk)
+                rows += len(chunk)
+        return rows
+
+    def upsert(self, df, expected_signature=None):
+        # Writes rows in one transaction and returns the new signature.
+        # With expected_signature, the transaction is rolled back before
+        # any write if another writer got there first.
+        with self._write_lock:
+            connection = self._write_connection()
+            with connection:
+                connection.execute('BEGIN IMMEDIATE')
+                before = ('sqlite', self._revision(connection))
+                if expected_signature is not None and before != expected_signature:
+                    raise RosterChanged(f'{self.path} changed since it was loaded')
+                self._write_rows(connection, df)
+            return ('sqlite', self._revision(connection))
+
+
+STORAGE_BACKENDS = {
+    'csv': CsvStorage,
+    'feather': FeatherStorage,
+    'parquet': ParquetStorage,
+    'npy': NpyStorage,
+    'sqlite': SqliteStorage
+}
+
+
+def make_storage(backend=None, csv_path=CSV_PATH):
+    # Backend comes from STUDENT_DATA_BACKEND (csv, feather, parquet, npy or sqlite)
+    backend = (backend or os.getenv('STUDENT_DATA_BACKEND') or 'csv').lower()
+    if backend not in STORAGE_BACKENDS:
+        raise ValueError(f'Unknown storage backend: {backend}')
+    return STORAGE_BACKENDS[backend](csv_path)
+
@@ -1,7 +1,50 @@
 import streamlit as st
 import pandas as pd
-from passlib.hash import pbkdf2_sha256
-from analytics import calculate_subject_strength, generate_recommendations
+from data_store import find_student_record
+from session_tokens import get_token_signer
+from theme import inject_styles, register_styles, render_html
+from instrumentation import timed
+
+# Custom CSS for modern login form with error styling
+register_styles('student_login', """
+<style>
+    .login-form { background-color: white; padding: 2rem; border-radius: 12px; box-shadow: 0 4px 6px rgba(0,0,0,0.1); }
+    .form-header { color: #1f4d7a; font-size: 1.5rem; font-weight: 600; margin-bottom: 1.5rem; }
+    .stButton>button { background-color: #1f4d7a; color: white; font-weight: 500; }
+    .stButton>button:hover { background-color: #173d61; }
+    .help-text { color: #666; font-size: 0.9rem; margin-top: 0.5rem; }
+    .error-text { color: #dc3545; font-size: 0.9rem; margin-top: 0.5rem; }
+    .input-error { border-color: #dc3545 !important; }
+    .stButton>button:disabled { background-color: #ccc; cursor: not-allowed; }
+</style>
+""")
+
+# Dashboard card styles and their dark-theme overrides
+register_styles('student_dashboard', """
+<style>
+    .metric-card { background-color: white; padding: 1rem; border-radius: 10px;
+                  box-shadow: 0 4px 6px rgba(0,0,0,0.1); margin-bottom: 1rem; }
+    .section-title { color: #1f4d7a; font-size: 1.5rem; font-weight: 600; margin: 1.5rem 0; }
+    .info-text { color: #666; font-size: 1rem; }
+</style>
+""")
+register_styles('student_dashboard_dark', """
+<style>
+    .main { background-color: #1a1a1a; color: #ffffff; }
+    .metric-card { background-color: #2d2d2d !important; color: #ffffff !important; border: 1px solid #3d3d3d !important; }
+    .section-title { color: #ffffff !important; }
+    h1, h2, h3, p { color: #ffffff !important; }
+    .stSelectbox { background-color: #2d2d2d; color: #ffffff; }
+    div[data-testid="stPlotlyChart"] { background-color: #2d2d2d !important; border-radius: 10px; padding: 1rem; }
+    div[data-testid="stPlotlyChart"] .main-svg { background-color: #2d2d2d !important; }
+    div[data-testid="stPlotlyChart"] .gridlayer path { stroke: #3d3d3d !important; }
+    div[data-testid="stPlotlyChart"] .xy text { fill: #ffffff !important; }
+    div[data-testid="stPlotlyChart"] .legendtext { fill: #ffffff !important; }
+</style>
+""")
+
+# Query parameter that carries the "Keep me signed in" token across reconnects
+SESSION_QUERY_PARAM = 'session'
 
 def init_student_auth():
     if 'student_authenticated' not in st.session_state:
@@ -9,34 +52,47 @@ def init_student_auth():
     if 'student_id' not in st.session_state:
         st.session_state.student_id = None
 
+def sign_in_student(student_id, name):
+    st.session_state.authenticated = True
+    st.session_state.user_type = 'student'
+    st.session_state.student_authenticated = True
+    st.session_state.student_id = student_id
+    st.session_state.student_name = name
+
+def restore_student_session():
+    # Signs the student back in from a remembered session token; the token
+    # carries the ID and name, so the dataset is not touched
+    if st.session_state.student_authenticated:
+        return False
+    token = st.experimental_get_query_params().get(SESSION_QUERY_PARAM, [None])[0]
+    if not token:
+        return False
+    payload = get_token_signer().validate(token)
+    if payload is None:
+        # Expired, revoked or tampered with: drop it from the URL
+        st.experimental_set_query_params()
+        return False
+    sign_in_student(payload['sub'], payload['name'])
+    st.session_state.remember_student = True
+    st.session_state.session_token = token
+    return True
+
 def student_login_page():
     st.image('assets/UPES.png', width=200)
     st.title('🎓 UPES Student Login')
     
-    # Custom CSS for modern login form with error styling
-    st.markdown("""
-    <style>
-        .login-form { background-color: white; padding: 2rem; border-radius: 12px; box-shadow: 0 4px 6px rgba(0,0,0,0.1); }
-        .form-header { color: #1f4d7a; font-size: 1.5rem; font-weight: 600; margin-bottom: 1.5rem; }
-        .stButton>button { background-color: #1f4d7a; color: white; font-weight: 500; }
-        .stButton>button:hover { background-color: #173d61; }
-        .help-text { color: #666; font-size: 0.9rem; margin-top: 0.5rem; }
-        .error-text { color: #dc3545; font-size: 0.9rem; margin-top: 0.5rem; }
-        .input-error { border-color: #dc3545 !important; }
-        .stButton>button:disabled { background-color: #ccc; cursor: not-allowed; }
-    </style>
-    """, unsafe_allow_html=True)
+    inject_styles('student_login')
     
     with st.form('student_login_form', clear_on_submit=True):
-        st.markdown('<p class="form-header">Welcome Back! 👋</p>', unsafe_allow_html=True)
+        render_html('<p class="form-header">Welcome Back! 👋</p>')
         
         col1, col2 = st.columns(2)
         with col1:
             student_id = st.text_input('Student ID', placeholder='Enter your 6-digit Student ID', max_chars=6)
-            st.markdown('<p class="help-text">Your 6-digit student identification number</p>', unsafe_allow_html=True)
+            render_html('<p class="help-text">Your 6-digit student identification number</p>')
         with col2:
             password = st.text_input('Password', type='password', placeholder='Enter your Student ID as password')
-            st.markdown('<p class="help-text">Use your Student ID as password</p>', unsafe_allow_html=True)
+            render_html('<p class="help-text">Use your Student ID as password</p>')
         
         col3, col4 = st.columns([3, 1])
         with col3:
@@ -53,35 +109,40 @@ def student_login_page():
                 st.error('🚫 Student ID must be a 6-digit number')
                 return
                 
+            from credentials import (LOGIN_BUSY, LOGIN_INVALID, LOGIN_OK, LOGIN_RATE_LIMITED, client_address,
+                                     get_credential_store)
             try:
-                # Load student data
-                df = pd.read_csv('data/student_data.csv')
+                # Rate-limited, constant-time check against the shared roster index
                 student_id_int = int(student_id)
-                student = df[df['student_id'] == student_id_int]
+                result, student = get_credential_store().verify_student(student_id_int, password, client_address())
                 
-                if len(student) > 0:
-                    if password == student_id:
-                        st.session_state.student_authenticated = True
-                        st.session_state.student_id = student_id_int
-                        st.session_state.student_name = student.iloc[0]['name']
-                        if remember_me:
-                            st.session_state.remember_student = True
-                        st.success('🎉 Login successful! Welcome, ' + student.iloc[0]['name'])
-                        st.rerun()
-                    else:
-                        st.error('🔒 Incorrect password. Please use your Student ID as password')
+                if result == LOGIN_OK:
+                    sign_in_student(student_id_int, student['name'])
+                    if remember_me:
+                        st.session_state.remember_student = True
+                        token = get_token_signer().issue(student_id_int, {'name': student['name']})
+                        st.session_state.session_token = token
+                        st.experimental_set_query_params(**{SESSION_QUERY_PARAM: token})
+                    st.success('🎉 Login successful! Welcome, ' + student['name'])
+                    st.rerun()
+                elif result == LOGIN_RATE_LIMITED:
+                    st.error('⏳ Too many login attempts. Please wait a minute and try again')
+                elif result == LOGIN_BUSY:
+                    st.error('⏳ The server is busy. Please try again in a moment')
+                elif result == LOGIN_INVALID:
+                    st.error('🔒 Incorrect password. Please use your Student ID as password')
                 else:
                     st.error('❌ Student ID not found. Please check your ID')
             except Exception as e:
                 st.error('⚠️ An error occurred. Please try again later')
                 
     # Help links with improved styling
-    st.markdown("""
+    render_html("""
     <div style='display: flex; justify-content: space-between; margin-top: 1rem;'>
         <a href='#' style='color: #1f4d7a; text-decoration: none;'>🔑 Forgot Password?</a>
         <a href='#' style='color: #1f4d7a; text-decoration: none;'>📝 New Student? Register</a>
     </div>
-    """, unsafe_allow_html=True)
+    """)
     
     # Login instructions
     with st.expander('ℹ️ Login Help'):
@@ -96,33 +157,28 @@ def student_login_page():
         - Visit Student Help Desk: Room 101, Admin Block
         """)
 
-def get_student_data(student_id):
-    df = pd.read_csv('data/student_data.csv')
-    return df[df['student_id'] == student_id].iloc[0] if len(df[df['student_id'] == student_id]) > 0 else None
+@timed('get_student_data')
+def get_student_data(student_id, current=None):
+    # A compact StudentRecord; current is handed back while the roster is unchanged
+    return find_student_record(student_id, current)
 
 def student_dashboard():
-    # Import plotly for interactive charts
-    import plotly.express as px
+    # Loaded on the first dashboard view, not with the login page
+    from analytics import calculate_subject_strength, generate_recommendations
+    from attendance_log import attendance_counters
+    from cards import card, card_grid, heading, notes, render_section
+    from charts import score_trend_figure
     
     # Theme toggle
     theme = st.sidebar.selectbox('🎨 Theme', ['Light', 'Dark'])
     if theme == 'Dark':
-        st.markdown("""
-        <style>
-            .main { background-color: #1a1a1a; color: #ffffff; }
-            .metric-card { background-color: #2d2d2d !important; color: #ffffff !important; border: 1px solid #3d3d3d !important; }
-            .section-title { color: #ffffff !important; }
-            h1, h2, h3, p { color: #ffffff !important; }
-            .stSelectbox { background-color: #2d2d2d; color: #ffffff; }
-            div[data-testid="stPlotlyChart"] { background-color: #2d2d2d !important; border-radius: 10px; padding: 1rem; }
-            div[data-testid="stPlotlyChart"] .main-svg { background-color: #2d2d2d !important; }
-            div[data-testid="stPlotlyChart"] .gridlayer path { stroke: #3d3d3d !important; }
-            div[data-testid="stPlotlyChart"] .xy text { fill: #ffffff !important; }
-            div[data-testid="stPlotlyChart"] .legendtext { fill: #ffffff !important; }
-        </style>
-        """, unsafe_allow_html=True)
+        inject_styles('student_dashboard', 'student_dashboard_dark', 'cards')
+    else:
+        inject_styles('student_dashboard', 'cards')
     
-    student_data = get_student_data(st.session_state.student_id)
+    # The session keeps only this record; timetables and the roster are shared
+    student_data = get_student_data(st.session_state.student_id, st.session_state.get('student_record'))
+    st.session_state.student_record = student_data
     if student_data is None:
         st.error('Student data not found')
         return
@@ -130,74 +186,30 @@ def student_dashboard():
     # Display student information with personalized greeting
     greeting = 'Good morning' if pd.Timestamp.now().hour < 12 else 'Good afternoon' if pd.Timestamp.now().hour < 17 else 'Good evening'
     st.title(f'{greeting}, {student_data["name"]}! 👋')
-    
-    # Custom CSS for modern UI
-    st.markdown("""
-    <style>
-        .metric-card { background-color: white; padding: 1rem; border-radius: 10px;
-                      box-shadow: 0 4px 6px rgba(0,0,0,0.1); margin-bottom: 1rem; }
-        .section-title { color: #1f4d7a; font-size: 1.5rem; font-weight: 600; margin: 1.5rem 0; }
-        .info-text { color: #666; font-size: 1rem; }
-    </style>
-    """, unsafe_allow_html=True)
 
-    # Basic Information with enhanced styling
-    st.markdown("<h2 class='section-title'>📋 Basic Information</h2>", unsafe_allow_html=True)
-    col1, col2, col3 = st.columns(3)
-    with col1:
-        st.markdown(f"""
-        <div class='metric-card'>
-            <h3 style='color: #1f4d7a; margin: 0;'>Student ID</h3>
-            <p style='font-size: 1.5rem; margin: 0.5rem 0;'>{student_data['student_id']}</p>
-        </div>
-        """, unsafe_allow_html=True)
-    with col2:
-        st.markdown(f"""
-        <div class='metric-card'>
-            <h3 style='color: #1f4d7a; margin: 0;'>Course</h3>
-            <p style='font-size: 1.5rem; margin: 0.5rem 0;'>{student_data['course']}</p>
-        </div>
-        """, unsafe_allow_html=True)
-    with col3:
-        st.markdown(f"""
-        <div class='metric-card'>
-            <h3 style='color: #1f4d7a; margin: 0;'>Semester</h3>
-            <p style='font-size: 1.5rem; margin: 0.5rem 0;'>Semester {student_data['semester']}</p>
-        </div>
-        """, unsafe_allow_html=True)
+    # Attendance includes classes recorded in the event log since the roster
+    # snapshot; the card and the recommendations both use this figure
+    attendance_pct = attendance_counters([student_data['student_id']])[3][0]
     
-    # Academic Performance with modern cards
-    st.markdown("<h2 class='section-title'>📈 Academic Performance</h2>", unsafe_allow_html=True)
-    col1, col2, col3 = st.columns(3)
-    with col1:
-        st.markdown(f"""
-        <div class='metric-card'>
-            <h3 style='color: #1f4d7a; margin: 0;'>GPA</h3>
-            <p style='font-size: 2rem; margin: 0.5rem 0;'>{student_data['gpa']:.2f}<span style='font-size: 1rem;'>/4.0</span></p>
-        </div>
-        """, unsafe_allow_html=True)
-    with col2:
-        st.markdown(f"""
-        <div class='metric-card'>
-            <h3 style='color: #1f4d7a; margin: 0;'>Attendance</h3>
-            <p style='font-size: 2rem; margin: 0.5rem 0;'>{student_data['attendance_percentage']}%</p>
-        </div>
-        """, unsafe_allow_html=True)
-    with col3:
-        st.markdown(f"""
-        <div class='metric-card'>
-            <h3 style='color: #1f4d7a; margin: 0;'>Assignments</h3>
-            <p style='font-size: 2rem; margin: 0.5rem 0;'>{student_data['assignments_completed']}/15</p>
-        </div>
-        """, unsafe_allow_html=True)
+    # Basic Information and Academic Performance cards, sent as one element
+    render_section(
+        heading('📋 Basic Information'),
+        card_grid([
+            card('Student ID', student_data['student_id']),
+            card('Course', student_data['course']),
+            card('Semester', f"Semester {student_data['semester']}")
+        ]),
+        heading('📈 Academic Performance'),
+        card_grid([
+            card('GPA', f"{student_data['gpa']:.2f}<span style='font-size: 1rem;'>/4.0</span>", size='2rem', raw=True),
+            card('Attendance', f"{round(float(attendance_pct), 1)}%", size='2rem'),
+            card('Assignments', f"{student_data['assignments_completed']}/15", size='2rem')
+        ]),
+        heading('📝 Test Scores')
+    )
     
     # Test Scores with interactive chart
-    st.markdown("<h2 class='section-title'>📝 Test Scores</h2>", unsafe_allow_html=True)
-    scores_df = pd.DataFrame({
-        'Test': ['Test 1', 'Test 2', 'Test 3'],
-        'Score': [student_data['test1_score'], student_data['test2_score'], student_data['test3_score']]
-    })
-    fig = px.line(scores_df, x='Test', y='Score', markers=True)
+    fig = score_trend_figure([student_data['test1_score'], student_data['test2_score'], student_data['test3_score']])
     if theme == 'Dark':
         fig.update_layout(
             plot_bgcolor='#2d2d2d',
@@ -217,59 +229,41 @@ def student_dashboard():
     fig.update_traces(line_color='#1f4d7a', marker=dict(size=10, color='#1f4d7a'))
     st.plotly_chart(fig, use_container_width=True)
     
-    # Additional Information with modern cards
-    st.markdown("<h2 class='section-title'>🎯 Additional Information</h2>", unsafe_allow_html=True)
-    col1, col2 = st.columns(2)
-    with col1:
-        st.markdown(f"""
-        <div class='metric-card'>
-            <h3 style='color: #1f4d7a; margin: 0;'>Specialization</h3>
-            <p style='font-size: 1.2rem; margin: 0.5rem 0;'>{student_data['specialization']}</p>
-        </div>
-        """, unsafe_allow_html=True)
-    with col2:
-        st.markdown(f"""
-        <div class='metric-card'>
-            <h3 style='color: #1f4d7a; margin: 0;'>Club/Activity</h3>
-            <p style='font-size: 1.2rem; margin: 0.5rem 0;'>{student_data['extracurricular_activities']}</p>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    # Performance Insights and Recommendations
-    st.markdown("<h2 class='section-title'>💡 Performance Insights</h2>", unsafe_allow_html=True)
+    # Additional Information, Performance Insights and Recommendations
     test_scores = [student_data['test1_score'], student_data['test2_score'], student_data['test3_score']]
     subject_strength = calculate_subject_strength(test_scores)
-    recommendations = generate_recommendations(student_data['attendance_percentage'], student_data['assignments_completed'], test_scores)
-    
-    # Display subject strength
-    st.markdown(f"""
-    <div class='metric-card'>
-        <h3 style='color: #1f4d7a; margin: 0;'>Subject Mastery Level</h3>
-        <p style='font-size: 1.5rem; margin: 0.5rem 0;'>{subject_strength}</p>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    # Display personalized recommendations
-    st.markdown("<h3 style='color: #1f4d7a; margin: 1rem 0;'>📌 Personalized Recommendations</h3>", unsafe_allow_html=True)
-    for rec in recommendations:
-        st.markdown(f"""
-        <div style='background-color: white; padding: 1rem; border-radius: 8px; 
-                    box-shadow: 0 2px 4px rgba(0,0,0,0.05); margin-bottom: 0.5rem;'>
-            <p style='color: #2c3e50; margin: 0;'>{rec}</p>
-        </div>
-        """, unsafe_allow_html=True)
+    recommendations = generate_recommendations(float(attendance_pct), student_data['assignments_completed'], test_scores)
+    render_section(
+        heading('🎯 Additional Information'),
+        card_grid([
+            card('Specialization', student_data['specialization'], size='1.2rem'),
+            card('Club/Activity', student_data['extracurricular_activities'], size='1.2rem')
+        ]),
+        heading('💡 Performance Insights'),
+        card('Subject Mastery Level', subject_strength),
+        heading('📌 Personalized Recommendations', tag='h3', css_class='', style='color: #1f4d7a; margin: 1rem 0;'),
+        notes(recommendations)
+    )
     
     # Import and add timetable
     from timetable import add_timetable_to_dashboard, display_timetable
     
     # Add today's schedule to dashboard
-    add_timetable_to_dashboard()
+    add_timetable_to_dashboard(student_data)
     
     # Add tab for full timetable view
     if st.button('View Full Timetable'):
-        display_timetable()
+        display_timetable(student_data)
 
 def student_logout():
+    token = st.session_state.pop('session_token', None)
+    if token:
+        get_token_signer().revoke(token)
+        st.experimental_set_query_params()
+    st.session_state.remember_student = False
     st.session_state.student_authenticated = False
     st.session_state.student_id = None
+    st.session_state.pop('student_record', None)
+    st.session_state.authenticated = False
+    st.session_state.user_type = None
     st.rerun()
\ No newline at end of file
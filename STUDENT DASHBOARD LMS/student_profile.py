@@ -1,100 +1,71 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
 from analytics import calculate_gpa, get_performance_trend, generate_recommendations, calculate_subject_strength
+from attendance_log import attendance_counters
+from cards import card, card_grid, escape, heading, notes, panel, progress, render_section
+from charts import score_trend_figure
+from theme import inject_styles, register_styles
+
+# Profile page styles for each theme
+register_styles('profile_dark', """
+<style>
+    .main { background-color: #1a1a1a; color: #ffffff; }
+    .profile-header { text-align: center; margin-bottom: 2rem; }
+    .profile-header h1 { color: #ffffff; font-size: 2.5rem; font-weight: 600; }
+    .section-header { color: #ffffff; margin: 2rem 0 1rem; font-size: 1.5rem; }
+    .metric-card { background-color: #2d2d2d; padding: 1.5rem; border-radius: 12px; 
+                  box-shadow: 0 4px 15px rgba(0,0,0,0.2); transition: transform 0.3s; color: #ffffff; }
+    .metric-card:hover { transform: translateY(-5px); }
+    div[data-testid="stPlotlyChart"] { background-color: #2d2d2d !important; border-radius: 10px; padding: 1rem; }
+    div[data-testid="stPlotlyChart"] .main-svg { background-color: #2d2d2d !important; }
+    div[data-testid="stPlotlyChart"] .gridlayer path { stroke: #3d3d3d !important; }
+    div[data-testid="stPlotlyChart"] .xy text { fill: #ffffff !important; }
+    div[data-testid="stPlotlyChart"] .legendtext { fill: #ffffff !important; }
+</style>
+""")
+register_styles('profile_light', """
+<style>
+    .profile-header { text-align: center; margin-bottom: 2rem; }
+    .profile-header h1 { color: #1f4d7a; font-size: 2.5rem; font-weight: 600; }
+    .section-header { color: #2c3e50; margin: 2rem 0 1rem; font-size: 1.5rem; }
+    .metric-card { background-color: white; padding: 1.5rem; border-radius: 12px; 
+                  box-shadow: 0 4px 15px rgba(0,0,0,0.1); transition: transform 0.3s; }
+    .metric-card:hover { transform: translateY(-5px); }
+</style>
+""")
 
 def display_student_profile(student_data):
     # Theme toggle
     theme = st.sidebar.selectbox('🎨 Theme', ['Light', 'Dark'])
     if theme == 'Dark':
-        st.markdown("""
-        <style>
-            .main { background-color: #1a1a1a; color: #ffffff; }
-            .profile-header { text-align: center; margin-bottom: 2rem; }
-            .profile-header h1 { color: #ffffff; font-size: 2.5rem; font-weight: 600; }
-            .section-header { color: #ffffff; margin: 2rem 0 1rem; font-size: 1.5rem; }
-            .metric-card { background-color: #2d2d2d; padding: 1.5rem; border-radius: 12px; 
-                          box-shadow: 0 4px 15px rgba(0,0,0,0.2); transition: transform 0.3s; color: #ffffff; }
-            .metric-card:hover { transform: translateY(-5px); }
-            div[data-testid="stPlotlyChart"] { background-color: #2d2d2d !important; border-radius: 10px; padding: 1rem; }
-            div[data-testid="stPlotlyChart"] .main-svg { background-color: #2d2d2d !important; }
-            div[data-testid="stPlotlyChart"] .gridlayer path { stroke: #3d3d3d !important; }
-            div[data-testid="stPlotlyChart"] .xy text { fill: #ffffff !important; }
-            div[data-testid="stPlotlyChart"] .legendtext { fill: #ffffff !important; }
-        </style>
-        """, unsafe_allow_html=True)
+        inject_styles('profile_dark', 'cards')
     else:
-        st.markdown("""
-        <style>
-            .profile-header { text-align: center; margin-bottom: 2rem; }
-            .profile-header h1 { color: #1f4d7a; font-size: 2.5rem; font-weight: 600; }
-            .section-header { color: #2c3e50; margin: 2rem 0 1rem; font-size: 1.5rem; }
-            .metric-card { background-color: white; padding: 1.5rem; border-radius: 12px; 
-                          box-shadow: 0 4px 15px rgba(0,0,0,0.1); transition: transform 0.3s; }
-            .metric-card:hover { transform: translateY(-5px); }
-        </style>
-        """, unsafe_allow_html=True)
-    
-    # Profile Header with Student Name and Image
-    st.markdown(f"""<div class='profile-header'>
-        <h1>👨‍🎓 {student_data['name']}'s Profile</h1>
-        <p style='color: #666; font-size: 1.1rem;'>Student Dashboard</p>
-    </div>""", unsafe_allow_html=True)
+        inject_styles('profile_light', 'cards')
     
-    # Basic Information Cards with enhanced styling
-    st.markdown("<h2 class='section-header'>📋 Basic Information</h2>", unsafe_allow_html=True)
-    col1, col2, col3 = st.columns(3)
-    with col1:
-        st.markdown(f"""
-        <div class='metric-card'>
-            <h3 style='color: #1f4d7a; margin: 0;'>Student ID</h3>
-            <p style='font-size: 1.5rem; margin: 0.5rem 0;'>{student_data['student_id']}</p>
-        </div>
-        """, unsafe_allow_html=True)
-    with col2:
-        st.markdown(f"""
-        <div class='metric-card'>
-            <h3 style='color: #1f4d7a; margin: 0;'>Course</h3>
-            <p style='font-size: 1.5rem; margin: 0.5rem 0;'>{student_data['course']}</p>
-        </div>
-        """, unsafe_allow_html=True)
-    with col3:
-        st.markdown(f"""
-        <div class='metric-card'>
-            <h3 style='color: #1f4d7a; margin: 0;'>Attendance</h3>
-            <p style='font-size: 1.5rem; margin: 0.5rem 0;'>{student_data['attendance_percentage']:.1f}%</p>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    # Academic Performance Section with interactive charts
-    st.markdown("<h2 class='section-header'>📈 Academic Performance</h2>", unsafe_allow_html=True)
+    # Each section below is built as one HTML string and sent as one element
     test_scores = [student_data['test1_score'], student_data['test2_score'], student_data['test3_score']]
+    gpa = calculate_gpa(test_scores[0], test_scores[1], test_scores[2])
+    trend = get_performance_trend(test_scores[0], test_scores[1], test_scores[2])
+    # Includes classes recorded in the event log since the roster snapshot
+    attendance_pct = float(attendance_counters([student_data['student_id']])[3][0])
     
-    # GPA and Performance Trend Cards with animations
-    col1, col2 = st.columns(2)
-    with col1:
-        gpa = calculate_gpa(test_scores[0], test_scores[1], test_scores[2])
-        st.markdown(f"""
-        <div class='metric-card'>
-            <h3 style='color: #1f4d7a; margin: 0;'>GPA</h3>
-            <p style='font-size: 2rem; margin: 0.5rem 0;'>{gpa:.2f}<span style='font-size: 1rem;'>/4.0</span></p>
-        </div>
-        """, unsafe_allow_html=True)
-    with col2:
-        trend = get_performance_trend(test_scores[0], test_scores[1], test_scores[2])
-        st.markdown(f"""
-        <div class='metric-card'>
-            <h3 style='color: #1f4d7a; margin: 0;'>Performance Trend</h3>
-            <p style='font-size: 1.5rem; margin: 0.5rem 0;'>{trend}</p>
-        </div>
-        """, unsafe_allow_html=True)
+    # Profile Header, Basic Information and Academic Performance cards
+    render_section(
+        f"""<div class='profile-header'><h1>👨‍🎓 {escape(student_data['name'])}'s Profile</h1><p style='color: #666; font-size: 1.1rem;'>Student Dashboard</p></div>""",
+        heading('📋 Basic Information', css_class='section-header'),
+        card_grid([
+            card('Student ID', student_data['student_id']),
+            card('Course', student_data['course']),
+            card('Attendance', f"{attendance_pct:.1f}%")
+        ]),
+        heading('📈 Academic Performance', css_class='section-header'),
+        card_grid([
+            card('GPA', f"{gpa:.2f}<span style='font-size: 1rem;'>/4.0</span>", size='2rem', raw=True),
+            card('Performance Trend', trend)
+        ])
+    )
     
     # Test Scores Visualization with Enhanced Styling
-    scores_df = pd.DataFrame({
-        'Test': ['Test 1', 'Test 2', 'Test 3'],
-        'Score': test_scores
-    })
-    fig = px.line(scores_df, x='Test', y='Score', markers=True)
+    fig = score_trend_figure(test_scores)
     if theme == 'Dark':
         fig.update_layout(
             title={'text': 'Test Performance Trend', 'y':0.9, 'x':0.5, 'xanchor': 'center', 'yanchor': 'top'},
@@ -116,33 +87,20 @@ def display_student_profile(student_data):
     fig.update_traces(line_color='#1f4d7a', marker=dict(size=10, color='#1f4d7a'))
     st.plotly_chart(fig, use_container_width=True)
     
-    # Subject Strength Section with Modern Card Design
-    st.markdown("<h2 style='color: #2c3e50; margin: 2rem 0 1rem;'>💪 Subject Strength</h2>", unsafe_allow_html=True)
+    # Subject Strength, Assignments Progress and Recommendations
+    section_style = 'color: #2c3e50; margin: 2rem 0 1rem;'
     strength = calculate_subject_strength(test_scores)
-    st.markdown(f"""<div style='background-color: white; padding: 1.5rem; border-radius: 12px; box-shadow: 0 4px 6px rgba(0,0,0,0.05);'>
-        <h3 style='color: #1f4d7a; margin: 0;'>Overall Performance Level</h3>
-        <p style='color: #2c3e50; font-size: 1.2rem; margin: 0.5rem 0;'>{strength}</p>
-    </div>""", unsafe_allow_html=True)
-    
-    # Assignments Progress with Enhanced Visual
-    st.markdown("<h2 style='color: #2c3e50; margin: 2rem 0 1rem;'>📝 Assignments Progress</h2>", unsafe_allow_html=True)
-    progress = (student_data['assignments_completed'] / 10) * 100
-    st.markdown(f"""<div style='background-color: white; padding: 1.5rem; border-radius: 12px; box-shadow: 0 4px 6px rgba(0,0,0,0.05);'>
-        <div style='display: flex; justify-content: space-between; align-items: center; margin-bottom: 1rem;'>
-            <span style='color: #2c3e50; font-size: 1.1rem;'>Completed {student_data['assignments_completed']} out of 10 assignments</span>
-            <span style='color: #1f4d7a; font-weight: bold;'>{progress:.0f}%</span>
-        </div>""", unsafe_allow_html=True)
-    st.progress(progress/100)
-    st.markdown("</div>", unsafe_allow_html=True)
-    
-    # Personalized Recommendations with Card Design
-    st.markdown("<h2 style='color: #2c3e50; margin: 2rem 0 1rem;'>🎯 Personalized Recommendations</h2>", unsafe_allow_html=True)
+    progress_pct = (student_data['assignments_completed'] / 10) * 100
     recommendations = generate_recommendations(
-        student_data['attendance_percentage'],
+        attendance_pct,
         student_data['assignments_completed'],
         test_scores
     )
-    for rec in recommendations:
-        st.markdown(f"""<div style='background-color: white; padding: 1rem; border-radius: 8px; box-shadow: 0 2px 4px rgba(0,0,0,0.05); margin-bottom: 0.5rem;'>
-            <p style='color: #2c3e50; margin: 0;'>{rec}</p>
-        </div>""", unsafe_allow_html=True)
\ No newline at end of file
+    render_section(
+        heading('💪 Subject Strength', css_class='', style=section_style),
+        panel(f"""<h3 style='color: #1f4d7a; margin: 0;'>Overall Performance Level</h3><p style='color: #2c3e50; font-size: 1.2rem; margin: 0.5rem 0;'>{escape(strength)}</p>"""),
+        heading('📝 Assignments Progress', css_class='', style=section_style),
+        panel(progress(f"Completed {student_data['assignments_completed']} out of 10 assignments", progress_pct)),
+        heading('🎯 Personalized Recommendations', css_class='', style=section_style),
+        notes(recommendations)
+    )
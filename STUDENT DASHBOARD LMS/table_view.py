@@ -0,0 +1,102 @@
+import math
+import numpy as np
+import pandas as pd
+import streamlit as st
+from instrumentation import timed
+
+PAGE_SIZES = [25, 50, 100, 250]
+TABLE_COLUMNS = ['student_id', 'name', 'email', 'specialization', 'gpa',
+                 'attendance_percentage', 'extracurricular_activities']
+SORT_LABELS = {
+    None: 'Roster order',
+    'student_id': 'Student ID',
+    'name': 'Name',
+    'gpa': 'GPA',
+    'attendance_percentage': 'Attendance',
+    'specialization': 'Specialization',
+    'extracurricular_activities': 'Club'
+}
+
+
+class SortOrders:
+    # Stable sort orders over the roster, one per column, computed the first
+    # time a column is sorted and then reused for every page and filter.
+    # Ties keep roster order in both directions.
+    def __init__(self, df):
+        self._df = df
+        self._orders = {}
+
+    def order(self, column, descending=False):
+        key = (column, descending)
+        if key not in self._orders:
+            codes = pd.factorize(self._df[column], sort=True)[0].astype(np.int64)
+            rows = np.arange(len(codes))
+            order = np.lexsort((rows, -codes if descending else codes))
+            ranks = np.empty(len(order), dtype=np.int64)
+            ranks[order] = rows
+            self._orders[key] = (order, ranks)
+        return self._orders[key]
+
+
+def page_positions(positions, sort_orders, size, column=None, descending=False, page=1, page_size=PAGE_SIZES[0]):
+    # Row positions for one page of the (filtered) result. With no filter the
+    # page is a slice of the precomputed order; small filtered sets are sorted
+    # by rank, large ones are taken from the order with a membership mask.
+    start = (page - 1) * page_size
+    if column is None:
+        ordered = positions[::-1] if descending else positions
+        return ordered[start:start + page_size]
+
+    order, ranks = sort_orders.order(column, descending)
+    if len(positions) == size:
+        return order[start:start + page_size]
+    if len(positions) * 8 < size:
+        ordered = positions[np.argsort(ranks[positions], kind='stable')]
+        return ordered[start:start + page_size]
+    member = np.zeros(size, dtype=bool)
+    member[positions] = True
+    return order[member[order]][start:start + page_size]
+
+
+def style_student_page(page_df):
+    # Styling only ever runs over the rows of the visible page
+    return (page_df[TABLE_COLUMNS]
+            .style.format({'gpa': '{:.2f}', 'attendance_percentage': '{:.1f}%'})
+            .apply(lambda x: ['color: #e0e0e0; background-color: ' + ('#1f4d7a' if x.name in ['gpa', 'attendance_percentage'] else '#2d2d2d')
+                              for i in range(len(x))], axis=0)
+            .format({
+                'student_id': lambda x: f'#{x}',
+                'gpa': '{:.2f}',
+                'attendance_percentage': '{:.1f}%'
+            })
+            .set_properties(**{
+                'background-color': '#1a1a1a',
+                'color': '#e0e0e0',
+                'font-size': '14px',
+                'padding': '12px',
+                'border': '1px solid #333333'
+            }))
+
+
+@timed('table_view.display_student_table')
+def display_student_table(df, positions, sort_orders, state_key='student_table'):
+    # Paginated student records table: only the current page is styled and sent
+    col1, col2, col3 = st.columns([2, 1, 1])
+    with col1:
+        sort_column = st.selectbox('↕️ Sort by', list(SORT_LABELS), format_func=SORT_LABELS.get,
+                                   key=f'{state_key}_sort')
+    with col2:
+        descending = st.selectbox('Order', ['Ascending', 'Descending'], key=f'{state_key}_order') == 'Descending'
+    with col3:
+        page_size = st.selectbox('Rows per page', PAGE_SIZES, key=f'{state_key}_page_size')
+
+    total = len(positions)
+    page_count = max(1, math.ceil(total / page_size))
+    # Keyed on the result size so a new search or filter starts from page one
+    page = st.number_input('Page', min_value=1, max_value=page_count, value=1, step=1,
+                           key=f'{state_key}_page_{total}_{page_size}')
+
+    rows = page_positions(positions, sort_orders, len(df), sort_column, descending, page, page_size)
+    first = (page - 1) * page_size
+    st.caption(f'Rows {first + 1 if total else 0}–{first + len(rows)} of {total} · page {page} of {page_count}')
+    st.dataframe(style_student_page(df.iloc[rows]), height=400, use_container_width=True)
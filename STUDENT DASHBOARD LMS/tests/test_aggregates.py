@@ -0,0 +1,85 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+from aggregates import RosterAggregates, box_stats_from_counts
+from data_store import StudentDataStore
+from storage import RosterChanged, make_storage, read_student_csv
+
+ROSTER = os.path.join(APP_DIR, 'data', 'student_data.csv')
+
+
+def _store(tmp_path, backend='csv', rows=50):
+    path = str(tmp_path / 'roster.csv')
+    pd.read_csv(ROSTER).head(rows).to_csv(path, index=False)
+    return StudentDataStore(path, make_storage(backend, path)), path
+
+
+def _changes():
+    # Two existing students moved to other bins and categories, one new one
+    rows = pd.read_csv(ROSTER).iloc[[2, 10, 70]].copy()
+    rows['gpa'] = [1.2, 3.95, 3.75]
+    rows['test1_score'] = [0, 100, 55]
+    rows['specialization'] = ['Quantum Computing', 'AI & ML', 'Quantum Computing']
+    rows['extracurricular_activities'] = ['Chess Club', 'Chess Club', 'Robotics Club']
+    return rows
+
+
+@pytest.mark.parametrize('backend', ['csv', 'sqlite'])
+def test_upsert_carries_aggregates_over_to_the_rebuilt_values(tmp_path, backend):
+    store, _ = _store(tmp_path, backend)
+    builds = []
+
+    def build(df):
+        builds.append(len(df))
+        return RosterAggregates(df)
+
+    store.derived('aggregates', build)
+    store.upsert(_changes())
+    carried = store.derived('aggregates', build)
+    rebuilt = RosterAggregates(store.get_dataframe())
+    assert builds == [50]
+    assert carried.statistics() == pytest.approx(rebuilt.statistics())
+    assert carried.club_participation() == rebuilt.club_participation()
+    assert carried.specialization_distribution() == rebuilt.specialization_distribution()
+    assert np.array_equal(carried.gpa_histogram, rebuilt.gpa_histogram)
+    assert np.array_equal(carried.attendance_histogram, rebuilt.attendance_histogram)
+    assert carried.score_box_stats() == rebuilt.score_box_stats()
+    assert ('Quantum Computing', 2) in carried.specialization_distribution()
+
+
+def test_box_stats_from_counts_match_numpy_quantiles():
+    values = np.array([3, 7, 7, 8, 15, 40, 41, 41, 99])
+    stats = box_stats_from_counts(np.bincount(values, minlength=101))
+    assert [stats['q1'], stats['median'], stats['q3']] == list(np.quantile(values, [0.25, 0.5, 0.75]))
+    assert stats['count'] == len(values)
+    assert box_stats_from_counts(np.zeros(101, dtype=np.int64)) is None
+
+
+def test_upsert_is_persisted_for_the_next_reader(tmp_path):
+    store, path = _store(tmp_path)
+    store.upsert(_changes())
+    reloaded = StudentDataStore(path, make_storage('csv', path)).get_dataframe()
+    assert len(reloaded) == 51
+    assert reloaded.set_index('student_id').loc[_changes()['student_id'], 'gpa'].tolist() == [1.2, 3.95, 3.75]
+
+
+@pytest.mark.parametrize('backend', ['csv', 'sqlite'])
+def test_upsert_against_a_stale_signature_writes_nothing(tmp_path, backend):
+    _, path = _store(tmp_path, backend)
+    storage = make_storage(backend, path)
+    loaded = storage.load()
+    stale = storage.signature()
+    make_storage(backend, path).upsert(_changes().iloc[[2]])
+    written = storage.load()
+    with pytest.raises(RosterChanged):
+        storage.upsert(_changes().iloc[[0]], stale)
+    assert len(written) == len(loaded) + 1
+    assert storage.load().astype(str).equals(written.astype(str))
+    if backend == 'csv':
+        assert len(read_student_csv(path)) == len(loaded) + 1
@@ -0,0 +1,57 @@
+import os
+import sys
+import pandas as pd
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+from alerts import SEVERITY_MEDIUM, build_alert_table, render_alerts, write_alerts
+from assignment_tracker import get_assignment_status
+from attendance_tracker import get_attendance_summary
+from storage import STUDENT_DTYPES
+
+ROSTER = os.path.join(APP_DIR, 'data', 'student_data.csv')
+
+
+def _roster():
+    df = pd.read_csv(ROSTER, dtype=STUDENT_DTYPES)
+    # Make sure every severity of both sources shows up
+    df.loc[0, ['total_classes', 'classes_attended', 'attendance_percentage']] = [100, 70, 70.0]
+    df.loc[1, ['total_classes', 'classes_attended', 'attendance_percentage']] = [100, 80, 80.0]
+    df.loc[2:4, 'assignments_completed'] = pd.array([3, 7, 9], dtype=df['assignments_completed'].dtype)
+    return df
+
+
+def _scalar_alerts(df):
+    # What the per-student trackers say for every student
+    rows = []
+    for student in df.itertuples():
+        summary = get_attendance_summary(student.attendance_percentage, student.total_classes,
+                                         student.classes_attended)
+        for alert in summary['alerts']:
+            rows.append((student.student_id, 'Attendance', alert['severity'], alert['message']))
+        status = get_assignment_status(student.assignments_completed)
+        if status['alert_level'] != 'None':
+            rows.append((student.student_id, 'Assignments', status['alert_level'], status['alert']))
+    return sorted(rows)
+
+
+def test_bulk_alerts_say_what_the_scalar_trackers_say():
+    df = _roster()
+    rendered = render_alerts(build_alert_table(df))
+    bulk = sorted(zip(rendered['student_id'], rendered['source'], rendered['severity'], rendered['message']))
+    assert bulk == _scalar_alerts(df)
+    assert {'High', 'Medium', 'Low'} <= set(rendered['severity'])
+
+
+def test_minimum_severity_and_chunked_writes(tmp_path):
+    df = _roster()
+    table = build_alert_table(df, SEVERITY_MEDIUM)
+    assert (table['severity'] >= SEVERITY_MEDIUM).all()
+    path = str(tmp_path / 'alerts.csv')
+    chunks = (df.iloc[start:start + 7] for start in range(0, len(df), 7))
+    assert write_alerts(chunks, path, SEVERITY_MEDIUM) == len(table)
+    written = pd.read_csv(path)
+    key = ['student_id', 'source']
+    assert written.sort_values(key)[key + ['severity', 'count']].values.tolist() == \
+        table.sort_values(key)[key + ['severity', 'count']].values.tolist()
@@ -0,0 +1,62 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analytics import (STRENGTH_LABELS, TREND_LABELS, analyze_students, calculate_gpa,
+                       decode_recommendations, generate_recommendations)
+
+
+def _trend(test1, test2, test3):
+    # The per-student branches the batch codes replaced
+    recent, overall = test3 - test2, test3 - test1
+    if recent > 5 and overall > 10:
+        return TREND_LABELS[0]
+    if recent > 0 and overall > 0:
+        return TREND_LABELS[1]
+    if recent < -5 and overall < -10:
+        return TREND_LABELS[2]
+    if recent < 0 and overall < 0:
+        return TREND_LABELS[3]
+    return TREND_LABELS[4]
+
+
+def _strength(scores):
+    average = np.mean(scores)
+    return STRENGTH_LABELS[0 if average >= 90 else 1 if average >= 80 else 2 if average >= 70 else 3]
+
+
+def test_batch_analysis_matches_the_per_student_rules():
+    rng = np.random.default_rng(7)
+    # Scores on and around every threshold, attendance around 85, assignments around 8
+    df = pd.DataFrame({
+        'student_id': np.arange(500000, 502000),
+        'test1_score': rng.integers(55, 101, 2000),
+        'test2_score': rng.integers(55, 101, 2000),
+        'test3_score': rng.integers(55, 101, 2000),
+        'attendance_percentage': rng.choice([70.0, 84.9, 85.0, 97.5], 2000),
+        'assignments_completed': rng.integers(5, 11, 2000)
+    })
+    result = analyze_students(df)
+    for student, row in zip(df.itertuples(), result.itertuples()):
+        scores = [student.test1_score, student.test2_score, student.test3_score]
+        assert TREND_LABELS[row.trend_code] == _trend(*scores)
+        assert STRENGTH_LABELS[row.strength_code] == _strength(scores)
+        assert row.gpa == pytest.approx((scores[0] * 0.3 + scores[1] * 0.3 + scores[2] * 0.4) / 100 * 4.0)
+        assert decode_recommendations(row.recommendation_code) == generate_recommendations(
+            student.attendance_percentage, student.assignments_completed, scores)
+    assert calculate_gpa(100, 100, 100) == 4.0
+
+
+def test_recommendations_keep_their_order():
+    assert generate_recommendations(80, 5, [60, 65, 70]) == [
+        'Try to improve your attendance to better understand the course material',
+        'Complete more assignments to strengthen your practical skills',
+        'Consider seeking additional help with course material'
+    ]
+    assert generate_recommendations(95, 10, [75, 75, 75]) == [
+        'Regular practice could help improve your test scores']
+    assert generate_recommendations(95, 10, [90, 90, 90]) == []
@@ -0,0 +1,45 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import attendance_log
+from attendance_log import AttendanceLog, attendance_counters
+
+
+def _counts(log, student_ids):
+    held, attended = log.deltas(student_ids)
+    return held.tolist(), attended.tolist()
+
+
+def test_recorded_classes_update_the_counters(tmp_path):
+    log = AttendanceLog(str(tmp_path / 'events.bin'))
+    log.record_class(1, [500001, 500002], [True, False])
+    log.record_classes([(2, [500001], True), (3, [500002, 500003], [True, True])])
+    assert _counts(log, [500001, 500002, 500003, 500004]) == ([2, 2, 1, 0], [2, 1, 1, 0])
+    # Another reader of the same file sees the same totals
+    assert _counts(AttendanceLog(log.path), [500001, 500002, 500003]) == ([2, 2, 1], [2, 1, 1])
+
+
+def test_reconcile_drops_only_the_classes_logged_before_it(tmp_path):
+    log = AttendanceLog(str(tmp_path / 'events.bin'))
+    log.record_class(1, [500001, 500002], [True, True])
+    log.reconcile([500001])
+    log.record_class(2, [500001, 500002], [False, True])
+    assert _counts(log, [500001, 500002]) == ([1, 2], [0, 2])
+    # Replaying the whole file in one batch gives the same result
+    assert _counts(AttendanceLog(log.path), [500001, 500002]) == ([1, 2], [0, 2])
+
+
+def test_counters_add_logged_classes_to_the_roster(tmp_path, monkeypatch):
+    roster = pd.DataFrame({'student_id': [500001, 500002], 'total_classes': [100, 100],
+                           'classes_attended': [90, 80], 'attendance_percentage': [90.0, 80.0]})
+    monkeypatch.setattr(attendance_log, 'find_students', lambda student_ids: roster)
+    log = AttendanceLog(str(tmp_path / 'events.bin'))
+    log.record_class(1, [500001], [False])
+    student_ids, total, attended, pct = attendance_counters([500001, 500002], log)
+    assert total.tolist() == [101, 100]
+    assert attended.tolist() == [90, 80]
+    assert np.allclose(pct, [90 / 101 * 100, 80.0])
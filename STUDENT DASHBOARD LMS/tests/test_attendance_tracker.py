@@ -0,0 +1,45 @@
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from attendance_tracker import analyze_attendance_pattern, classes_needed, get_attendance_summary_batch
+
+
+def _loop(total, attended, target):
+    # The class-by-class count classes_needed replaced
+    needed = 0
+    while (attended + needed) / (total + needed) * 100 < target:
+        needed += 1
+    return needed
+
+
+def test_classes_needed_matches_counting_class_by_class():
+    totals, attended = np.meshgrid(np.arange(1, 61), np.arange(0, 61))
+    keep = attended <= totals
+    totals, attended = totals[keep], attended[keep]
+    for target in (75, 85, 99.5):
+        expected = [_loop(int(t), int(a), target) for t, a in zip(totals, attended)]
+        assert classes_needed(totals, attended, target).tolist() == expected
+        assert classes_needed(int(totals[7]), int(attended[7]), target) == expected[7]
+
+
+@pytest.mark.parametrize('target', [0, 100, -5, 120])
+def test_classes_needed_rejects_unreachable_targets(target):
+    with pytest.raises(ValueError):
+        classes_needed(100, 50, target)
+
+
+def test_batch_summary_matches_the_scalar_analysis():
+    total = np.array([100, 100, 100, 40, 0])
+    attended = np.array([93, 80, 60, 34, 0])
+    summary = get_attendance_summary_batch(total, attended)
+    for row, (t, a) in zip(summary.itertuples(), zip(total, attended)):
+        percentage = a / t * 100 if t else 0.0
+        scalar = analyze_attendance_pattern(percentage, t, a)
+        assert row.status == scalar['status']
+        assert row.classes_needed == scalar['classes_needed']
+        assert row.classes_missed == scalar['classes_missed']
+    assert summary['status'].tolist() == ['Good', 'Warning', 'Critical', 'Good', 'Critical']
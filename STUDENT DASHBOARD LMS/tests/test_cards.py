@@ -0,0 +1,25 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cards import card, card_grid, heading, notes, progress
+
+
+def test_values_are_escaped_unless_raw():
+    html = card('GPA <avg>', '3.5 <span>/4.0</span>')
+    assert 'GPA &lt;avg&gt;' in html
+    assert '3.5 &lt;span&gt;/4.0&lt;/span&gt;' in html
+    assert '3.5 <span>/4.0</span>' in card('GPA', '3.5 <span>/4.0</span>', raw=True)
+    assert notes(["O'Brien & co"]).count('O&#x27;Brien &amp; co') == 1
+    assert heading('<b>Hi</b>', tag='h3', css_class='') == '<h3>&lt;b&gt;Hi&lt;/b&gt;</h3>'
+
+
+def test_sections_are_single_line_html():
+    # Indented lines would turn into markdown code blocks
+    grid = card_grid([card('A', 1), card('B', 2), card('C', 3)])
+    assert '\n' not in grid
+    assert 'repeat(3, minmax(0, 1fr))' in grid
+    assert grid.count("<div class='metric-card'>") == 3
+    assert 'width: 100.0%' in progress('Assignments', 130)
+    assert '\n' not in progress('Assignments', 40)
@@ -0,0 +1,44 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+from aggregates import GPA_BIN_EDGES, RosterAggregates
+from charts import build_analytics_figures, filtered_distribution_figures, histogram_figure
+
+ROSTER = os.path.join(APP_DIR, 'data', 'student_data.csv')
+
+
+def test_histogram_bars_keep_the_bins_between_the_first_and_last_filled_one():
+    counts = np.zeros(len(GPA_BIN_EDGES) - 1, dtype=np.int64)
+    counts[[12, 15]] = [4, 9]
+    bar = histogram_figure(counts, GPA_BIN_EDGES, 'GPA', 'gpa').data[0]
+    assert list(bar.y) == [4, 0, 0, 9]
+    assert np.allclose(bar.x, [2.5, 2.7, 2.9, 3.1])
+    assert np.allclose(bar.width, 0.2)
+
+
+def test_filtered_figures_count_only_the_given_rows():
+    df = pd.read_csv(ROSTER)
+    positions = np.flatnonzero(df['specialization'] == df['specialization'].iloc[0])
+    figures = filtered_distribution_figures(df, positions)
+    gpa = figures['gpa'].data[0]
+    assert sum(gpa.y) == len(positions)
+    assert sum(figures['attendance'].data[0].y) == len(positions)
+    expected = np.histogram(df['gpa'].to_numpy()[positions], bins=GPA_BIN_EDGES)[0]
+    assert list(gpa.y) == list(np.trim_zeros(expected))
+    assert sum(filtered_distribution_figures(df)['gpa'].data[0].y) == len(df)
+
+
+def test_analytics_figures_carry_only_aggregates():
+    df = pd.read_csv(ROSTER)
+    figures = build_analytics_figures(RosterAggregates(df))
+    pie = figures['specialization'].data[0]
+    assert dict(zip(pie.labels, pie.values)) == df['specialization'].value_counts().to_dict()
+    box = figures['test_scores'].data[0]
+    assert list(box.x) == ['test1_score', 'test2_score', 'test3_score']
+    assert list(box.median) == [float(df[column].median()) for column in box.x]
+    assert sum(figures['clubs'].data[0].y) == len(df)
@@ -0,0 +1,67 @@
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import credentials
+from credentials import (ACCOUNT_BURST, LOGIN_BUSY, LOGIN_INVALID, LOGIN_OK, LOGIN_RATE_LIMITED,
+                         CredentialStore, TokenBucketLimiter, forwarded_client)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket_refills_at_its_rate():
+    clock = Clock()
+    limiter = TokenBucketLimiter(burst=2, rate=0.5, clock=clock)
+    assert limiter.allow('key') and limiter.allow('key')
+    assert not limiter.allow('key')
+    clock.now += 2
+    assert limiter.allow('key')
+    assert not limiter.allow('key')
+
+
+def test_forwarded_client_takes_the_hop_added_by_the_trusted_proxy():
+    assert forwarded_client('6.6.6.6, 203.0.113.7', hops=1) == '203.0.113.7'
+    assert forwarded_client('6.6.6.6, 203.0.113.7, 10.0.0.2', hops=2) == '203.0.113.7'
+    # Fewer entries than proxies: the request did not come through them
+    assert forwarded_client('203.0.113.7', hops=2) is None
+    assert forwarded_client('203.0.113.7', hops=0) is None
+    assert forwarded_client(None, hops=1) is None
+
+
+def test_failed_attempts_do_not_lock_out_other_clients(monkeypatch):
+    student = {'student_id': 500001, 'name': 'Aarav Sharma'}
+    monkeypatch.setattr(credentials, 'find_student', lambda student_id: student if student_id == 500001 else None)
+    store = CredentialStore(workers=1)
+    for _ in range(ACCOUNT_BURST):
+        assert store.verify_student(500001, 'wrong', client='6.6.6.6')[0] == LOGIN_INVALID
+    assert store.verify_student(500001, '500001', client='6.6.6.6')[0] == LOGIN_RATE_LIMITED
+    assert store.verify_student(500001, '500001', client='203.0.113.7') == (LOGIN_OK, student)
+
+
+def test_student_checks_run_on_the_bounded_pool(monkeypatch):
+    started, release = threading.Event(), threading.Event()
+
+    def slow_find_student(student_id):
+        started.set()
+        release.wait(5)
+        return {'student_id': student_id, 'name': 'Aarav Sharma'}
+
+    monkeypatch.setattr(credentials, 'find_student', slow_find_student)
+    store = CredentialStore(workers=1, queue_limit=1)
+    first = threading.Thread(target=store.verify_student, args=(500001, '500001', 'a'))
+    first.start()
+    try:
+        # The only slot is taken by the first check, so the second is turned away
+        assert started.wait(5)
+        assert store.verify_student(500002, '500002', client='b') == (LOGIN_BUSY, None)
+    finally:
+        release.set()
+        first.join()
@@ -0,0 +1,76 @@
+import os
+import sys
+import pandas as pd
+import pytest
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+from data_store import StudentDataStore, StudentIndex, StudentRecord
+from instrumentation import deep_sizeof
+from storage import make_storage
+
+ROSTER = os.path.join(APP_DIR, 'data', 'student_data.csv')
+
+
+def _store(tmp_path, backend='csv', rows=20):
+    path = str(tmp_path / 'roster.csv')
+    pd.read_csv(ROSTER).head(rows).to_csv(path, index=False)
+    return StudentDataStore(path, make_storage(backend, path)), path
+
+
+def test_roster_is_loaded_once_and_reloaded_when_the_file_changes(tmp_path):
+    store, path = _store(tmp_path)
+    builds = []
+    first = store.get_dataframe()
+    assert store.get_dataframe() is first
+    store.derived('count', lambda df: builds.append(len(df)) or len(df))
+    store.derived('count', lambda df: builds.append(len(df)) or len(df))
+    assert (store.misses, store.hits, store.reloads, builds) == (1, 3, 0, [20])
+
+    pd.read_csv(ROSTER).head(25).to_csv(path, index=False)
+    assert len(store.get_dataframe()) == 25
+    assert store.derived('count', lambda df: builds.append(len(df)) or len(df)) == 25
+    assert (store.reloads, builds) == (1, [20, 25])
+
+
+def test_index_lookups_match_the_first_row_with_that_id():
+    index = StudentIndex([500003, 500001, 500002, 500001])
+    assert len(index) == 3
+    assert [index.position(student_id) for student_id in (500001, '500002', 500009, 'abc', None)] == \
+        [1, 2, None, None, None]
+    assert 500003 in index and 500004 not in index
+    assert index.positions([500002, 500009, 500001, 500003]).tolist() == [2, -1, 1, 0]
+    assert StudentIndex([]).positions([500001]).tolist() == [-1]
+
+
+@pytest.mark.parametrize('backend', ['csv', 'sqlite'])
+def test_student_lookups_skip_unknown_ids_in_request_order(tmp_path, backend):
+    store, _ = _store(tmp_path, backend)
+    roster = pd.read_csv(ROSTER).head(20)
+    wanted = [roster['student_id'].iloc[7], 999999, roster['student_id'].iloc[2]]
+    assert store.get_student(wanted[0])['name'] == roster['name'].iloc[7]
+    assert store.get_student(999999) is None
+    assert store.get_students(wanted)['student_id'].tolist() == [wanted[0], wanted[2]]
+    # The same answers once the whole roster is loaded
+    store.get_dataframe()
+    assert store.get_student(wanted[0])['name'] == roster['name'].iloc[7]
+    assert store.get_students(wanted)['student_id'].tolist() == [wanted[0], wanted[2]]
+
+
+def test_student_record_is_reused_until_the_roster_changes(tmp_path):
+    store, path = _store(tmp_path)
+    roster = pd.read_csv(ROSTER)
+    student_id = int(roster['student_id'].iloc[4])
+    record = store.get_student_record(student_id)
+    assert record['name'] == roster['name'].iloc[4]
+    assert type(record.gpa) is float and type(record.semester) is int
+    assert store.get_student_record(student_id, record) is record
+    assert store.get_student_record(999999) is None
+
+    pd.read_csv(ROSTER).head(21).to_csv(path, index=False)
+    refreshed = store.get_student_record(student_id, record)
+    assert refreshed is not record and refreshed.version == store.version
+    # Far smaller than the row Series it replaces in session state
+    assert deep_sizeof(record) * 3 < deep_sizeof(store.get_student(student_id))
+    assert StudentRecord.from_row(store.get_student(student_id)).name == record.name
@@ -0,0 +1,49 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+from facets import FACET_COLUMNS, FacetIndex
+from storage import STUDENT_DTYPES
+
+ROSTER = os.path.join(APP_DIR, 'data', 'student_data.csv')
+
+
+def _mask(df, filters):
+    mask = np.ones(len(df), dtype=bool)
+    for column, values in filters.items():
+        values = values if isinstance(values, list) else [values]
+        mask &= df[column].isin(values).to_numpy()
+    return mask
+
+
+def test_options_and_counts_match_the_roster():
+    df = pd.read_csv(ROSTER, dtype=STUDENT_DTYPES)
+    index = FacetIndex(df)
+    assert index.columns == FACET_COLUMNS
+    for column in FACET_COLUMNS:
+        assert index.options(column) == df[column].unique().tolist()
+        assert index.counts(column) == df[column].value_counts().to_dict()
+
+
+def test_queries_match_boolean_masks():
+    df = pd.read_csv(ROSTER, dtype=STUDENT_DTYPES)
+    index = FacetIndex(df)
+    specialization = index.options('specialization')
+    club = index.options('extracurricular_activities')
+    hits = np.arange(0, len(df), 3)
+    cases = [
+        {},
+        {'specialization': specialization[0]},
+        {'specialization': specialization[:2], 'extracurricular_activities': club[1]},
+        {'semester': df['semester'].iloc[0], 'batch_year': [df['batch_year'].iloc[0], 1900]},
+        {'specialization': 'No such specialization'},
+        {'specialization': []},
+    ]
+    for filters in cases:
+        expected = np.flatnonzero(_mask(df, filters))
+        assert index.query(filters).tolist() == expected.tolist(), filters
+        assert index.query(filters, hits).tolist() == np.intersect1d(expected, hits).tolist(), filters
@@ -0,0 +1,39 @@
+import os
+import sys
+import pandas as pd
+import pytest
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+sys.path.insert(0, os.path.join(APP_DIR, 'benchmarks'))
+
+from generate_roster import LAST_STUDENT_ID, generate_roster
+from roster_io import validate_chunk
+from storage import STUDENT_COLUMNS, read_student_csv
+
+
+def test_synthetic_rosters_are_valid_and_repeatable(tmp_path):
+    roster = generate_roster(2000, seed=3)
+    assert list(roster.columns) == STUDENT_COLUMNS
+    assert roster['student_id'].is_unique
+    valid, rejected = validate_chunk(roster.astype(str).astype(object))
+    assert len(rejected) == 0 and len(valid) == 2000
+    assert roster.equals(generate_roster(2000, seed=3))
+    assert not roster.equals(generate_roster(2000, seed=4))
+
+    path = str(tmp_path / 'roster.csv')
+    roster.to_csv(path, index=False)
+    assert read_student_csv(path).astype(str).equals(roster.astype(str))
+
+
+def test_sections_come_from_the_source_roster():
+    source = read_student_csv(os.path.join(APP_DIR, 'data', 'student_data.csv'))
+    roster = generate_roster(500)
+    sections = ['course', 'semester', 'batch_year']
+    known = pd.MultiIndex.from_frame(source[sections].astype(str))
+    assert pd.MultiIndex.from_frame(roster[sections].astype(str)).isin(known).all()
+
+
+def test_ids_must_stay_six_digits():
+    with pytest.raises(ValueError):
+        generate_roster(10, first_id=LAST_STUDENT_ID - 5)
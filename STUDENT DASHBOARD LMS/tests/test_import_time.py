@@ -0,0 +1,22 @@
+import os
+import sys
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(APP_DIR, 'benchmarks'))
+
+from import_time import import_times, startup_modules, summarize
+
+# Loaded by the page or login form that first needs them, never at startup
+PAGE_ONLY = ['credentials', 'passlib', 'aggregates', 'charts', 'facets', 'search_index', 'table_view',
+             'analytics', 'attendance_log', 'timetable', 'student_profile', 'plotly.express']
+
+
+def test_login_page_imports_leave_page_modules_alone():
+    modules = startup_modules()
+    assert 'credentials' not in modules and 'student_auth' in modules
+    rows = import_times(modules)
+    loaded = {name for name, *_ in rows}
+    assert not loaded & set(PAGE_ONLY)
+    report = summarize([rows], modules)
+    assert set(report['modules']) == set(modules)
+    assert report['total_ms'] > 0
@@ -0,0 +1,66 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from instrumentation import SpanHistogram, SpanRecorder
+
+
+class _Clock:
+    # Advances by one second every time it is read
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        self.now += 1.0
+        return self.now
+
+
+def test_nested_spans_are_traced_with_their_depth():
+    recorder = SpanRecorder(bounds=(1.5, 10.0), enabled=True, clock=_Clock())
+
+    @recorder.timed('inner')
+    def inner():
+        return 'done'
+
+    recorder.begin_trace()
+    with recorder.span('outer'):
+        assert inner() == 'done'
+    trace = recorder.end_trace()
+    assert [(offset, depth, name) for offset, depth, name, _ in trace] == [(1.0, 0, 'outer'), (2.0, 1, 'inner')]
+    assert [seconds for *_, seconds in trace] == [3.0, 1.0]
+    snapshot = recorder.snapshot()
+    assert snapshot['inner']['buckets'] == [(1.5, 1), (10.0, 0), (float('inf'), 0)]
+    assert snapshot['outer']['buckets'] == [(1.5, 0), (10.0, 1), (float('inf'), 0)]
+    assert recorder.end_trace() == []
+
+
+def test_disabled_recorder_records_nothing():
+    recorder = SpanRecorder(enabled=False)
+    with recorder.span('skipped'):
+        pass
+    assert recorder.timed('skipped')(lambda: 3)() == 3
+    assert recorder.snapshot() == {}
+
+
+def test_quantiles_interpolate_within_buckets_and_cap_at_the_maximum():
+    histogram = SpanHistogram(bounds=(1.0, 2.0, 4.0))
+    for seconds in (0.5, 1.5, 1.5, 3.0):
+        histogram.observe(seconds)
+    assert histogram.quantile(0.25) == 1.0
+    assert histogram.quantile(0.5) == 1.5
+    assert histogram.quantile(1.0) == 3.0
+    assert SpanHistogram().quantile(0.5) == 0.0
+
+
+def test_prometheus_buckets_are_cumulative():
+    recorder = SpanRecorder(bounds=(1.0, 2.0), enabled=True)
+    for seconds in (0.5, 1.5, 5.0):
+        recorder.observe('page "home"', seconds)
+    recorder.observe_size('session_state', 300)
+    text = recorder.to_prometheus()
+    assert 'lms_span_seconds_bucket{span="page \\"home\\"",le="1.0"} 1' in text
+    assert 'lms_span_seconds_bucket{span="page \\"home\\"",le="2.0"} 2' in text
+    assert 'lms_span_seconds_bucket{span="page \\"home\\"",le="+Inf"} 3' in text
+    assert 'lms_span_seconds_count{span="page \\"home\\""} 3' in text
+    assert 'lms_size_bytes_count{name="session_state"} 1' in text
@@ -0,0 +1,36 @@
+import os
+import sys
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(APP_DIR, 'benchmarks'))
+
+from load_test import Results, format_summary, summarize, user_address
+
+
+def test_users_get_distinct_addresses():
+    addresses = [user_address(user) for user in range(70000)]
+    assert len(set(addresses)) == len(addresses)
+    assert user_address(258) == '10.0.1.2'
+
+
+def test_summary_reports_steps_in_flow_order_and_span_deltas():
+    results = Results()
+    results.latencies['staff_login'] = [0.3]
+    results.latencies['login_page'] = [0.01 * i for i in range(1, 101)]
+    results.failures['student_login: timeout'] = 2
+    results.sessions = [object()] * 4
+    before = {'spans': {'app.rerun': {'count': 10, 'sum': 1.0}},
+              'sizes': {'session_state': {'count': 10, 'sum': 5000.0}}}
+    after = {'spans': {'app.rerun': {'count': 14, 'sum': 3.0}, 'charts.build': {'count': 1, 'sum': 0.5},
+                       'idle': {'count': 0, 'sum': 0.0}},
+             'sizes': {'session_state': {'count': 14, 'sum': 7000.0, 'max': 800}}}
+    summary = summarize(results, 2.0, (100 * 2 ** 20, 1.0, 0.5), (108 * 2 ** 20, 2.0, 1.0), None, before, after)
+    assert list(summary['steps']) == ['login_page', 'staff_login']
+    assert summary['steps']['login_page']['p50_ms'] == 510.0
+    assert summary['steps']['login_page']['max_ms'] == 1000.0
+    assert summary['server']['growth_per_session_kb'] == 2048.0
+    assert summary['server']['cpu_cores_used'] == 0.75
+    assert summary['spans'] == {'app.rerun': {'calls': 4, 'total_seconds': 2.0},
+                                'charts.build': {'calls': 1, 'total_seconds': 0.5}}
+    assert summary['session_state'] == {'reruns': 4, 'mean_bytes': 500.0, 'max_bytes': 800}
+    assert 'student_login: timeout' in format_summary(summary)
@@ -0,0 +1,66 @@
+import os
+import sys
+import pandas as pd
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+from attendance_log import AttendanceLog
+from data_store import StudentDataStore
+from roster_io import import_roster, validate_chunk
+from storage import make_storage
+
+ROSTER = os.path.join(APP_DIR, 'data', 'student_data.csv')
+
+
+def _store(tmp_path, rows=5):
+    path = str(tmp_path / 'roster.csv')
+    pd.read_csv(ROSTER).head(rows).to_csv(path, index=False)
+    return StudentDataStore(path, make_storage('csv', path)), path
+
+
+def test_validate_chunk_reports_every_problem_of_a_row():
+    chunk = pd.read_csv(ROSTER, keep_default_na=False).head(3)
+    chunk.loc[1, 'gpa'] = 4.5
+    chunk.loc[1, 'email'] = 'nobody'
+    chunk.loc[2, 'student_id'] = 1234567
+    valid, rejected = validate_chunk(chunk)
+    assert len(valid) == 1
+    assert rejected['error'].tolist() == ['email is not an address; gpa is above 4',
+                                          'student_id is above 999999']
+
+
+def test_import_updates_in_place_appends_new_and_writes_once(tmp_path, monkeypatch):
+    store, path = _store(tmp_path)
+    before = pd.read_csv(path)
+    incoming = pd.read_csv(ROSTER).iloc[[3, 7, 1]].copy()
+    incoming['gpa'] = 2.0
+    import_path = str(tmp_path / 'incoming.csv')
+    incoming.to_csv(import_path, index=False)
+
+    upserts = []
+    upsert = store.upsert
+    monkeypatch.setattr(store, 'upsert', lambda rows: upserts.append(len(rows)) or upsert(rows))
+    log = AttendanceLog(str(tmp_path / 'events.bin'))
+    stats = import_roster(import_path, store, chunk_size=1, log=log)
+
+    assert stats['imported'] == 3 and stats['rejected'] == 0
+    assert upserts == [3]
+    after = pd.read_csv(path)
+    new_id = incoming['student_id'].iloc[1]
+    assert after['student_id'].tolist() == before['student_id'].tolist() + [new_id]
+    assert after.set_index('student_id').loc[incoming['student_id'], 'gpa'].eq(2.0).all()
+    assert store.get_student(new_id)['gpa'] == 2.0
+    # Only the new student's class counts differ from the roster
+    assert [record['student_id'] for record in log.events(new_id)] == [new_id]
+    assert len(log) == 1
+
+
+def test_dry_run_writes_nothing(tmp_path):
+    store, path = _store(tmp_path)
+    before = open(path).read()
+    import_path = str(tmp_path / 'incoming.csv')
+    pd.read_csv(ROSTER).iloc[5:8].to_csv(import_path, index=False)
+    stats = import_roster(import_path, store, dry_run=True, log=AttendanceLog(str(tmp_path / 'events.bin')))
+    assert stats['imported'] == 3
+    assert open(path).read() == before
@@ -0,0 +1,37 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+from search_index import SearchIndex
+
+ROSTER = os.path.join(APP_DIR, 'data', 'student_data.csv')
+
+
+def _scan(df, query):
+    # The Student Details filter the index replaced
+    query = query.lower()
+    matches = df['name'].str.lower().str.contains(query, regex=False) | \
+        df['student_id'].astype(str).str.contains(query, regex=False)
+    return np.flatnonzero(matches.to_numpy())
+
+
+def test_search_matches_a_substring_scan():
+    df = pd.read_csv(ROSTER)
+    df.loc[5, 'name'] = 'Zoë Ñúñez'
+    index = SearchIndex.from_frame(df)
+    queries = ['', 'a', 'SH', 'sha', 'Sharma', 'arav sh', '5000', '500042', 'ë ñ', 'úñe', 'zzz', 'a\x015']
+    queries += [name[start:start + 4] for name in df['name'].head(20) for start in (0, 2)]
+    for query in queries:
+        assert index.search(query).tolist() == _scan(df, query).tolist(), query
+
+
+def test_search_never_matches_across_the_name_and_id():
+    index = SearchIndex(['Ana'], [500001])
+    assert index.search('ana').tolist() == [0]
+    assert index.search('na5').tolist() == []
+    assert len(SearchIndex([], [])) == 0
+    assert SearchIndex([], []).search('abc').tolist() == []
@@ -0,0 +1,54 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from session_tokens import RevocationStore, SessionTokenSigner
+
+
+class Clock:
+    def __init__(self, now=1_000_000):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def _signer(tmp_path, clock=None, secret='test-secret'):
+    return SessionTokenSigner(secret, ttl=60, clock=clock or Clock(),
+                              revocations=RevocationStore(str(tmp_path / 'revoked.sqlite')))
+
+
+def test_issued_token_validates(tmp_path):
+    signer = _signer(tmp_path)
+    payload = signer.validate(signer.issue(500001, {'name': 'Aarav Sharma'}))
+    assert payload['sub'] == 500001
+    assert payload['name'] == 'Aarav Sharma'
+
+
+def test_malformed_tokens_are_rejected_without_raising(tmp_path):
+    signer = _signer(tmp_path)
+    for token in ['é.AAAA', 'AAAA.é', '', 'a.b.c', None, 'AAAA.AAAA']:
+        assert signer.validate(token) is None
+    assert signer.metrics()['rejected'] == {'malformed': 5, 'bad_signature': 1}
+
+
+def test_tampered_and_expired_tokens_are_rejected(tmp_path):
+    clock = Clock()
+    signer = _signer(tmp_path, clock)
+    token = signer.issue(500001)
+    assert _signer(tmp_path, clock, secret='other-secret').validate(token) is None
+    clock.now += 60
+    assert signer.validate(token) is None
+    assert signer.metrics()['rejected'] == {'expired': 1}
+
+
+def test_revocation_survives_a_restart(tmp_path):
+    signer = _signer(tmp_path)
+    token = signer.issue(500001)
+    other = signer.issue(500002)
+    assert signer.revoke(token)
+    restarted = _signer(tmp_path)
+    assert restarted.validate(token) is None
+    assert restarted.validate(other)['sub'] == 500002
+    assert restarted.metrics()['revoked_tokens'] == 1
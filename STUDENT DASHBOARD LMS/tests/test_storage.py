@@ -0,0 +1,92 @@
+import os
+import sys
+import threading
+import pandas as pd
+import pytest
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+from storage import STORAGE_BACKENDS, STUDENT_COLUMNS, make_storage, read_student_csv
+
+ROSTER = os.path.join(APP_DIR, 'data', 'student_data.csv')
+
+
+def _roster(tmp_path):
+    path = str(tmp_path / 'roster.csv')
+    pd.read_csv(ROSTER).to_csv(path, index=False)
+    return path
+
+
+def _same(left, right):
+    # Values equal column by column, whatever the backend's dtypes
+    return left.astype(str).reset_index(drop=True).equals(right.astype(str).reset_index(drop=True))
+
+
+@pytest.mark.parametrize('backend', sorted(STORAGE_BACKENDS))
+def test_every_backend_loads_the_csv(tmp_path, backend):
+    path = _roster(tmp_path)
+    loaded = make_storage(backend, path).load()
+    assert list(loaded.columns) == STUDENT_COLUMNS
+    assert _same(loaded, read_student_csv(path))
+
+
+@pytest.mark.parametrize('backend', ['feather', 'parquet', 'npy'])
+def test_columnar_copies_are_dictionary_encoded_and_column_selective(tmp_path, backend):
+    storage = make_storage(backend, _roster(tmp_path))
+    storage.convert()
+    loaded = storage.load(['specialization', 'gpa'])
+    assert list(loaded.columns) == ['specialization', 'gpa']
+    assert isinstance(loaded['specialization'].dtype, pd.CategoricalDtype)
+    assert storage.is_current()
+
+
+@pytest.mark.parametrize('backend', ['feather', 'npy'])
+def test_columnar_copy_is_rebuilt_when_the_csv_changes(tmp_path, backend):
+    path = _roster(tmp_path)
+    storage = make_storage(backend, path)
+    storage.load()
+    changed = read_student_csv(path)
+    changed.loc[0, 'gpa'] = 1.5
+    changed.to_csv(path, index=False)
+    os.utime(path, ns=(os.stat(path).st_atime_ns, os.stat(path).st_mtime_ns + 10 ** 9))
+    assert not storage.is_current()
+    assert storage.load()['gpa'].iloc[0] == 1.5
+
+
+def test_sqlite_is_the_source_of_truth_once_created(tmp_path):
+    path = _roster(tmp_path)
+    storage = make_storage('sqlite', path)
+    roster = storage.load()
+    changed = read_student_csv(path)
+    changed.loc[0, 'gpa'] = 1.5
+    changed.to_csv(path, index=False)
+    assert storage.load()['gpa'].iloc[0] == roster['gpa'].iloc[0]
+    assert make_storage('sqlite', path).load()['gpa'].iloc[0] == roster['gpa'].iloc[0]
+
+
+def test_sqlite_queries_match_pandas_filters(tmp_path):
+    storage = make_storage('sqlite', _roster(tmp_path))
+    roster = read_student_csv(ROSTER)
+    specializations = sorted(roster['specialization'].unique())[:2]
+    result = storage.query({'specialization': specializations, 'gpa': (3.0, 3.8)}, ['student_id', 'gpa'])
+    expected = roster[roster['specialization'].isin(specializations) & roster['gpa'].between(3.0, 3.8)]
+    assert result['student_id'].tolist() == expected['student_id'].tolist()
+    assert len(storage.query(limit=5)) == 5
+    with pytest.raises(ValueError):
+        storage.query({'password': 'x'})
+
+
+def test_sqlite_writes_are_seen_by_readers_on_other_threads(tmp_path):
+    storage = make_storage('sqlite', _roster(tmp_path))
+    student_id = storage.load()['student_id'].iloc[3]
+    before = storage.signature()
+    row = read_student_csv(ROSTER).iloc[[3]].assign(name='Renamed Student')
+    after = storage.upsert(row, before)
+    assert after != before
+    seen = []
+    thread = threading.Thread(target=lambda: seen.append(storage.fetch_student(student_id)['name']))
+    thread.start()
+    thread.join()
+    assert seen == ['Renamed Student']
+    assert storage.fetch_student(999999) is None
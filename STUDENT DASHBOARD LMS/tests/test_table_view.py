@@ -0,0 +1,34 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+from table_view import SORT_LABELS, SortOrders, page_positions
+
+ROSTER = os.path.join(APP_DIR, 'data', 'student_data.csv')
+
+
+def _all_pages(positions, sort_orders, size, column, descending, page_size=7):
+    pages = []
+    for page in range(1, len(positions) // page_size + 2):
+        pages.append(page_positions(positions, sort_orders, size, column, descending, page, page_size))
+    return np.concatenate(pages).tolist()
+
+
+@pytest.mark.parametrize('column', list(SORT_LABELS))
+@pytest.mark.parametrize('descending', [False, True])
+def test_pages_follow_a_stable_sort_of_the_filtered_rows(column, descending):
+    df = pd.read_csv(ROSTER)
+    sort_orders = SortOrders(df)
+    everyone = np.arange(len(df))
+    # Unfiltered, a small filter (sorted by rank) and a large one (membership mask)
+    for positions in (everyone, everyone[::13], everyone[everyone % 5 != 0]):
+        if column is None:
+            expected = positions[::-1] if descending else positions
+        else:
+            expected = df.iloc[positions].sort_values(column, ascending=not descending, kind='stable').index
+        assert _all_pages(positions, sort_orders, len(df), column, descending) == list(expected)
@@ -0,0 +1,42 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import theme
+
+
+def _page(monkeypatch):
+    # A plain dict for session state and a list of the markdown sent
+    sent = []
+    monkeypatch.setattr(theme.st, 'session_state', {})
+    monkeypatch.setattr(theme.st, 'markdown', lambda html, unsafe_allow_html: sent.append(html))
+    return sent
+
+
+def test_styles_are_minified_and_sent_once_per_rerun(monkeypatch):
+    sent = _page(monkeypatch)
+    theme.register_styles('test_a', '<style>\n  .a { color: red; }\n  /* note */\n</style>')
+    theme.register_styles('test_b', '.b > p { margin : 0 ; }')
+    assert theme.merged_styles('test_a', 'test_b') == '<style>.a{color:red}.b>p{margin:0}</style>'
+
+    theme.begin_rerun()
+    theme.inject_styles('test_a', 'test_b')
+    theme.inject_styles('test_b', 'test_a')
+    theme.render_html('<p>hi</p>')
+    assert sent == ['<style>.a{color:red}.b>p{margin:0}</style>', '<p>hi</p>']
+
+    theme.begin_rerun()
+    theme.inject_styles('test_b')
+    assert sent[-1] == '<style>.b>p{margin:0}</style>'
+    stats = theme.html_stats()
+    assert stats['last_run'] == {'html_bytes': len(sent[0]) + len(sent[1]), 'html_elements': 2}
+    assert stats['this_run'] == {'html_bytes': len(sent[2]), 'html_elements': 1}
+
+
+def test_re_registering_a_fragment_rebuilds_the_merged_block(monkeypatch):
+    _page(monkeypatch)
+    theme.register_styles('test_c', '.c { top: 0; }')
+    assert theme.merged_styles('test_c') == '<style>.c{top:0}</style>'
+    theme.register_styles('test_c', '.c { top: 1px; }')
+    assert theme.merged_styles('test_c') == '<style>.c{top:1px}</style>'
@@ -0,0 +1,78 @@
+import os
+import sys
+import threading
+from types import SimpleNamespace
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import timetable
+from timetable import DAYS, LECTURES_PER_DAY, VENUES, Timetable, TimetableSolver, parse_time_slot
+
+
+def _sections(count):
+    return [(f'Course {i}', 1, 2020) for i in range(count)]
+
+
+def test_more_sections_than_venues_are_all_solved():
+    sections = _sections(len(VENUES) * 2 + 1)
+    timetables = TimetableSolver().solve(sections)
+    assert sorted(timetables) == sorted(sections)
+    for section_timetable in timetables.values():
+        assert len(section_timetable.frame) == len(DAYS) * LECTURES_PER_DAY
+        # A section is never booked twice in the same slot
+        assert not section_timetable.frame.duplicated(['Day', 'Time']).any()
+
+
+def test_solving_is_deterministic():
+    sections = _sections(len(VENUES) + 3)
+    first = TimetableSolver().solve(sections)
+    second = TimetableSolver().solve(sections)
+    for section in sections:
+        assert first[section].frame.equals(second[section].frame)
+
+
+def test_no_professor_or_venue_is_booked_twice():
+    # Enough sections to need several pools; pools have their own staff and rooms
+    sections = _sections(len(VENUES) * 2 + 1)
+    frames = [timetable.frame for timetable in TimetableSolver().solve(sections).values()]
+    combined = pd.concat(frames)
+    assert combined['Venue'].nunique() > len(VENUES)
+    assert not combined.duplicated(['Day', 'Time', 'Professor']).any()
+    assert not combined.duplicated(['Day', 'Time', 'Venue']).any()
+
+
+def test_concurrent_cold_calls_solve_once(monkeypatch):
+    calls = []
+    solve = TimetableSolver.solve
+
+    def counting_solve(self, sections):
+        calls.append(sections)
+        return solve(self, sections)
+
+    monkeypatch.setattr(TimetableSolver, 'solve', counting_solve)
+    sections = tuple(_sections(4))
+    monkeypatch.setattr(timetable, 'get_store', lambda: SimpleNamespace(derived=lambda name, builder: sections))
+    timetable._solve_timetables.cache_clear()
+    threads = [threading.Thread(target=timetable.get_timetables) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    timetable._solve_timetables.cache_clear()
+    assert len(calls) == 1
+
+
+def test_time_keys_order_afternoon_slots_after_morning_ones():
+    assert parse_time_slot('12:30 PM - 01:00 PM') == (750, 780)
+    assert parse_time_slot('09:00 AM - 10:30 AM') == (540, 630)
+    frame = pd.DataFrame({
+        'Day': ['Tuesday', 'Monday', 'Monday', 'Monday'],
+        'Time': ['09:00 AM - 10:00 AM', '01:00 PM - 02:00 PM', '11:00 AM - 12:00 PM', '09:30 AM - 10:30 AM'],
+        'Subject': ['D', 'C', 'B', 'A'], 'Venue': ['V'] * 4, 'Professor': ['P'] * 4
+    })
+    by_day = Timetable(frame)
+    assert by_day.days == ['Monday', 'Tuesday']
+    assert [record['Subject'] for record in by_day.day('Monday')] == ['A', 'B', 'C']
+    assert by_day.frame['Subject'].tolist() == ['A', 'B', 'C', 'D']
+    assert by_day.day('Sunday') == []
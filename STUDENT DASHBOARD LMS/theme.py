@@ -0,0 +1,83 @@
+import re
+import threading
+import streamlit as st
+
+# Central registry for the CSS fragments the pages use. Each module registers
+# its fragments once at import; pages ask for them by name and every fragment
+# is sent at most once per rerun, merged into a single minified <style> block.
+# Streamlit drops elements that are not re-sent on a rerun, so styles have to
+# be emitted on every rerun, but never more than once.
+
+_sources = {}
+_fragments = {}
+_merged = {}
+_lock = threading.Lock()
+
+_RUN_KEY = '_theme_run'
+_LAST_RUN_KEY = '_theme_last_run'
+
+
+def _minify(css):
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};:,>])\s*', r'\1', css)
+    return css.replace(';}', '}').strip()
+
+
+def register_styles(name, css):
+    # css may be given with or without its <style> wrapper
+    with _lock:
+        if _sources.get(name) == css:
+            return
+        _sources[name] = css
+        _fragments[name] = _minify(re.sub(r'</?style>', '', css))
+        _merged.clear()
+
+
+def merged_styles(*names):
+    # One <style> block for the given fragments, built once per process
+    with _lock:
+        if names not in _merged:
+            _merged[names] = '<style>' + ''.join(_fragments[name] for name in names) + '</style>'
+        return _merged[names]
+
+
+def begin_rerun():
+    # Called at the top of the script; starts the per-rerun bookkeeping
+    previous = st.session_state.get(_RUN_KEY)
+    if previous is not None:
+        st.session_state[_LAST_RUN_KEY] = {'html_bytes': previous['html_bytes'],
+                                           'html_elements': previous['html_elements']}
+    st.session_state[_RUN_KEY] = {'styles': set(), 'html_bytes': 0, 'html_elements': 0}
+
+
+def _run_state():
+    # Without begin_rerun() there is nothing to dedupe against, so every
+    # request is emitted and counted in a throwaway record
+    return st.session_state.get(_RUN_KEY) or {'styles': set(), 'html_bytes': 0, 'html_elements': 0}
+
+
+def render_html(html, target=st):
+    # st.markdown for raw HTML, counted towards the per-rerun byte total
+    state = _run_state()
+    state['html_bytes'] += len(html.encode('utf-8'))
+    state['html_elements'] += 1
+    return target.markdown(html, unsafe_allow_html=True)
+
+
+def inject_styles(*names):
+    state = _run_state()
+    pending = tuple(name for name in dict.fromkeys(names) if name not in state['styles'])
+    if not pending:
+        return
+    state['styles'].update(pending)
+    render_html(merged_styles(*pending))
+
+
+def html_stats():
+    # HTML sent so far in this rerun and in full in the previous one
+    state = _run_state()
+    return {
+        'this_run': {'html_bytes': state['html_bytes'], 'html_elements': state['html_elements']},
+        'last_run': st.session_state.get(_LAST_RUN_KEY)
+    }
@@ -1,50 +1,287 @@
 import streamlit as st
 import pandas as pd
+import functools
+import itertools
 import random
-from datetime import datetime, timedelta
-
-def generate_timetable_data():
-    # Sample data for demonstration
-    subjects = [
-        'Data Structures', 'Algorithms', 'Database Systems', 'Computer Networks',
-        'Operating Systems', 'Software Engineering', 'Web Development', 'Machine Learning'
-    ]
-    venues = ['Room 101', 'Room 102', 'Room 103', 'Lab 201', 'Lab 202', 'Lecture Hall 301']
-    professors = [
-        'Dr. Sharma', 'Dr. Patel', 'Prof. Singh', 'Dr. Kumar',
-        'Prof. Gupta', 'Dr. Verma', 'Prof. Reddy', 'Dr. Malhotra'
-    ]
-    time_slots = [
-        '09:00 AM - 10:30 AM', '10:45 AM - 12:15 PM', '01:00 PM - 02:30 PM',
-        '02:45 PM - 04:15 PM', '04:30 PM - 06:00 PM'
-    ]
-    days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
-    
-    timetable = []
-    used_slots = set()
-    
-    # Generate random timetable ensuring no clashes
-    for day in days:
-        for _ in range(4):  # 4 lectures per day
-            while True:
-                subject = random.choice(subjects)
-                time_slot = random.choice(time_slots)
-                venue = random.choice(venues)
-                professor = random.choice(professors)
-                
-                slot_key = f"{day}-{time_slot}"
-                if slot_key not in used_slots:
-                    used_slots.add(slot_key)
-                    timetable.append({
-                        'Day': day,
-                        'Time': time_slot,
-                        'Subject': subject,
-                        'Venue': venue,
-                        'Professor': professor
-                    })
-                    break
-    
-    return pd.DataFrame(timetable)
+import threading
+import zlib
+from datetime import datetime
+from data_store import get_store
+from theme import inject_styles, register_styles, render_html
+from instrumentation import timed
+
+# Sample data for demonstration
+SUBJECTS = [
+    'Data Structures', 'Algorithms', 'Database Systems', 'Computer Networks',
+    'Operating Systems', 'Software Engineering', 'Web Development', 'Machine Learning'
+]
+VENUES = ['Room 101', 'Room 102', 'Room 103', 'Lab 201', 'Lab 202', 'Lecture Hall 301']
+PROFESSORS = [
+    'Dr. Sharma', 'Dr. Patel', 'Prof. Singh', 'Dr. Kumar',
+    'Prof. Gupta', 'Dr. Verma', 'Prof. Reddy', 'Dr. Malhotra'
+]
+TIME_SLOTS = [
+    '09:00 AM - 10:30 AM', '10:45 AM - 12:15 PM', '01:00 PM - 02:30 PM',
+    '02:45 PM - 04:15 PM', '04:30 PM - 06:00 PM'
+]
+DAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
+LECTURES_PER_DAY = 4
+MAX_DAY_ATTEMPTS = 200
+MAX_SECTION_ATTEMPTS = 20
+TIMETABLE_SEED = 2024
+TIMETABLE_COLUMNS = ['Day', 'Time', 'Subject', 'Venue', 'Professor']
+# Names of the professors and venues of the second and later pools
+POOL_RESOURCE_NAME = '{name} (pool {pool})'
+
+
+@functools.lru_cache(maxsize=None)
+def parse_time_slot(slot):
+    # '01:00 PM - 02:30 PM' -> (780, 870), minutes since midnight
+    start, end = (datetime.strptime(part.strip(), '%I:%M %p') for part in slot.split('-'))
+    return start.hour * 60 + start.minute, end.hour * 60 + end.minute
+
+
+class Timetable:
+    # One section's weekly timetable, ordered by day and start time, with a
+    # day -> classes index built once so views only look rows up
+    def __init__(self, df, days=DAYS):
+        day_ordinal = {day: i for i, day in enumerate(days)}
+        minutes = [parse_time_slot(slot) for slot in df['Time']]
+        frame = df.assign(
+            day_ordinal=df['Day'].map(day_ordinal).astype('int8'),
+            start_minute=pd.Series([start for start, _ in minutes], index=df.index, dtype='int16'),
+            end_minute=pd.Series([end for _, end in minutes], index=df.index, dtype='int16')
+        )
+        self.frame = frame.sort_values(['day_ordinal', 'start_minute'], kind='stable').reset_index(drop=True)
+        self._by_day = {}
+        for record in self.frame.to_dict('records'):
+            self._by_day.setdefault(record['Day'], []).append(record)
+
+    @property
+    def days(self):
+        # Days with at least one class, in week order
+        return list(self._by_day)
+
+    def day(self, day):
+        return self._by_day.get(day, [])
+
+
+def _section_seed(section):
+    # Stable across processes, unlike hash() on strings
+    return zlib.crc32('|'.join(str(part) for part in (TIMETABLE_SEED,) + tuple(section)).encode('utf-8'))
+
+
+class TimetableSolver:
+    # Places the weekly lectures of every course/semester/batch section into
+    # day/time slots so that no section, professor or venue is booked twice at
+    # the same time. Sections are solved in sorted order with a per-section
+    # seed, so the same set of sections always gives the same timetables.
+    # Once a section no longer fits around the bookings of the ones before
+    # it, it and the sections after it go into a fresh pool with staff and
+    # rooms of its own, named after the originals with the pool number, so
+    # no professor or venue is ever booked twice and any number of sections
+    # can be solved.
+    def __init__(self, subjects=SUBJECTS, professors=PROFESSORS, venues=VENUES,
+                 days=DAYS, time_slots=TIME_SLOTS, lectures_per_day=LECTURES_PER_DAY):
+        self.subjects = list(subjects)
+        self.professors = list(professors)
+        self.venues = list(venues)
+        self.days = list(days)
+        self.time_slots = list(time_slots)
+        self.lectures_per_day = lectures_per_day
+        # (day, slot) -> professors / venues already booked by earlier sections
+        self._busy_professors = {}
+        self._busy_venues = {}
+        # professor -> lectures per week across sections
+        self._load = {}
+
+    def _lecture_queue(self, rng):
+        # Subjects in shuffled rounds, so weekly lecture counts per subject
+        # differ by at most one
+        queue = []
+        while len(queue) < len(self.days) * self.lectures_per_day:
+            round_ = list(self.subjects)
+            rng.shuffle(round_)
+            queue.extend(round_)
+        return queue[:len(self.days) * self.lectures_per_day]
+
+    def _free_venue(self, key, start=0):
+        busy = self._busy_venues.get(key, ())
+        for i in range(len(self.venues)):
+            venue = self.venues[(start + i) % len(self.venues)]
+            if venue not in busy:
+                return venue
+        return None
+
+    def _place_day(self, rng, day, lectures, teacher, slot_order):
+        # Search slot assignments for the day's lectures, most constrained
+        # lecture first; at most len(slots)! / (len(slots) - n)! candidates
+        def candidates(professor, taken):
+            for slot in slot_order:
+                key = (day, slot)
+                if slot in taken or professor in self._busy_professors.get(key, ()):
+                    continue
+                if self._free_venue(key) is not None:
+                    yield slot
+
+        order = sorted(range(len(lectures)),
+                       key=lambda i: len(list(candidates(teacher[lectures[i]], set()))))
+        placed = {}
+
+        def search(position):
+            if position == len(order):
+                return True
+            index = order[position]
+            professor = teacher[lectures[index]]
+            for slot in candidates(professor, set(placed.values())):
+                placed[index] = slot
+                # Claim the professor for this slot so later lectures of the
+                # same day see it; venues are picked once the day is fixed
+                self._busy_professors.setdefault((day, slot), set()).add(professor)
+                if search(position + 1):
+                    return True
+                self._busy_professors[(day, slot)].discard(professor)
+                del placed[index]
+            return False
+
+        if not search(0):
+            raise ValueError(f'No clash-free timetable for {day}: professors or venues are fully booked')
+
+        rows = []
+        for index, slot in sorted(placed.items(), key=lambda item: self.time_slots.index(item[1])):
+            key = (day, slot)
+            venue = self._free_venue(key, rng.randrange(len(self.venues)))
+            self._busy_venues.setdefault(key, set()).add(venue)
+            rows.append({'Day': day, 'Time': slot, 'Subject': lectures[index],
+                         'Venue': venue, 'Professor': teacher[lectures[index]]})
+        return rows
+
+    def _assign_teachers(self, rng, queue):
+        # Subjects with the most lectures go to the least-loaded professors,
+        # each professor taking one subject of the section where possible
+        professors = list(self.professors)
+        rng.shuffle(professors)
+        lecture_counts = {subject: queue.count(subject) for subject in self.subjects}
+        teacher = {}
+        for subject in sorted(self.subjects, key=lambda subject: -lecture_counts[subject]):
+            taken = set(teacher.values())
+            pool = [professor for professor in professors if professor not in taken] or professors
+            professor = min(pool, key=lambda professor: self._load.get(professor, 0))
+            teacher[subject] = professor
+            self._load[professor] = self._load.get(professor, 0) + lecture_counts[subject]
+        return teacher
+
+    def _attempt_section(self, rng):
+        remaining = self._lecture_queue(rng)
+        teacher = self._assign_teachers(rng, remaining)
+        timetable = []
+        for day in self.days:
+            slot_order = list(self.time_slots)
+            rng.shuffle(slot_order)
+            # Take the next lectures in the queue; if their professors cannot
+            # all be fitted in, try other picks of distinct subjects from the
+            # rest of the week
+            for attempt, picks in enumerate(self._day_picks(day, remaining, teacher)):
+                lectures = [remaining[i] for i in picks]
+                try:
+                    timetable.extend(self._place_day(rng, day, lectures, teacher, slot_order))
+                except ValueError:
+                    if attempt + 1 >= MAX_DAY_ATTEMPTS:
+                        raise
+                    continue
+                remaining = [lecture for i, lecture in enumerate(remaining) if i not in picks]
+                break
+            else:
+                raise ValueError(f'No clash-free timetable for {day}: professors or venues are fully booked')
+        return timetable
+
+    def solve_section(self, section):
+        # A dead end rolls back this section's bookings and starts over from
+        # the next seed in a fixed sequence
+        seed = _section_seed(section)
+        for attempt in range(MAX_SECTION_ATTEMPTS):
+            saved = ({key: set(value) for key, value in self._busy_professors.items()},
+                     {key: set(value) for key, value in self._busy_venues.items()},
+                     dict(self._load))
+            try:
+                timetable = self._attempt_section(random.Random(seed + attempt))
+            except ValueError:
+                self._busy_professors, self._busy_venues, self._load = saved
+                continue
+            return Timetable(pd.DataFrame(timetable, columns=TIMETABLE_COLUMNS), self.days)
+        raise ValueError(f'No clash-free timetable for {section}: professors or venues are fully booked')
+
+    def _day_picks(self, day, remaining, teacher):
+        # Only lectures whose professor still has a free slot that day
+        eligible = [i for i, subject in enumerate(remaining)
+                    if any(teacher[subject] not in self._busy_professors.get((day, slot), ())
+                           for slot in self.time_slots)]
+        count = min(self.lectures_per_day, len(remaining))
+        for picks in itertools.combinations(eligible, count):
+            if len({remaining[i] for i in picks}) == count:
+                yield set(picks)
+
+    def _new_pool(self, number):
+        rename = lambda names: [POOL_RESOURCE_NAME.format(name=name, pool=number) for name in names]
+        return TimetableSolver(self.subjects, rename(self.professors), rename(self.venues),
+                               self.days, self.time_slots, self.lectures_per_day)
+
+    def solve(self, sections):
+        timetables = {}
+        pool, pools = self, 1
+        for section in sorted(sections):
+            try:
+                timetables[section] = pool.solve_section(section)
+            except ValueError:
+                # solve_section rolled its bookings back; start a new pool
+                pools += 1
+                pool = self._new_pool(pools)
+                timetables[section] = pool.solve_section(section)
+        return timetables
+
+
+# Sessions that miss the cache at the same time wait for one solve
+_solve_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=8)
+def _solve_timetables(sections):
+    return TimetableSolver().solve(sections)
+
+
+def _roster_sections(df):
+    return tuple(sorted(set(zip(df['course'].astype(str), df['semester'].astype(int),
+                                df['batch_year'].astype(int)))))
+
+
+@timed('timetable.get_timetables')
+def get_timetables():
+    # Timetables for every section in the roster, computed once per set of
+    # sections and shared by all sessions. Treat them as read-only.
+    sections = get_store().derived('timetable_sections', _roster_sections)
+    with _solve_lock:
+        return _solve_timetables(sections)
+
+
+def generate_timetable_data(course=None, semester=None, batch_year=None):
+    # Weekly timetable for one course/semester/batch; defaults to the first
+    # section in the roster
+    return section_timetable(course, semester, batch_year).frame
+
+
+@timed('timetable.section_timetable')
+def section_timetable(course=None, semester=None, batch_year=None):
+    timetables = get_timetables()
+    if course is None:
+        return next(iter(timetables.values()))
+    return timetables[(str(course), int(semester), int(batch_year))]
+
+
+@timed('timetable.student_timetable')
+def student_timetable(student_data=None):
+    if student_data is None:
+        return section_timetable()
+    return section_timetable(student_data['course'], student_data['semester'], student_data['batch_year'])
 
 # Global CSS styles for consistent theming
 def get_theme_styles():
@@ -91,14 +328,20 @@ def get_theme_styles():
     </style>
     """
 
-def display_timetable():
+register_styles('timetable', get_theme_styles())
+
+@timed('timetable.display_timetable')
+def display_timetable(student_data=None):
     # Apply global styles
-    st.markdown(get_theme_styles(), unsafe_allow_html=True)
-    st.markdown("<h2 class='section-title'>📅 Weekly Timetable</h2>", unsafe_allow_html=True)
+    inject_styles('timetable')
+    render_html("<h2 class='section-title'>📅 Weekly Timetable</h2>")
     
-    # Initialize or load timetable data
-    if 'timetable_data' not in st.session_state:
-        st.session_state.timetable_data = generate_timetable_data()
+    # Shared timetable for the student's section
+    try:
+        timetable = student_timetable(student_data)
+    except (KeyError, ValueError) as e:
+        st.error(f'Error loading timetable data: {str(e)}')
+        return
     
     # View options
     view_type = st.radio(
@@ -107,35 +350,31 @@ def display_timetable():
         horizontal=True
     )
     
-    df = st.session_state.timetable_data
-    
     if view_type == "Weekly View":
         
-        for day in df['Day'].unique():
-            st.markdown(f"<div class='day-header'>{day}</div>", unsafe_allow_html=True)
-            day_schedule = df[df['Day'] == day].sort_values(by='Time')
+        for day in timetable.days:
+            render_html(f"<div class='day-header'>{day}</div>")
             
-            for _, row in day_schedule.iterrows():
-                st.markdown(f"""
+            for row in timetable.day(day):
+                render_html(f"""
                 <div class='class-card'>
                     <strong>{row['Time']}</strong><br>
                     📚 {row['Subject']}<br>
                     👨‍🏫 {row['Professor']}<br>
                     🏛️ {row['Venue']}
                 </div>
-                """, unsafe_allow_html=True)
+                """)
     else:
         # Daily view
-        selected_day = st.selectbox("Select Day", df['Day'].unique())
-        day_schedule = df[df['Day'] == selected_day].sort_values('Time')
+        selected_day = st.selectbox("Select Day", timetable.days)
         
         # Create a more detailed daily view
-        st.markdown(f"""<div style='text-align: center; padding: 1rem;'>
+        render_html(f"""<div style='text-align: center; padding: 1rem;'>
             <h3 style='color: #1f4d7a;'>{selected_day}'s Schedule</h3>
-        </div>""", unsafe_allow_html=True)
+        </div>""")
         
-        for _, row in day_schedule.iterrows():
-            st.markdown(f"""
+        for row in timetable.day(selected_day):
+            render_html(f"""
             <div style='background-color: #2d2d2d; padding: 1rem; border-radius: 10px; 
                         box-shadow: 0 2px 4px rgba(0,0,0,0.2); margin-bottom: 1rem;'>
                 <h4 style='color: #4a9eff; margin: 0;'>{row['Time']}</h4>
@@ -145,37 +384,32 @@ def display_timetable():
                     <p style='margin: 0.2rem 0;'><strong>Venue:</strong> {row['Venue']}</p>
                 </div>
             </div>
-            """, unsafe_allow_html=True)
+            """)
 
-def add_timetable_to_dashboard():
+@timed('timetable.add_timetable_to_dashboard')
+def add_timetable_to_dashboard(student_data=None):
     # Apply global styles
-    st.markdown(get_theme_styles(), unsafe_allow_html=True)
-    st.markdown("<h2 class='section-title'>📅 Today's Schedule</h2>", unsafe_allow_html=True)
+    inject_styles('timetable')
+    render_html("<h2 class='section-title'>📅 Today's Schedule</h2>")
     
     try:
-        # Initialize timetable data if not exists
-        if 'timetable_data' not in st.session_state:
-            st.session_state.timetable_data = generate_timetable_data()
-        
-        df = st.session_state.timetable_data
+        timetable = student_timetable(student_data)
         # Get current day's schedule
         current_day = datetime.now().strftime('%A')
-        today_schedule = df[df['Day'] == current_day].sort_values(by='Time')
+        today_schedule = timetable.day(current_day)
         
         # Add error handling for empty schedule
-        if today_schedule.empty:
+        if not today_schedule:
             st.info("No classes scheduled for today!")
             return
         
-        for _, row in today_schedule.iterrows():
-            st.markdown(f"""
-            <div class='schedule-card'>
-                <div class='time-text'>{row['Time']}</div>
-                <div class='subject-text'>{row['Subject']}
-                    <div style='color: #6c757d; font-size: 0.9rem;'>{row['Professor']} | {row['Venue']}</div>
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
+        # All of today's classes go out as one element
+        render_html(''.join(
+            f"<div class='schedule-card'><div class='time-text'>{row['Time']}</div>"
+            f"<div class='subject-text'>{row['Subject']}"
+            f"<div style='color: #6c757d; font-size: 0.9rem;'>{row['Professor']} | {row['Venue']}</div></div></div>"
+            for row in today_schedule
+        ))
     except Exception as e:
         st.error(f'Error loading timetable data: {str(e)}')
         return